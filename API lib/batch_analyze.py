@@ -0,0 +1,187 @@
+# batch_analyze.py - วิเคราะห์ไฟล์วิดีโอทั้งโฟลเดอร์แบบขนาน (backfill / tuning)
+#
+#   python batch_analyze.py videos/ --pose "Bodyweight Squat" --out results/ --workers 8 --stride 2 --max-width 640
+#
+# - แต่ละ worker process มี PoseAnalyzer (mp_pose.Pose) ของตัวเอง สร้างครั้งเดียว reset ก่อนทุกไฟล์
+# - ผลต่อไฟล์: summary (reps, hold) + confidence ต่อเฟรม เป็น CSV หรือ Parquet (ต้องมี pandas + pyarrow)
+# - manifest.jsonl บันทึกไฟล์ที่เสร็จแล้ว -> รันซ้ำจะข้ามไฟล์ที่ทำไปแล้ว (resume หลัง crash)
+# - --pin: pin แต่ละ worker process ไว้กับ core ของตัวเอง (Linux, เลือกชุด core ด้วย --cpus)
+import argparse
+import multiprocessing
+import csv
+import hashlib
+import json
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+from modules.registry import DETECTORS
+from modules.video_jobs import analyze_video
+
+VIDEO_EXTENSIONS = (".mp4", ".mov", ".avi", ".mkv", ".webm", ".m4v")
+SUMMARY_FIELDS = ["file", "pose", "reps", "best_hold", "frames_total", "frames_processed",
+                  "stride", "duration", "elapsed", "processing_fps"]
+
+_analyzer = None  # ต่อ worker process
+
+
+def _init_worker(model_complexity, cpu_slots=None):
+    global _analyzer
+    import mediapipe as mp
+    from modules.affinity import init_worker_process
+    # ขนานที่ระดับ process แล้ว ไม่ให้ OpenCV แย่ง core กันเอง / --pin: process ละชุด core
+    init_worker_process(1, cpu_slots.get() if cpu_slots is not None else None)
+    from modules.pose_analyzer import PoseAnalyzer
+    _analyzer = PoseAnalyzer(mp.solutions.pose, model_complexity=model_complexity)
+
+
+def _process(path, pose, stride, max_width):
+    """รันใน worker: คืนค่า (path, result, error)"""
+    try:
+        _analyzer.reset()  # ล้างการ track ของไฟล์ก่อน (คนละวิดีโอ ไม่ต่อเนื่องกัน)
+        return path, analyze_video(path, pose, _analyzer, stride=stride, max_width=max_width), None
+    except Exception as e:
+        return path, None, str(e) or e.__class__.__name__
+
+
+def find_videos(root):
+    if os.path.isfile(root):
+        return [root]
+    found = []
+    for dirpath, _, filenames in os.walk(root):
+        for name in filenames:
+            if name.lower().endswith(VIDEO_EXTENSIONS):
+                found.append(os.path.join(dirpath, name))
+    return sorted(found)
+
+
+def output_name(rel_path):
+    """ชื่อไฟล์ผลต่อวิดีโอ (ไม่ชนกันแม้ชื่อไฟล์ซ้ำในคนละโฟลเดอร์)"""
+    stem = os.path.splitext(os.path.basename(rel_path))[0]
+    digest = hashlib.sha1(rel_path.encode("utf-8")).hexdigest()[:8]
+    return f"{stem}_{digest}"
+
+
+def load_manifest(path):
+    done = {}
+    if not os.path.exists(path):
+        return done
+    with open(path, encoding="utf-8") as f:
+        for line in f:
+            try:
+                entry = json.loads(line)
+            except ValueError:
+                continue  # บรรทัดสุดท้ายเขียนไม่จบตอน crash
+            if entry.get("status") == "done":
+                done[entry["file"]] = entry
+    return done
+
+
+def write_frames(out_dir, rel_path, result, fmt):
+    rows = result["timeline"]["confidence"]
+    name = os.path.join(out_dir, "frames", output_name(rel_path))
+    if fmt == "parquet":
+        import pandas as pd
+        pd.DataFrame(rows, columns=["t", "confidence", "ready"]).to_parquet(name + ".parquet", index=False)
+        return name + ".parquet"
+    with open(name + ".csv", "w", newline="", encoding="utf-8") as f:
+        writer = csv.writer(f)
+        writer.writerow(["t", "confidence", "ready"])
+        writer.writerows(rows)
+    return name + ".csv"
+
+
+def write_summary(out_dir, entries, fmt):
+    rows = [{k: e["summary"].get(k) for k in SUMMARY_FIELDS} for e in entries.values()]
+    if fmt == "parquet":
+        import pandas as pd
+        pd.DataFrame(rows, columns=SUMMARY_FIELDS).to_parquet(os.path.join(out_dir, "summary.parquet"), index=False)
+        return
+    with open(os.path.join(out_dir, "summary.csv"), "w", newline="", encoding="utf-8") as f:
+        writer = csv.DictWriter(f, fieldnames=SUMMARY_FIELDS)
+        writer.writeheader()
+        writer.writerows(rows)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Batch pose analysis for recorded workout videos")
+    parser.add_argument("input", help="video file or directory (searched recursively)")
+    parser.add_argument("--pose", required=True, help="exercise name, e.g. \"Bodyweight Squat\"")
+    parser.add_argument("--out", default="batch_results", help="output directory")
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1)
+    parser.add_argument("--stride", type=int, default=1, help="process every N-th frame")
+    parser.add_argument("--max-width", type=int, default=None, help="downscale frames wider than this")
+    parser.add_argument("--model-complexity", type=int, default=1, choices=(0, 1, 2))
+    parser.add_argument("--format", choices=("csv", "parquet"), default="csv")
+    parser.add_argument("--pin", action="store_true", help="pin each worker process to its own cores")
+    parser.add_argument("--cpus", default="", help="cores for --pin, e.g. \"0-7\" (default: all)")
+    args = parser.parse_args(argv)
+
+    if args.pose not in DETECTORS:
+        parser.error(f"unknown pose {args.pose!r} (choose from: {', '.join(DETECTORS)})")
+    if args.format == "parquet":
+        try:
+            import pandas  # noqa: F401
+            import pyarrow  # noqa: F401
+        except ImportError:
+            parser.error("--format parquet requires pandas and pyarrow")
+
+    os.makedirs(os.path.join(args.out, "frames"), exist_ok=True)
+    manifest_path = os.path.join(args.out, "manifest.jsonl")
+    done = load_manifest(manifest_path)
+
+    base = args.input if os.path.isdir(args.input) else os.path.dirname(args.input)
+    videos = find_videos(args.input)
+    pending = [p for p in videos if os.path.relpath(p, base) not in done]
+    print(f"{len(videos)} videos, {len(videos) - len(pending)} already done, {len(pending)} to process "
+          f"({args.workers} workers)")
+    if not pending:
+        write_summary(args.out, done, args.format)
+        return 0
+
+    cpu_slots = None
+    if args.pin:
+        from modules.affinity import worker_cpu_sets
+        cpu_slots = multiprocessing.Queue()
+        for cpus in worker_cpu_sets(args.cpus or None, args.workers, 0 if args.cpus else 1):
+            cpu_slots.put(cpus)
+
+    started = time.perf_counter()
+    frames = 0
+    failed = 0
+    with open(manifest_path, "a", encoding="utf-8") as manifest, \
+            ProcessPoolExecutor(max_workers=args.workers, initializer=_init_worker,
+                                initargs=(args.model_complexity, cpu_slots)) as pool:
+        futures = [pool.submit(_process, p, args.pose, args.stride, args.max_width) for p in pending]
+        for n, future in enumerate(as_completed(futures), 1):
+            path, result, error = future.result()
+            rel_path = os.path.relpath(path, base)
+            if error:
+                failed += 1
+                entry = {"file": rel_path, "status": "failed", "error": error}
+                print(f"[{n}/{len(pending)}] FAILED {rel_path}: {error}")
+            else:
+                frames_file = write_frames(args.out, rel_path, result, args.format)
+                summary = {k: v for k, v in result.items() if k != "timeline"}
+                summary["file"] = rel_path
+                entry = {"file": rel_path, "status": "done", "frames_file": frames_file, "summary": summary}
+                done[rel_path] = entry
+                frames += result["frames_processed"]
+                elapsed = time.perf_counter() - started
+                print(f"[{n}/{len(pending)}] {rel_path}: reps={result['reps']} "
+                      f"best_hold={result['best_hold']}s ({frames / elapsed:.1f} fps total)")
+            # บันทึกทันทีหลังเขียนผล -> crash กลางทางแล้วรันใหม่ได้
+            manifest.write(json.dumps(entry, ensure_ascii=False) + "\n")
+            manifest.flush()
+
+    write_summary(args.out, done, args.format)
+    elapsed = time.perf_counter() - started
+    fps = frames / elapsed if elapsed > 0 else 0.0
+    print(f"Done: {len(pending) - failed} ok, {failed} failed, {frames} frames in {elapsed:.1f}s "
+          f"= {fps:.1f} fps ({fps / args.workers:.1f} fps per core)")
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,141 @@
+# benchmark_backends.py - เทียบ backend ของ pose inference บนวิดีโอเดียวกัน
+#
+#   python benchmark_backends.py clip.mp4 --frames 300 --max-width 640 --model-complexity 1 --models models/
+#
+# - solutions: mp.solutions.pose.Pose.process() ทีละเฟรม (sync, ถือ thread ตลอด graph)
+# - tasks-sync: PoseLandmarker LIVE_STREAM แต่รอ callback ก่อนส่งเฟรมถัดไป (แบบที่ scheduler ใช้)
+# - tasks-live: ส่งเฟรมด้วย detect_async ตามจังหวะ --fps โดยไม่รอผล (pipeline เต็มที่, graph ทิ้งเฟรมเองได้)
+# รายงาน throughput (เฟรมที่ได้ผล / วินาที), latency p50/p95 (ส่ง -> ได้ผล) และเฟรมที่ถูกทิ้ง
+import argparse
+import json
+import sys
+import time
+
+import cv2
+import numpy as np
+
+
+def load_frames(path, limit, max_width):
+    cap = cv2.VideoCapture(path)
+    if not cap.isOpened():
+        raise SystemExit(f"Cannot open video: {path}")
+    frames = []
+    while len(frames) < limit:
+        ok, frame = cap.read()
+        if not ok:
+            break
+        if max_width and frame.shape[1] > max_width:
+            height = max(1, int(round(frame.shape[0] * max_width / frame.shape[1])))
+            frame = cv2.resize(frame, (max_width, height), interpolation=cv2.INTER_AREA)
+        frames.append(frame)
+    cap.release()
+    return frames
+
+
+def summarize(name, latencies, elapsed, sent, detected):
+    done = len(latencies)
+    lat = np.array(latencies) * 1000 if latencies else np.zeros(1)
+    return {
+        "backend": name,
+        "frames": sent,
+        "results": done,
+        "dropped": sent - done,
+        "with_person": detected,
+        "throughput_fps": round(done / elapsed, 1) if elapsed else 0.0,
+        "latency_p50_ms": round(float(np.percentile(lat, 50)), 2),
+        "latency_p95_ms": round(float(np.percentile(lat, 95)), 2),
+    }
+
+
+def run_sync(name, analyzer, frames, warmup):
+    for frame in frames[:warmup]:
+        analyzer.process_frame(frame)
+    latencies, detected = [], 0
+    started = time.perf_counter()
+    for frame in frames:
+        t0 = time.perf_counter()
+        results = analyzer.process_frame(frame)
+        if results is None:
+            continue
+        latencies.append(time.perf_counter() - t0)
+        detected += bool(results.pose_landmarks)
+    return summarize(name, latencies, time.perf_counter() - started, len(frames), detected)
+
+
+def run_live(analyzer, frames, warmup, fps):
+    for frame in frames[:warmup]:
+        analyzer.process_frame(frame)
+    latencies, detected = [], [0]
+    interval = 1.0 / fps if fps else 0.0
+
+    def on_done(t0, future):
+        if future.cancelled() or future.result() is None:
+            return
+        latencies.append(time.perf_counter() - t0)
+        detected[0] += bool(future.result().pose_landmarks)
+
+    futures = []
+    started = time.perf_counter()
+    for i, frame in enumerate(frames):
+        if interval:
+            delay = started + i * interval - time.perf_counter()
+            if delay > 0:
+                time.sleep(delay)
+        t0 = time.perf_counter()
+        future = analyzer.submit(frame)
+        future.add_done_callback(lambda f, t0=t0: on_done(t0, f))
+        futures.append(future)
+    for future in futures:
+        try:
+            future.result(timeout=analyzer.timeout)
+        except Exception:
+            pass
+    return summarize("tasks-live", latencies, time.perf_counter() - started, len(frames), detected[0])
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Compare mp.solutions.pose with the Tasks PoseLandmarker (LIVE_STREAM)")
+    parser.add_argument("video", help="video file with one person in view")
+    parser.add_argument("--frames", type=int, default=300)
+    parser.add_argument("--warmup", type=int, default=10)
+    parser.add_argument("--max-width", type=int, default=640)
+    parser.add_argument("--model-complexity", type=int, default=1, choices=(0, 1, 2))
+    parser.add_argument("--models", default="models", help="directory with pose_landmarker_*.task")
+    parser.add_argument("--fps", type=float, default=30.0, help="tasks-live send rate (0 = as fast as possible)")
+    parser.add_argument("--backends", default="solutions,tasks-sync,tasks-live")
+    parser.add_argument("--json", action="store_true", help="print results as JSON")
+    args = parser.parse_args(argv)
+
+    frames = load_frames(args.video, args.frames, args.max_width)
+    if not frames:
+        raise SystemExit("No frames decoded")
+    backends = [b.strip() for b in args.backends.split(",") if b.strip()]
+    rows = []
+
+    if "solutions" in backends:
+        import mediapipe as mp
+        from modules.pose_analyzer import PoseAnalyzer
+        rows.append(run_sync("solutions", PoseAnalyzer(mp.solutions.pose, model_complexity=args.model_complexity),
+                             frames, args.warmup))
+    if "tasks-sync" in backends or "tasks-live" in backends:
+        from modules.landmarker import TasksPoseAnalyzer
+        if "tasks-sync" in backends:
+            analyzer = TasksPoseAnalyzer(args.models, model_complexity=args.model_complexity)
+            rows.append(run_sync("tasks-sync", analyzer, frames, args.warmup))
+        if "tasks-live" in backends:
+            analyzer = TasksPoseAnalyzer(args.models, model_complexity=args.model_complexity)
+            rows.append(run_live(analyzer, frames, args.warmup, args.fps))
+
+    if args.json:
+        print(json.dumps(rows, indent=2))
+        return 0
+    print(f"{len(frames)} frames {frames[0].shape[1]}x{frames[0].shape[0]}, model_complexity={args.model_complexity}")
+    header = ["backend", "results", "dropped", "with_person", "throughput_fps", "latency_p50_ms", "latency_p95_ms"]
+    print("  ".join(f"{h:>14}" for h in header))
+    for row in rows:
+        print("  ".join(f"{row[h]:>14}" for h in header))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
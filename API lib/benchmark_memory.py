@@ -0,0 +1,134 @@
+# benchmark_memory.py - วัด memory ที่ allocate ต่อเฟรมของเส้นทาง decode -> resize -> RGB (ไม่รวม inference)
+#
+#   python benchmark_memory.py --width 1280 --height 720 --max-width 640 --frames 300
+#   python benchmark_memory.py --video clip.mp4 --max-width 480
+#
+# - jpeg: base64 -> imdecode -> prepare_rgb เหมือน /ws/pose แบบเฟรม JPEG
+# - stream: chunk H.264 -> StreamDecoder -> to_bgr -> prepare_rgb (ต้องมี PyAV + encoder h264)
+# แต่ละแบบรันทั้งไม่มี pool (ndarray ใหม่ทุกขั้น) และมี FramePool แล้วรายงาน
+# bytes ที่ allocate ต่อเฟรมในช่วง steady state (tracemalloc peak ต่อเฟรม หลัง warmup)
+import argparse
+import base64
+import sys
+import tracemalloc
+
+import cv2
+import numpy as np
+
+from modules.buffers import FramePool, prepare_rgb
+from modules.stream_decoder import StreamDecoder, av
+
+
+def source_frames(args):
+    if args.video:
+        from benchmark_backends import load_frames
+        return load_frames(args.video, args.frames, None)
+    rng = np.random.default_rng(0)
+    base = rng.integers(0, 255, (args.height, args.width, 3), dtype=np.uint8)
+    return [np.roll(base, 4 * i, axis=1) for i in range(args.frames)]
+
+
+def encode_jpeg(frames, quality):
+    return [base64.b64encode(cv2.imencode(".jpg", f, [cv2.IMWRITE_JPEG_QUALITY, quality])[1]).decode("ascii")
+            for f in frames]
+
+
+def encode_h264(frames):
+    from fractions import Fraction
+    h, w = frames[0].shape[:2]
+    for name in ("libx264", "h264"):
+        try:
+            encoder = av.CodecContext.create(name, "w")
+            break
+        except Exception:
+            encoder = None
+    if encoder is None:
+        return None
+    encoder.width, encoder.height, encoder.pix_fmt = w - w % 2, h - h % 2, "yuv420p"
+    encoder.time_base = Fraction(1, 30)
+    chunks = []
+    for f in frames:
+        frame = av.VideoFrame.from_ndarray(np.ascontiguousarray(f[:encoder.height, :encoder.width]), format="bgr24")
+        chunks.extend(bytes(p) for p in encoder.encode(frame))
+    chunks.extend(bytes(p) for p in encoder.encode(None))
+    return chunks
+
+
+def measure(step, inputs, warmup):
+    """เรียก step ต่อ input ทีละรายการ คืนค่า bytes เฉลี่ยที่ allocate ต่อเฟรม (หลัง warmup)"""
+    peaks = []
+    tracemalloc.start()
+    for i, item in enumerate(inputs):
+        before = tracemalloc.get_traced_memory()[0]
+        tracemalloc.reset_peak()
+        out = step(item)
+        peak = tracemalloc.get_traced_memory()[1] - before
+        del out
+        if i >= warmup:
+            peaks.append(peak)
+    tracemalloc.stop()
+    return float(np.mean(peaks)) if peaks else 0.0
+
+
+def run_jpeg(messages, max_width, pooled, warmup):
+    pool = FramePool(depth=1) if pooled else None
+
+    def step(message):
+        frame = cv2.imdecode(np.frombuffer(base64.b64decode(message), np.uint8), cv2.IMREAD_COLOR)
+        return prepare_rgb(frame, max_width, pool)
+
+    return measure(step, messages, warmup)
+
+
+def run_stream(chunks, max_width, pooled, warmup):
+    decoder = StreamDecoder("h264")
+    stream_pool = FramePool(depth=1) if pooled else None
+    pool = FramePool(depth=1) if pooled else None
+
+    def step(chunk):
+        frames, _ = decoder.decode(chunk)
+        out = []
+        for f in frames:
+            bgr = StreamDecoder.to_bgr(f, stream_pool)
+            out.append(prepare_rgb(bgr, max_width, pool))
+            if stream_pool:
+                stream_pool.release(bgr)  # เหมือน analyzer_stage: คืนหลังวิเคราะห์เสร็จ
+        return out
+
+    return measure(step, chunks, warmup)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Per-frame allocation of the decode/convert path, with and without buffer pools")
+    parser.add_argument("--video", default=None, help="video file (default: synthetic frames)")
+    parser.add_argument("--width", type=int, default=1280)
+    parser.add_argument("--height", type=int, default=720)
+    parser.add_argument("--frames", type=int, default=200)
+    parser.add_argument("--warmup", type=int, default=20)
+    parser.add_argument("--max-width", type=int, default=640, help="inference width (0 = no resize)")
+    parser.add_argument("--quality", type=int, default=80, help="JPEG quality")
+    args = parser.parse_args(argv)
+
+    frames = source_frames(args)
+    if not frames:
+        raise SystemExit("No frames")
+    h, w = frames[0].shape[:2]
+    print(f"{len(frames)} frames {w}x{h}, max_width={args.max_width or 'full'}")
+    print(f"{'path':>8}  {'no pool (KB/frame)':>20}  {'pool (KB/frame)':>16}")
+
+    messages = encode_jpeg(frames, args.quality)
+    rows = [("jpeg", run_jpeg(messages, args.max_width, False, args.warmup),
+             run_jpeg(messages, args.max_width, True, args.warmup))]
+    chunks = encode_h264(frames) if av is not None else None
+    if chunks:
+        rows.append(("stream", run_stream(chunks, args.max_width, False, args.warmup),
+                     run_stream(chunks, args.max_width, True, args.warmup)))
+    else:
+        print("(stream skipped: PyAV with an h264 encoder is not available)")
+    for name, baseline, pooled in rows:
+        print(f"{name:>8}  {baseline / 1024:>20.1f}  {pooled / 1024:>16.1f}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,132 @@
+# benchmark_threads.py - หาจำนวน worker / core ต่อ worker / thread ของ OpenCV ที่เร็วที่สุดบนเครื่องนี้
+#
+#   python benchmark_threads.py clip.mp4 --workers 1,2,4 --cpus-per-worker 0,1,2 --cv2-threads 1,-1 --seconds 5
+#
+# - แต่ละ worker เป็น thread ที่ pin ตัวเอง (cpus-per-worker > 0) แล้วสร้าง PoseAnalyzer ของตัวเอง
+#   เหมือน InferenceScheduler -> thread ภายใน graph อยู่บน core ชุดเดียวกับ worker
+# - cpus-per-worker 0 = ไม่ pin (ทุก thread แย่งกันทุก core)
+# - รายงาน throughput รวม (fps) และ latency p50/p95 ต่อเฟรม แล้วแนะนำชุดที่ throughput สูงสุด
+#   (ภายใต้ --max-p95-ms ถ้าระบุ) เป็นค่า environment ของ server
+import argparse
+import itertools
+import json
+import sys
+import threading
+import time
+
+import numpy as np
+
+from benchmark_backends import load_frames
+from modules.affinity import available_cpus, pin_current_thread, set_cv2_threads, worker_cpu_sets
+
+
+def make_analyzer(backend, model_complexity, models):
+    if backend == "tasks":
+        from modules.landmarker import TasksPoseAnalyzer
+        return TasksPoseAnalyzer(models, model_complexity=model_complexity)
+    import mediapipe as mp
+    from modules.pose_analyzer import PoseAnalyzer
+    return PoseAnalyzer(mp.solutions.pose, model_complexity=model_complexity)
+
+
+def run_config(frames, workers, cpus_per_worker, cv2_threads, args):
+    set_cv2_threads(cv2_threads)
+    cpu_sets = worker_cpu_sets(args.cpus, workers, cpus_per_worker) if cpus_per_worker else None
+    ready = threading.Barrier(workers + 1)
+    latencies = [[] for _ in range(workers)]
+    deadline = [None]
+
+    def worker(idx):
+        pin_current_thread(cpu_sets[idx] if cpu_sets else None)
+        analyzer = make_analyzer(args.backend, args.model_complexity, args.models)
+        for frame in frames[:args.warmup]:
+            analyzer.process_frame(frame)
+        ready.wait()
+        i = idx  # worker แต่ละตัวเริ่มคนละเฟรม
+        while time.perf_counter() < deadline[0]:
+            t0 = time.perf_counter()
+            if analyzer.process_frame(frames[i % len(frames)]) is not None:
+                latencies[idx].append(time.perf_counter() - t0)
+            i += 1
+
+    threads = [threading.Thread(target=worker, args=(idx,), daemon=True) for idx in range(workers)]
+    for thread in threads:
+        thread.start()
+    deadline[0] = time.perf_counter() + 3600  # ยังไม่เริ่มจับเวลาจนกว่าทุก worker พร้อม
+    ready.wait()
+    started = time.perf_counter()
+    deadline[0] = started + args.seconds
+    for thread in threads:
+        thread.join()
+    elapsed = time.perf_counter() - started
+
+    lat = np.array([x for per in latencies for x in per]) * 1000
+    return {
+        "workers": workers,
+        "cpus_per_worker": cpus_per_worker,
+        "cv2_threads": cv2_threads,
+        "frames": int(lat.size),
+        "throughput_fps": round(lat.size / elapsed, 1),
+        "latency_p50_ms": round(float(np.percentile(lat, 50)), 2) if lat.size else None,
+        "latency_p95_ms": round(float(np.percentile(lat, 95)), 2) if lat.size else None,
+    }
+
+
+def _ints(text):
+    return [int(x) for x in text.split(",") if x.strip()]
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Sweep inference workers, CPU pinning and OpenCV threads")
+    parser.add_argument("video", help="video file with one person in view")
+    parser.add_argument("--workers", default="1,2,4", help="inference workers to try")
+    parser.add_argument("--cpus-per-worker", default="0,1,2", help="cores per worker (0 = not pinned)")
+    parser.add_argument("--cv2-threads", default="1,-1", help="cv2.setNumThreads values (-1 = OpenCV default)")
+    parser.add_argument("--cpus", default="", help="cores available to inference, e.g. \"0-5\" (default: all)")
+    parser.add_argument("--seconds", type=float, default=5.0, help="measurement time per combination")
+    parser.add_argument("--warmup", type=int, default=10)
+    parser.add_argument("--frames", type=int, default=200)
+    parser.add_argument("--max-width", type=int, default=640)
+    parser.add_argument("--model-complexity", type=int, default=1, choices=(0, 1, 2))
+    parser.add_argument("--backend", choices=("solutions", "tasks"), default="solutions")
+    parser.add_argument("--models", default="models", help="directory with pose_landmarker_*.task (tasks)")
+    parser.add_argument("--max-p95-ms", type=float, default=None, help="ignore combinations slower than this")
+    parser.add_argument("--json", action="store_true", help="print results as JSON")
+    args = parser.parse_args(argv)
+
+    frames = load_frames(args.video, args.frames, args.max_width)
+    if not frames:
+        raise SystemExit("No frames decoded")
+    cpus = available_cpus()
+    print(f"{len(cpus)} cores available, {len(frames)} frames {frames[0].shape[1]}x{frames[0].shape[0]}, "
+          f"backend={args.backend}", file=sys.stderr)
+
+    rows = []
+    for workers, per, cv2_threads in itertools.product(
+            _ints(args.workers), _ints(args.cpus_per_worker), _ints(args.cv2_threads)):
+        row = run_config(frames, workers, per, cv2_threads, args)
+        rows.append(row)
+        print(f"workers={workers} cpus_per_worker={per} cv2_threads={cv2_threads}: "
+              f"{row['throughput_fps']} fps, p50 {row['latency_p50_ms']} ms, p95 {row['latency_p95_ms']} ms",
+              file=sys.stderr)
+
+    eligible = [r for r in rows if r["frames"] and (args.max_p95_ms is None or r["latency_p95_ms"] <= args.max_p95_ms)]
+    best = max(eligible, key=lambda r: r["throughput_fps"]) if eligible else None
+    if args.json:
+        print(json.dumps({"results": rows, "best": best}, indent=2))
+        return 0 if best else 1
+    if not best:
+        print("No combination met the latency limit")
+        return 1
+    print("\nRecommended settings:")
+    print(f"  POSE_INFERENCE_WORKERS={best['workers']}")
+    print(f"  POSE_CPUS_PER_WORKER={best['cpus_per_worker']}")
+    print(f"  POSE_CV2_THREADS={best['cv2_threads']}")
+    if args.cpus and best["cpus_per_worker"]:
+        print(f"  POSE_INFERENCE_CPUS={args.cpus}")
+    print(f"  -> {best['throughput_fps']} fps, p95 {best['latency_p95_ms']} ms")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
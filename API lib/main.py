@@ -1,17 +1,37 @@
 # main.py - DEBUG VERSION
 import time
 import json
+import asyncio
 import base64
 import cv2
 import numpy as np
 import logging
-from fastapi import FastAPI, WebSocket, WebSocketDisconnect
+from concurrent.futures import ThreadPoolExecutor
+from fastapi import FastAPI, Request, WebSocket, WebSocketDisconnect
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import JSONResponse
 import mediapipe as mp
 
 from modules.pose_analyzer import PoseAnalyzer
+from modules.landmarker import TasksPoseAnalyzer
 from modules.client_manager import ClientManager
-from modules.utils import check_full_body_visible, check_pose_specific_visibility
+from modules.utils import results_from_landmarks, landmarks_to_array, array_to_landmarks
+from modules.visibility import visibility_gate
+from modules.filters import LandmarkFilter
+from modules.load_controller import LoadController
+from modules.admission import AdmissionController
+from modules.scheduler import InferenceScheduler
+from modules.encoding import ResponseEncoder
+from modules.channels import LatestQueue, OutboundChannel, SlowConsumer
+from modules.video_jobs import VideoJobManager, UploadTooLarge, JobQueueFull
+from modules.recorder import Recorder, FLAG_PERSON, FLAG_FULL_BODY, FLAG_READY
+from modules.multiperson import PersonDetector, TrackerPool, GroupSession
+from modules.affinity import available_cpus, parse_cpus, worker_cpu_sets, pin_current_thread, set_cv2_threads
+from modules.stream_decoder import StreamDecoder, available_codecs
+from modules.buffers import FramePool
+from modules.dedup import REUSE_LAST, frame_fingerprint, dhash, hamming
+from modules.feedbacks import MESSAGES, MESSAGES_VERSION, render_message
+from modules.config import config
 
 logging.basicConfig(level=logging.INFO,
                     format="%(asctime)s - %(levelname)s - %(message)s")
@@ -30,184 +50,912 @@ app.add_middleware(
     allow_headers=["*"]
 )
 
+# Threads: ตั้งก่อนสร้าง pool / tracker ใดๆ (thread ที่สร้างต่อจากนี้สืบ affinity ของ main thread)
+# แบ่ง core ของ inference ก่อน pin main thread: หลัง pin แล้ว sched_getaffinity เหลือแค่ core ของ server
+# pin server แล้ว executor / process pool ที่ไม่ได้ระบุ core จะสืบ mask ของ server -> pin ไปที่ core ที่เหลือแทน
+set_cv2_threads(config.CV2_THREADS)
+process_cpus = available_cpus()
+server_cpus = parse_cpus(config.SERVER_CPUS)
+other_cpus = ([c for c in process_cpus if c not in server_cpus] or process_cpus) if server_cpus else None
+inference_cpu_sets = worker_cpu_sets(
+    config.INFERENCE_CPUS, config.INFERENCE_WORKERS, config.CPUS_PER_WORKER, exclude=server_cpus
+) or (other_cpus and [other_cpus])
+pin_current_thread(server_cpus)
+
 # Managers
 clients = ClientManager()
 mp_pose = mp.solutions.pose
-analyzer = PoseAnalyzer(mp_pose)
+
+if config.POSE_BACKEND not in ("solutions", "tasks"):
+    raise ValueError(f"Unknown POSE_BACKEND: {config.POSE_BACKEND} (use solutions or tasks)")
+
+def make_analyzer():
+    """
+    PoseAnalyzer ตาม POSE_BACKEND (tracker ทุกตัวของ server สร้างผ่านที่นี่)
+    detect/feedback ไม่ใช้ tracker -> เรียกผ่าน PoseAnalyzer.detect/feedback ไม่ต้องสร้าง graph เพิ่ม
+    """
+    if config.POSE_BACKEND == "tasks":
+        return TasksPoseAnalyzer(config.TASKS_MODEL_DIR, model_complexity=config.MODEL_COMPLEXITY,
+                                 timeout=config.TASKS_TIMEOUT)
+    return PoseAnalyzer(mp_pose, model_complexity=config.MODEL_COMPLEXITY)
+
+load = LoadController(
+    workers=config.INFERENCE_WORKERS,
+    window=config.LOAD_WINDOW,
+    high_watermark=config.LOAD_HIGH_WATERMARK,
+    low_watermark=config.LOAD_LOW_WATERMARK,
+    step_down_after=config.LOAD_STEP_DOWN_AFTER,
+    step_up_after=config.LOAD_STEP_UP_AFTER
+)
+scheduler = InferenceScheduler(
+    make_analyzer,
+    workers=config.INFERENCE_WORKERS,
+    max_rate=config.SESSION_MAX_INFERENCE_FPS,
+    priority_tiers=config.PRIORITY_TIERS,
+    load=load,
+    cpu_sets=inference_cpu_sets
+)
+admission = AdmissionController(
+    load,
+    max_sessions=config.MAX_SESSIONS,
+    max_per_ip=config.MAX_SESSIONS_PER_IP,
+    session_fps=config.SESSION_FPS,
+    headroom=config.CAPACITY_HEADROOM,
+    queue_timeout=config.ADMISSION_QUEUE_TIMEOUT,
+    retry_after=config.RETRY_AFTER,
+    cold_capacity=config.COLD_START_SESSIONS
+)
+video_jobs = VideoJobManager(
+    config.VIDEO_UPLOAD_DIR,
+    workers=config.VIDEO_JOB_WORKERS,
+    model_complexity=config.MODEL_COMPLEXITY,
+    max_jobs=config.VIDEO_MAX_JOBS,
+    cv2_threads=config.CV2_THREADS,
+    cpus=parse_cpus(config.VIDEO_JOB_CPUS) or other_cpus,
+    max_pending=config.VIDEO_MAX_PENDING,
+    max_disk_bytes=config.VIDEO_MAX_DISK_MB * 1024 * 1024
+)
+recorder = Recorder(config.RECORD_DIR, queue_size=config.RECORD_QUEUE_SIZE) if config.RECORD_DIR else None
+# decode pool: base64 + JPEG decode ของเฟรม N+1 ทำระหว่างที่เฟรม N อยู่ใน inference
+decode_pool = (
+    ThreadPoolExecutor(max_workers=config.DECODE_WORKERS, thread_name_prefix="pose-decode")
+    if config.DECODE_WORKERS > 0 else None
+)
+# group mode: tracker ต่อคน ยืมจาก pool ที่ใช้ร่วมกันทุก stream
+person_trackers = TrackerPool(
+    make_analyzer,
+    max_size=config.GROUP_TRACKER_POOL
+)
+
+@app.on_event("startup")
+async def start_scheduler():
+    await scheduler.start()
+
+@app.on_event("shutdown")
+async def stop_scheduler():
+    await scheduler.stop()
+    if decode_pool:
+        decode_pool.shutdown(wait=False)
+    video_jobs.shutdown()
+    if recorder:
+        recorder.stop()
 
 # ---------------- WebSocket ----------------
-@app.websocket("/ws/pose")
-async def ws_pose(websocket: WebSocket):
-    await websocket.accept()
-    client_id = clients.register(websocket.client.host)
-    logger.info(f"[CONNECTED] {client_id}")
+def attach_advice_text(response, client):
+    """แนบข้อความเต็มเฉพาะเมื่อ advice_code เปลี่ยน (client ใช้ catalogue จาก /messages)"""
+    code = response.get("advice_code")
+    params = response.get("advice_params") or {}
+    if not params:
+        response.pop("advice_params", None)
+    if client is None or client.advice_text_always or code != client.last_advice_code:
+        response["advice"] = render_message(code, params)
+    if client is not None:
+        client.last_advice_code = code
+
+async def send_encoded(websocket, encoder, message, state=False):
+    """ส่งข้อความตาม output mode ที่ negotiate ไว้ (state=True -> delta)"""
+    payload, binary = encoder.encode_state(message) if state else encoder.encode_message(message)
+    if binary:
+        await websocket.send_bytes(payload)
+    else:
+        await websocket.send_text(payload)
+
+def counter_events(client_id, pose, reps_before, hold_before, ts):
+    """สร้าง event เมื่อนับ rep ได้ หรือเมื่อจบการค้างท่า (event ห้ามทิ้ง)"""
+    events = []
+    client = clients.clients.get(client_id)
+    if not client:
+        return events
+    reps_after = client.reps_counts.get(pose, 0)
+    if reps_after > reps_before:
+        events.append({"event": "rep", "pose": pose, "count": reps_after, "ts": ts})
+    hold_after = clients.get_hold_time(client_id, pose)
+    if hold_before["current"] > 0 and hold_after["current"] == 0.0:
+        events.append({
+            "event": "hold_end",
+            "pose": pose,
+            "duration": round(hold_before["current"], 2),
+            "best": round(hold_after["best"], 2),
+            "ts": ts
+        })
+    return events
+
+def set_recording(client_id, enabled):
+    """เปิด/ปิดการบันทึก session ลงไฟล์ (ต้องตั้ง POSE_RECORD_DIR) คืนค่าสถานะปัจจุบัน"""
+    client = clients.clients.get(client_id)
+    if not client or recorder is None:
+        return False
+    if enabled and client.recorder is None:
+        client.recorder = recorder.open_session(client_id, {"pose": client.selected_pose})
+    elif not enabled and client.recorder is not None:
+        client.recorder.close()
+        client.recorder = None
+    return client.recorder is not None
+
+def set_auto_detect(client_id, enabled):
+    """เปิด/ปิดการเลือกท่าอัตโนมัติของ session (เปิด = ล้างท่าที่เลือกไว้แล้วโหวตใหม่)"""
+    clients.set_auto_detect(
+        client_id,
+        enabled,
+        window=config.AUTO_DETECT_WINDOW,
+        min_score=config.AUTO_DETECT_MIN_SCORE
+    )
+
+def filter_landmarks(client, pose, landmarks, ts):
+    """กรอง landmark ของ session ตามเวลาเฟรม (profile ตามท่า) ก่อนเข้า detector"""
+    if not config.LANDMARK_FILTER or client is None:
+        return landmarks
+    if client.landmark_filter is None or client.landmark_filter.pose != pose:
+        client.landmark_filter = LandmarkFilter(pose, max_gap=ClientManager.HOLD_MAX_GAP)
+    return array_to_landmarks(client.landmark_filter(ts, landmarks_to_array(landmarks)))
+
+def record_frame(client, client_id, pose, ts, results, response):
+    """ส่งสิ่งที่ server เห็นในเฟรมนี้เข้าคิวของ recorder (เขียนไฟล์ใน background thread)"""
+    person = bool(results.pose_landmarks)
+    client.recorder.record(
+        ts,
+        results.pose_landmarks.landmark if person else None,
+        confidence=response["confidence"],
+        reps=response["reps"].get(pose, 0) if pose else 0,
+        hold=clients.get_hold_time(client_id, pose)["current"] if pose else 0.0,
+        state=1 if client.pose_states.get(pose) == "high" else 0,
+        flags=(FLAG_PERSON if person else 0)
+        | (FLAG_FULL_BODY if response["full_body_visible"] else 0)
+        | (FLAG_READY if response["ready_to_start"] else 0)
+    )
+
+def handle_command(client_id, cmd, encoder, outbound, group=None):
+    """คำสั่ง JSON จาก client (ตอบกลับผ่าน event queue) - group mode: มีผลกับทุกคนใน stream"""
+    targets = [client_id] + (group.session_ids() if group else [])
+    if "output" in cmd:
+        try:
+            encoder.set_mode(cmd["output"])
+            outbound.put_event(encoder.describe())
+        except ValueError as e:
+            outbound.put_event({"status": "error", "detail": str(e)})
+    if cmd.get("snapshot"):
+        encoder.request_snapshot()
+    if "counting" in cmd:
+        try:
+            for sid in targets:
+                clients.set_counting_engine(sid, cmd["counting"])
+            outbound.put_event({"status": "counting", "engine": cmd["counting"]})
+        except ValueError as e:
+            outbound.put_event({"status": "error", "detail": str(e)})
+    if "record" in cmd:
+        if group:
+            group.record = bool(cmd["record"]) and recorder is not None
+            for sid in group.session_ids():
+                set_recording(sid, group.record)
+            outbound.put_event({"status": "recording", "enabled": group.record})
+        else:
+            outbound.put_event({"status": "recording", "enabled": set_recording(client_id, bool(cmd["record"]))})
+    if "advice_text" in cmd:
+        # "always" = ส่งข้อความเต็มทุกเฟรม (client รุ่นเก่า), "changes" = เฉพาะเมื่อ code เปลี่ยน
+        for sid in targets:
+            client = clients.clients.get(sid)
+            if client:
+                client.advice_text_always = cmd["advice_text"] == "always"
+    if "auto_detect" in cmd:
+        for sid in targets:
+            set_auto_detect(sid, bool(cmd["auto_detect"]))
+        outbound.put_event({"status": "auto_detect", "enabled": bool(cmd["auto_detect"])})
+    pose = cmd.get("select_pose")
+    if pose == "auto":
+        for sid in targets:
+            set_auto_detect(sid, True)
+        outbound.put_event({"status": "auto_detect", "enabled": True})
+    elif pose:
+        for sid in targets:
+            clients.set_selected_pose(sid, pose)
+        logger.info(f"[{client_id}] Selected pose: {pose}")
+        outbound.put_event({
+            "status": "pose_selected",
+            "pose": pose,
+            "messages_version": MESSAGES_VERSION
+        })
+
+def open_person_session(group_id, group, track):
+    """session ของคนที่เพิ่งเข้ามาใน group mode: ตั้งค่าตาม session หลักของ stream"""
+    sid = track.session_id
+    clients.register(group_id, cid=sid)
+    owner = clients.clients.get(group_id)
+    if owner:
+        clients.set_counting_engine(sid, owner.counting_engine)
+        clients.clients[sid].advice_text_always = owner.advice_text_always
+        if owner.selected_pose:
+            clients.set_selected_pose(sid, owner.selected_pose)
+        elif owner.auto_detect:
+            set_auto_detect(sid, True)
+    if group.record:
+        set_recording(sid, True)
+
+async def close_person_session(group, track):
+    """ปิด session ของคนที่ออกจาก group: รองานที่ยังรันบน tracker ก่อนคืนเข้า pool (reset)"""
+    scheduler.remove_session(track.session_id)
+    await scheduler.wait_idle(track.analyzer)
+    group.release(track)
+    set_recording(track.session_id, False)
+    clients.remove(track.session_id)
+    if track.slot:
+        await admission.release_extra()
+
+def plan_frame(client_id, ts, group=None):
+    """
+    ตัดสินใจก่อน decode ว่าจะรับเฟรมนี้หรือไม่ คืนค่า (accepted, tier, probe)
+    - เครื่องอิ่มตัว -> ทิ้งเฟรมที่เกิน target fps ของ tier ปัจจุบัน
+    - ยังไม่เลือกท่าหรือยังไม่เจอคน -> probe ที่ fps ต่ำ, complexity 0, ภาพย่อ
+      (auto-detect และเจอคนแล้ว -> ใช้ AUTO_DETECT_FPS เพื่อให้โหวตเสร็จเร็ว)
+    - เลือกท่าแล้ว -> ใช้ fps ตาม sampling profile ของท่า (เช่น Plank 4 Hz)
+    - group mode: probe เมื่อยังไม่มีใครในภาพ, มีคนแล้วใช้ target fps ของ tier
+    """
+    selected_pose = clients.get_pose(client_id)
+    client = clients.clients.get(client_id)
+    tier = load.current_tier()
+    if group is not None:
+        probe = not group.tracks
+    else:
+        probe = not selected_pose or not (client and client.person_present)
+    if probe:
+        detecting = bool(client and client.auto_detect and client.person_present)
+        max_fps = min(tier["target_fps"], config.AUTO_DETECT_FPS if detecting else config.PROBE_FPS)
+    elif group is not None:
+        max_fps = tier["target_fps"]
+    else:
+        profile_fps = clients.get_sampling_profile(selected_pose, client.counting_engine)["fps"]
+        max_fps = min(tier["target_fps"], profile_fps) if profile_fps else tier["target_fps"]
+    return clients.accept_frame(client_id, ts, max_fps), tier, probe
 
+def decode_frame(message):
+    """base64 -> JPEG decode คืนค่า (frame, error) - thread-safe รันใน decode pool ได้"""
     try:
-        async for message in websocket.iter_text():
-            ts = time.time()
+        frame = cv2.imdecode(
+            np.frombuffer(base64.b64decode(message), np.uint8),
+            cv2.IMREAD_COLOR
+        )
+        if frame is None:
+            raise ValueError("Frame decode failed")
+        return frame, None
+    except Exception as e:
+        return None, {"error": "decode_failed", "detail": str(e)}
 
-            # ---------------- Command ----------------
-            if message.startswith("{"):
-                try:
-                    cmd = json.loads(message)
-                    pose = cmd.get("select_pose")
-                    if pose:
-                        clients.set_selected_pose(client_id, pose)
-                        logger.info(f"[{client_id}] Selected pose: {pose}")
-                        await websocket.send_json({"status": "pose_selected", "pose": pose})
-                except Exception as e:
-                    logger.error("cmd parse error: %s", e)
-                continue
-
-            # ---------------- Image ----------------
-            try:
-                frame = cv2.imdecode(
-                    np.frombuffer(base64.b64decode(message), np.uint8),
-                    cv2.IMREAD_COLOR
-                )
-                if frame is None:
-                    raise ValueError("Frame decode failed")
-            except Exception as e:
-                await websocket.send_json({"error": "decode_failed", "detail": str(e)})
-                continue
-
-            selected_pose = clients.get_pose(client_id)
-            
-            # ✅ สร้าง response พื้นฐานที่มี reps และ holds เสมอ
-            client = clients.clients.get(client_id)
-            response = {
-                "status": "ok",
-                "pose": selected_pose or "N/A",
+def decode_entry(kind, payload):
+    """คืนค่า (frame, results, error) - results มีค่าเมื่อ client ส่ง landmark มาเอง (ข้าม inference)"""
+    if kind == "image":
+        return payload, None, None  # decode จาก video stream แล้ว
+    if kind == "duplicate":
+        return None, REUSE_LAST, None  # bytes ซ้ำเฟรมก่อน: ไม่ต้อง decode
+    if kind == "landmarks":
+        try:
+            return None, results_from_landmarks(payload), None
+        except (TypeError, ValueError, IndexError) as e:
+            return None, None, {"error": "invalid_landmarks", "detail": str(e)}
+    frame, error = decode_frame(payload)
+    return frame, None, error
+
+def decode_entries(entries):
+    """decode ทุกรายการของงานตามลำดับ (รันใน decode pool ได้)"""
+    return [
+        decode_entry(kind, payload) + (ts, tier, probe, fingerprint)
+        for kind, payload, ts, tier, probe, fingerprint in entries
+    ]
+
+def resolve_duplicate(client_id, frame, results, fingerprint=None):
+    """
+    เฟรมซ้ำ -> ใช้ผล inference ล่าสุดของ session แทน (คืนค่า results ที่จะใช้)
+    - REUSE_LAST: bytes ซ้ำ (reader ข้าม decode มาแล้ว) ใช้ได้เฉพาะเมื่อ last_results มาจากเฟรมเดียวกันจริง
+      (ไม่อย่างนั้นคืน REUSE_LAST -> ข้ามเฟรม)
+    - dHash ต่างจากภาพก่อนไม่เกิน DEDUP_PHASH_DISTANCE bit (ถ้าเปิด): ภาพเดิมที่ถูก encode ใหม่
+    """
+    client = clients.clients.get(client_id)
+    if not client:
+        return results
+    if results is REUSE_LAST:
+        if client.last_results is None or client.last_fingerprint != fingerprint:
+            return REUSE_LAST
+        client.duplicates_skipped += 1
+        return client.last_results
+    if frame is not None and results is None and config.DEDUP_PHASH_DISTANCE >= 0:
+        phash = dhash(frame)
+        near = client.last_phash is not None and hamming(phash, client.last_phash) <= config.DEDUP_PHASH_DISTANCE
+        client.last_phash = phash
+        if near and client.last_results is not None:
+            client.duplicates_skipped += 1
+            return client.last_results
+    return results
+
+def open_stream(spec):
+    """
+    {"stream": "h264"} หรือ {"stream": {"codec": "vp8", "timestamps": true}} -> (StreamDecoder หรือ None, message)
+    {"stream": null} / "off" = ปิด stream (กลับไปรับ JPEG)
+    """
+    if not spec or spec == "off":
+        return None, {"status": "stream", "enabled": False}
+    options = spec if isinstance(spec, dict) else {"codec": spec}
+    try:
+        stream = StreamDecoder(
+            options.get("codec", "h264"),
+            threads=config.STREAM_DECODE_THREADS,
+            timestamps=bool(options.get("timestamps"))
+        )
+    except ValueError as e:
+        return None, {"status": "error", "detail": str(e)}
+    return stream, {"status": "stream", "enabled": True, "codec": stream.codec, "timestamps": stream.timestamps}
+
+def plan_batch(client_id, items, recv_ts):
+    """
+    เตรียม batch {"batch": [{"frame"|"landmarks": ..., "ts": ms}, ...]} ตามลำดับ
+    เฟรมภาพผ่าน sampling gate ตาม capture time, landmark ไม่ต้อง inference จึงรับทุกรายการ
+    คืนค่า (entries, skipped)
+    """
+    entries = []
+    skipped = 0
+    for item in items[:config.BATCH_MAX_ITEMS]:
+        ts = clients.frame_timestamp(client_id, item.get("ts"), recv_ts)
+        if "landmarks" in item:
+            entries.append(("landmarks", item["landmarks"], ts, load.current_tier(), False, None))
+            continue
+        accepted, tier, probe = plan_frame(client_id, ts)
+        if not accepted:
+            skipped += 1
+            continue
+        entries.append(("frame", item.get("frame"), ts, tier, probe, None))
+    skipped += max(0, len(items) - config.BATCH_MAX_ITEMS)
+    return entries, skipped
+
+async def analyze_frame(client_id, frame, ts, tier, probe, results=None, fingerprint=None):
+    """inference -> visibility -> counters คืนค่า (response, events) - fingerprint: ของ payload เฟรมนี้ (dedup)"""
+    selected_pose = clients.get_pose(client_id)
+    client = clients.clients.get(client_id)
+    events = []
+
+    # ✅ สร้าง response พื้นฐานที่มี reps และ holds เสมอ
+    response = {
+        "status": "ok",
+        "pose": selected_pose or "N/A",
+        "confidence": 0.0,
+        "advice_code": None,
+        "reps": client.reps_counts.copy() if client else {},  # ✅ ส่งเสมอ
+        "holds": {},
+        "state": "waiting",
+        "last_conf": 0.0,
+        "visibility_score": 0.0,
+        "full_body_visible": False,
+        "ready_to_start": False
+    }
+
+    # ---------------- Inference (fair-share scheduler) ----------------
+    active = bool(selected_pose and client and client.ready_to_start)
+    if results is not None:
+        pass  # landmark จาก client
+    elif probe:
+        results = await scheduler.submit(
+            client_id,
+            frame,
+            priority=InferenceScheduler.PRIORITY_IDLE,
+            model_complexity=config.PROBE_MODEL_COMPLEXITY,
+            max_width=min((w for w in (tier["max_width"], config.PROBE_MAX_WIDTH) if w), default=None)
+        )
+    else:
+        results = await scheduler.submit(
+            client_id,
+            frame,
+            priority=InferenceScheduler.PRIORITY_ACTIVE if active else InferenceScheduler.PRIORITY_IDLE,
+            model_complexity=tier["model_complexity"],
+            max_width=tier["max_width"]
+        )
+
+    person_present = bool(results and results.pose_landmarks)
+    response["person_detected"] = person_present
+    if client:
+        client.person_present = person_present
+        if frame is not None and results is not None:
+            client.last_results = results
+            client.last_fingerprint = fingerprint
+
+    if results:
+        if results.pose_landmarks and not selected_pose:
+            # Probe: ยังไม่เลือกท่า -> แจ้งเตือน (หรือโหวตหาท่าเมื่อเปิด auto-detect) ไม่ต้องตรวจ visibility
+            detecting = bool(client and client.auto_detect)
+            auto_pose = clients.recognize_pose(client_id, ts, results.pose_landmarks.landmark) if detecting else None
+            if auto_pose:
+                logger.info(f"[{client_id}] Auto-selected pose: {auto_pose}")
+                events.append({
+                    "status": "pose_selected",
+                    "pose": auto_pose,
+                    "auto": True,
+                    "messages_version": MESSAGES_VERSION
+                })
+            response.update({
+                "pose": auto_pose or "N/A",
                 "confidence": 0.0,
-                "advice": "",
-                "reps": client.reps_counts.copy() if client else {},  # ✅ ส่งเสมอ
+                "advice_code": "status.detecting_pose" if detecting else "status.select_pose",
+                "reps": client.reps_counts.copy() if client else {},
                 "holds": {},
-                "state": "waiting",
+                "state": "detecting_pose" if detecting else "waiting_pose_selection",
                 "last_conf": 0.0,
-                "visibility_score": 0.0,
-                "full_body_visible": False,
                 "ready_to_start": False
-            }
+            })
+            if detecting and not auto_pose:
+                response["candidate_pose"] = client.pose_recognizer.leader()
+        elif results.pose_landmarks:
+            landmarks = results.pose_landmarks.landmark
 
-            if results := analyzer.process_frame(frame):
-                if results.pose_landmarks:
-                    landmarks = results.pose_landmarks.landmark
-                    
-                    # ตรวจสอบว่าเห็นร่างกายเต็มตัวหรือไม่
-                    full_body_visible, missing_parts, visibility_score = check_full_body_visible(
-                        landmarks, analyzer.mp_pose, min_visibility=0.5
-                    )
-                    
-                    # ถ้ายังไม่มีท่าที่เลือก -> แจ้งเตือน
-                    if not selected_pose:
-                        response.update({
-                            "confidence": 0.0,
-                            "advice": "กรุณาเลือกท่าที่ต้องการออกกำลังกาย",
-                            "reps": client.reps_counts.copy() if client else {},
-                            "holds": {},
-                            "state": "waiting_pose_selection",
-                            "last_conf": 0.0,
-                            "visibility_score": round(visibility_score, 2),
-                            "full_body_visible": full_body_visible,
-                            "ready_to_start": False
-                        })
-                    elif not full_body_visible:
-                        # เห็นไม่ครบ -> ให้ confidence ต่ำ (0-20%) และไม่นับ
-                        partial_conf = min(visibility_score * 0.20, 0.20)
-                        missing_text = ", ".join(missing_parts[:3])
-                        response.update({
-                            "confidence": round(partial_conf, 3),
-                            "advice": f"!! ถอยออกให้เห็นร่างกายเต็มตัว (ขาด: {missing_text})",
-                            "reps": client.reps_counts.copy() if client else {},
-                            "holds": {},
-                            "state": "body_not_visible",
-                            "last_conf": round(partial_conf, 2),
-                            "visibility_score": round(visibility_score, 2),
-                            "full_body_visible": False,
-                            "missing_parts": missing_parts,
-                            "ready_to_start": False
-                        })
-                    else:
-                        # เห็นร่างกายเต็มตัวแล้ว -> ตรวจสอบท่าเฉพาะ
-                        pose_visible, pose_missing, pose_vis_score = check_pose_specific_visibility(
-                            landmarks, analyzer.mp_pose, selected_pose, min_visibility=0.5
-                        )
-                        
-                        if not pose_visible:
-                            # จุดสำคัญของท่านี้มองไม่เห็นครบ -> ให้ confidence ต่ำ
-                            partial_conf = min(pose_vis_score * 0.20, 0.20)
-                            response.update({
-                                "confidence": round(partial_conf, 3),
-                                "advice": f"!! ปรับมุมกล้องให้เห็นท่า {selected_pose} ชัดเจนขึ้น",
-                                "reps": client.reps_counts.copy() if client else {},
-                                "holds": {},
-                                "state": "pose_not_clear",
-                                "last_conf": round(partial_conf, 2),
-                                "visibility_score": round(pose_vis_score, 2),
-                                "full_body_visible": True,
-                                "ready_to_start": False
-                            })
-                        else:
-                            # ✅ เห็นร่างกายเต็มตัวและจุดสำคัญครบ -> เริ่มตรวจจับและนับ
-                            confidence = analyzer.detect(selected_pose, landmarks)
-
-                            # ✅ CRITICAL: อัพเดท counters (จะนับก็ต่อเมื่อเห็นเต็มตัว)
-                            clients.update_counters(client_id, selected_pose, confidence, ts, full_body_visible)
-                            
-                            # ✅ ดึงข้อมูลล่าสุดหลังจาก update
-                            current_reps = client.reps_counts.copy() if client else {}
-                            current_holds = {}
-                            
-                            if selected_pose in ["Plank", "Side Plank"]:
-                                hold_data = clients.get_hold_time(client_id, selected_pose)
-                                current_holds = {
-                                    selected_pose: {
-                                        "current_hold": hold_data["current"],
-                                        "best_hold": hold_data["best"]
-                                    }
-                                }
-                            
-                            hold_time = current_holds.get(selected_pose, {}).get("current_hold", 0.0)
-                            advice_msg = analyzer.feedback(selected_pose, landmarks, confidence, hold_time)
-
-                            # ✅ อัพเดท response ด้วยข้อมูลล่าสุด
-                            response.update({
-                                "confidence": round(float(confidence), 3),
-                                "advice": advice_msg,
-                                "reps": current_reps,  # ✅ ส่งค่าล่าสุด
-                                "holds": current_holds,
-                                "state": clients.get_state_debug(client_id, selected_pose),
-                                "last_conf": round(confidence, 2),
-                                "visibility_score": round(pose_vis_score, 2),
-                                "full_body_visible": True,
-                                "ready_to_start": True
-                            })
-                            
-                            # ✅ DEBUG LOG
-                            logger.info(f"[{client_id}] {selected_pose} - Conf: {confidence:.2f}, Reps: {current_reps.get(selected_pose, 0)}, State: {clients.get_state_debug(client_id, selected_pose)}")
-                else:
-                    # ไม่เจอ landmarks เลย
+            # ตรวจ visibility ทุกระดับ (เต็มตัว / จุดสำคัญของท่า / detector) ในครั้งเดียว
+            gate = visibility_gate(landmarks, selected_pose, min_visibility=0.5)
+            full_body_visible, missing_parts, visibility_score = (
+                gate.full_body_visible, gate.missing_parts, gate.visibility_score
+            )
+
+            if not full_body_visible:
+                # เห็นไม่ครบ -> ให้ confidence ต่ำ (0-20%) และไม่นับ
+                partial_conf = min(visibility_score * 0.20, 0.20)
+                missing_text = ", ".join(missing_parts[:3])
+                response.update({
+                    "confidence": round(partial_conf, 3),
+                    "advice_code": "status.step_back",
+                    "advice_params": {"missing": missing_text},
+                    "reps": client.reps_counts.copy() if client else {},
+                    "holds": {},
+                    "state": "body_not_visible",
+                    "last_conf": round(partial_conf, 2),
+                    "visibility_score": round(visibility_score, 2),
+                    "full_body_visible": False,
+                    "missing_parts": missing_parts,
+                    "ready_to_start": False
+                })
+            else:
+                # เห็นร่างกายเต็มตัวแล้ว -> ตรวจสอบท่าเฉพาะ
+                pose_visible, pose_vis_score = gate.pose_visible, gate.pose_score
+
+                if not pose_visible:
+                    # จุดสำคัญของท่านี้มองไม่เห็นครบ -> ให้ confidence ต่ำ
+                    partial_conf = min(pose_vis_score * 0.20, 0.20)
                     response.update({
-                        "confidence": 0.0,
-                        "advice": "กรุณาเข้ามาในกรอบกล้อง",
+                        "confidence": round(partial_conf, 3),
+                        "advice_code": "status.adjust_camera",
+                        "advice_params": {"pose": selected_pose},
                         "reps": client.reps_counts.copy() if client else {},
                         "holds": {},
-                        "state": "no_person_detected",
-                        "last_conf": 0.0,
-                        "visibility_score": 0.0,
-                        "full_body_visible": False,
+                        "state": "pose_not_clear",
+                        "last_conf": round(partial_conf, 2),
+                        "visibility_score": round(pose_vis_score, 2),
+                        "full_body_visible": True,
                         "ready_to_start": False
                     })
+                else:
+                    # ✅ เห็นร่างกายเต็มตัวและจุดสำคัญครบ -> เริ่มตรวจจับและนับ
+                    landmarks = filter_landmarks(client, selected_pose, landmarks, ts)
+                    confidence = PoseAnalyzer.detect(selected_pose, landmarks, gate)
+
+                    # ✅ CRITICAL: อัพเดท counters (จะนับก็ต่อเมื่อเห็นเต็มตัว)
+                    reps_before = client.reps_counts.get(selected_pose, 0) if client else 0
+                    hold_before = dict(clients.get_hold_time(client_id, selected_pose))
+                    clients.update_counters(client_id, selected_pose, confidence, ts, full_body_visible)
+                    events.extend(counter_events(client_id, selected_pose, reps_before, hold_before, ts))
 
-            # ✅ ส่ง response กลับไป
-            await websocket.send_json(response)
+                    # ✅ ดึงข้อมูลล่าสุดหลังจาก update
+                    current_reps = client.reps_counts.copy() if client else {}
+                    current_holds = {}
 
-    except WebSocketDisconnect:
-        clients.remove(client_id)
+                    if selected_pose in ["Plank", "Side Plank"]:
+                        hold_data = clients.get_hold_time(client_id, selected_pose)
+                        current_holds = {
+                            selected_pose: {
+                                "current_hold": hold_data["current"],
+                                "best_hold": hold_data["best"]
+                            }
+                        }
+
+                    hold_time = current_holds.get(selected_pose, {}).get("current_hold", 0.0)
+                    advice_code, advice_params = PoseAnalyzer.feedback(selected_pose, landmarks, confidence, hold_time)
+
+                    # ✅ อัพเดท response ด้วยข้อมูลล่าสุด
+                    response.update({
+                        "confidence": round(float(confidence), 3),
+                        "advice_code": advice_code,
+                        "advice_params": advice_params,
+                        "reps": current_reps,  # ✅ ส่งค่าล่าสุด
+                        "holds": current_holds,
+                        "state": clients.get_state_debug(client_id, selected_pose),
+                        "last_conf": round(confidence, 2),
+                        "visibility_score": round(pose_vis_score, 2),
+                        "full_body_visible": True,
+                        "ready_to_start": True
+                    })
+
+                    # ✅ DEBUG LOG
+                    logger.info(f"[{client_id}] {selected_pose} - Conf: {confidence:.2f}, Reps: {current_reps.get(selected_pose, 0)}, State: {clients.get_state_debug(client_id, selected_pose)}")
+        else:
+            # ไม่เจอ landmarks เลย
+            response.update({
+                "confidence": 0.0,
+                "advice_code": (
+                    "status.enter_frame" if selected_pose or (client and client.auto_detect)
+                    else "status.select_pose"
+                ),
+                "reps": client.reps_counts.copy() if client else {},
+                "holds": {},
+                "state": "no_person_detected",
+                "last_conf": 0.0,
+                "visibility_score": 0.0,
+                "full_body_visible": False,
+                "ready_to_start": False
+            })
+
+    if client:
+        client.ready_to_start = response["ready_to_start"]
+        if client.recorder and results:
+            record_frame(client, client_id, selected_pose, ts, results, response)
+    return response, events
+
+async def analyze_group_frame(client_id, group, frame, ts, tier, fingerprint=None):
+    """
+    group mode: person detector (เป็นระยะ) -> ROI ต่อ track -> pose ด้วย tracker ของ track
+    -> analyze_frame ของ session คนนั้น คืนค่า (state รวมทุกคน, events ที่ติด track_id)
+    """
+    events = []
+    if group.needs_detection(ts):
+        loop = asyncio.get_running_loop()
+        boxes = await loop.run_in_executor(decode_pool, group.detector.detect, frame)
+        for track in group.update_detections(boxes, ts):
+            open_person_session(client_id, group, track)
+            events.append({"event": "person_joined", "track_id": track.track_id, "ts": ts})
+
+    def priority(track):
+        person = clients.clients.get(track.session_id)
+        active = bool(person and person.ready_to_start)
+        return InferenceScheduler.PRIORITY_ACTIVE if active else InferenceScheduler.PRIORITY_IDLE
+
+    # ทุกคนเข้า scheduler พร้อมกัน (แยก session -> fair share เหมือน client ปกติ, คนที่ 2+ ถือ admission slot ของตัวเอง)
+    tracks = list(group.tracks.values())
+    results = await asyncio.gather(*[
+        scheduler.submit(
+            track.session_id,
+            group.crop(frame, track),
+            priority=priority(track),
+            analyzer=track.analyzer,
+            model_complexity=tier["model_complexity"],
+            max_width=tier["max_width"]
+        )
+        for track in tracks
+    ])
+
+    people = {}
+    for track, result in zip(tracks, results):
+        person_results = group.observe(track, result, ts, frame.shape)
+        response, person_events = await analyze_frame(track.session_id, None, ts, tier, False, person_results)
+        response["track_id"] = track.track_id
+        response["box"] = group.box_normalized(track, frame.shape)
+        people[str(track.track_id)] = response
+        events.extend(dict(event, track_id=track.track_id) for event in person_events)
+
+    for track in group.expire(ts):
+        await close_person_session(group, track)
+        people.pop(str(track.track_id), None)
+        events.append({"event": "person_left", "track_id": track.track_id, "ts": ts})
+
+    client = clients.clients.get(client_id)
+    if client:
+        client.person_present = bool(group.tracks)
+        client.last_fingerprint = fingerprint  # state ของ stream มาจากเฟรมนี้แล้ว
+    return {"status": "group", "count": len(people), "people": people}, events
+
+async def analyze_batch(client_id, entries, skipped):
+    """ประมวลผล batch ตามลำดับผ่าน tracker และ update_counters เดียวกัน คืนค่า response รวมหนึ่งข้อความ"""
+    response = None
+    events = []
+    errors = 0
+    for frame, results, error, ts, tier, probe, _ in entries:
+        if error:
+            errors += 1
+            continue
+        response, frame_events = await analyze_frame(client_id, frame, ts, tier, probe, results)
+        events.extend(frame_events)
+
+    if response is None:
+        client = clients.clients.get(client_id)
+        response = {"reps": client.reps_counts.copy() if client else {}}
+    response.update({
+        "status": "batch",
+        "events": events,
+        "batch": {
+            "received": len(entries) + skipped,
+            "processed": len(entries) - errors,
+            "skipped": skipped,
+            "errors": errors
+        }
+    })
+    return response
+
+@app.websocket("/ws/pose")
+async def ws_pose(websocket: WebSocket):
+    await websocket.accept()
+    host = websocket.client.host
+
+    # ---------------- Admission ----------------
+    async def notify_queued(position):
+        await websocket.send_json({"status": "queued", "position": position})
+
+    # slot ถูกจองภายใน try: setup ที่ล้มกลางทาง (เช่น send ตอน client หลุด) ยังคืน slot ใน finally
+    admitted = False
+    client_id = None
+    group = None
+    tasks = []
+    try:
+        admitted, reason = await admission.acquire(host, on_queued=notify_queued)
+        if not admitted:
+            logger.warning(f"[REJECTED] {host} ({reason})")
+            await websocket.send_json(admission.busy_message(reason))
+            await websocket.close(code=1013)  # Try Again Later
+            return
+
+        client_id = clients.register(host)
+        logger.info(f"[CONNECTED] {client_id}")
+        # ?mode=group: หลายคนจากกล้องตัวเดียว (state เดียวรวมทุกคน แยกตาม track_id)
+        if websocket.query_params.get("mode") == "group":
+            group = GroupSession(
+                client_id,
+                PersonDetector(max_width=config.GROUP_DETECT_WIDTH),
+                person_trackers,
+                max_people=config.GROUP_MAX_PEOPLE,
+                detect_interval=config.GROUP_DETECT_INTERVAL,
+                max_age=config.GROUP_MAX_AGE,
+                admit=admission.acquire_extra  # คนที่ 2+ นับเป็น session ของ admission ด้วย
+            )
+        if config.RECORD_ALL or websocket.query_params.get("record") == "1":
+            if group:
+                group.record = recorder is not None
+            else:
+                set_recording(client_id, True)
+        try:
+            clients.set_counting_engine(client_id, websocket.query_params.get("counting") or config.COUNTING_ENGINE)
+        except ValueError as e:
+            logger.warning(f"[{client_id}] {e}")
+        if config.AUTO_DETECT or websocket.query_params.get("pose") == "auto":
+            set_auto_detect(client_id, True)
+
+        # output mode: ?output=compact|msgpack หรือคำสั่ง {"output": "..."} ภายหลัง
+        encoder = ResponseEncoder(snapshot_interval=config.SNAPSHOT_INTERVAL)
+        output = websocket.query_params.get("output")
+        if output:
+            try:
+                encoder.set_mode(output)
+            except ValueError as e:
+                await send_encoded(websocket, encoder, {"status": "error", "detail": str(e)})
+
+        # reader -> (inbound) -> [decoder] -> (decoded) -> analyzer -> (outbound) -> writer
+        # network ช้าไม่ย้อนกลับมาถ่วง inference: state เก่าถูกเขียนทับ, event ไม่ทิ้ง
+        # decoder/analyzer อย่างละตัวเดียว -> ผลเข้า update_counters ตามลำดับเฟรมเสมอ
+        # video stream: reader -> (stream_chunks) -> stream_decoder -> (inbound) -> ...
+        inbound = LatestQueue(config.INBOUND_QUEUE_SIZE)
+        decoded = asyncio.Queue(maxsize=1)  # decode ล่วงหน้าได้ 1 งาน
+        outbound = OutboundChannel(max_events=config.OUTBOUND_MAX_EVENTS)
+        stream_chunks = asyncio.Queue(maxsize=config.STREAM_QUEUE_SIZE)
+        # buffer ของเฟรมจาก stream: ยืมตอนแปลงสี คืนหลัง analyzer ใช้เสร็จ (เฟรมที่ถูกทิ้งจากคิวไม่ได้คืน -> GC)
+        frame_pool = FramePool(depth=1, max_free=config.INBOUND_QUEUE_SIZE + 4)
+        # batch ไม่ถูกทิ้งและไม่นับใน maxsize ของ inbound -> รับทีละ batch กัน memory โตไม่จำกัด
+        batch_pending = False
+        if websocket.query_params.get("stream"):
+            # ?stream=h264[&stream_ts=1]
+            stream_chunks.put_nowait((None, {
+                "codec": websocket.query_params["stream"],
+                "timestamps": websocket.query_params.get("stream_ts") == "1"
+            }))
+
+        async def reader():
+            nonlocal batch_pending
+            last_queued = None  # fingerprint ของเฟรมล่าสุดที่เข้าคิว
+            while True:
+                received = await websocket.receive()
+                if received["type"] == "websocket.disconnect":
+                    return
+                recv_ts = time.time()
+                if received.get("bytes") is not None:
+                    # chunk ของ video stream ห้ามทิ้ง (เฟรมถัดไปอ้างอิงเฟรมก่อน) -> คิวเต็มให้ reader รอแทน
+                    await stream_chunks.put((received["bytes"], recv_ts))
+                    continue
+                message = received.get("text")
+                if message is None:
+                    continue
+                capture_ts = None
+
+                # ---------------- Command / Frame envelope ----------------
+                if message.startswith("{"):
+                    try:
+                        cmd = json.loads(message)
+                        if "batch" in cmd and group:
+                            outbound.put_notice({"error": "unsupported", "detail": "batch is not supported in group mode"})
+                            continue
+                        if "batch" in cmd:
+                            last_queued = None
+                            if batch_pending:
+                                # batch ก่อนหน้ายังไม่เสร็จ: ให้ client ส่งใหม่ภายหลัง (ไม่ได้นับรายการใน batch นี้)
+                                outbound.put_event({"status": "busy", "detail": "previous batch is still being processed"})
+                                continue
+                            # burst จาก client ที่ buffer ไว้: ทำครบทุกรายการ ห้ามทิ้ง
+                            entries, skipped = plan_batch(client_id, cmd["batch"], recv_ts)
+                            batch_pending = True
+                            inbound.put((entries, True, skipped), droppable=False)
+                            continue
+                        if "frame" in cmd:
+                            # {"frame": "<base64>", "ts": <capture time ms>}
+                            message, capture_ts = cmd["frame"], cmd.get("ts")
+                        elif "stream" in cmd:
+                            # เปิด/เปลี่ยน/ปิด stream ผ่านคิวเดียวกับ chunk -> มีผลตรงลำดับ
+                            await stream_chunks.put((None, cmd["stream"]))
+                            continue
+                        else:
+                            handle_command(client_id, cmd, encoder, outbound, group)
+                            continue
+                    except Exception as e:
+                        logger.error("cmd parse error: %s", e)
+                        continue
+
+                # SDK บางตัวส่งภาพเดิมซ้ำตอนกล้องค้าง: bytes เดียวกับเฟรมก่อน -> ไม่ต้อง decode / inference
+                # ซ้ำ = ตรงกับเฟรมล่าสุดที่เข้าคิว และผลที่เก็บไว้ (last_results) มาจากเฟรมนั้นจริง
+                # (เฟรมที่ถูกปฏิเสธ / ทิ้งจากคิว / decode ไม่ได้ ไม่เคยเป็นต้นแบบของเฟรมซ้ำ)
+                duplicate = False
+                fingerprint = None
+                if config.DEDUP:
+                    fingerprint = frame_fingerprint(message)
+                    duplicate = fingerprint == last_queued == clients.clients[client_id].last_fingerprint
+
+                # counters/hold/cooldown ใช้เวลาที่ถ่ายเฟรม ไม่ใช่เวลาที่ได้รับ
+                ts = clients.frame_timestamp(client_id, capture_ts, recv_ts)
+                accepted, tier, probe = plan_frame(client_id, ts, group)
+                if not accepted:
+                    outbound.put_notice({"status": "skipped", "tier": tier["name"], "probe": probe})
+                    continue
+                if duplicate and group:
+                    # group mode: ผลแยกตาม track ใช้ซ้ำไม่ได้ -> ข้ามเฟรม (state ล่าสุดยังอยู่ที่ client)
+                    clients.clients[client_id].duplicates_skipped += 1
+                    outbound.put_notice({"status": "skipped", "duplicate": True})
+                    continue
+                inbound.put(([("duplicate" if duplicate else "frame", message, ts, tier, probe, fingerprint)], False, 0))
+                last_queued = fingerprint
+
+        async def stream_decoder():
+            """decode chunk ตามลำดับด้วย decoder ของ session แล้วส่งเฟรมที่ผ่าน plan_frame เข้า inbound เหมือน JPEG"""
+            loop = asyncio.get_running_loop()
+            stream = None
+            while True:
+                chunk, info = await stream_chunks.get()  # (bytes, recv_ts) หรือ (None, stream spec)
+                if chunk is None:
+                    stream, message = open_stream(info)
+                    outbound.put_event(message)
+                    continue
+                if stream is None:
+                    outbound.put_notice({"error": "no_stream", "detail": 'send {"stream": "h264"} before binary chunks'})
+                    continue
+                recv_ts = info
+                try:
+                    capture_ts, chunk = stream.split(chunk)
+                except ValueError as e:
+                    outbound.put_notice({"error": "stream_decode_failed", "detail": str(e)})
+                    continue
+                # decode ทุก chunk (ข้ามไม่ได้) แต่แปลงสีเฉพาะเฟรมที่รับไปวิเคราะห์
+                frames, error = await loop.run_in_executor(decode_pool, stream.decode, chunk)
+                if error:
+                    outbound.put_notice(error)
+                for frame in frames:
+                    ts = clients.frame_timestamp(client_id, capture_ts, recv_ts)
+                    accepted, tier, probe = plan_frame(client_id, ts, group)
+                    if not accepted:
+                        outbound.put_notice({"status": "skipped", "tier": tier["name"], "probe": probe})
+                        continue
+                    image = await loop.run_in_executor(decode_pool, StreamDecoder.to_bgr, frame, frame_pool)
+                    inbound.put(([("image", image, ts, tier, probe, None)], False, 0))
+
+        async def decoder():
+            loop = asyncio.get_running_loop()
+            while True:
+                entries, is_batch, skipped = await inbound.get()
+                entries = await loop.run_in_executor(decode_pool, decode_entries, entries)
+                await decoded.put((entries, is_batch, skipped))
+
+        async def analyzer_stage():
+            nonlocal batch_pending
+            while True:
+                if decode_pool:
+                    entries, is_batch, skipped = await decoded.get()
+                else:
+                    entries, is_batch, skipped = await inbound.get()
+                    entries = decode_entries(entries)
+                if is_batch:
+                    # ผลรวมของ batch เป็น event (ไม่ถูกเขียนทับ)
+                    try:
+                        outbound.put_event(await analyze_batch(client_id, entries, skipped))
+                    finally:
+                        batch_pending = False
+                    continue
+                frame, results, error, ts, tier, probe, fingerprint = entries[0]
+                if error:
+                    outbound.put_notice(error)
+                    continue
+                if group is None:
+                    results = resolve_duplicate(client_id, frame, results, fingerprint)
+                    if results is REUSE_LAST:
+                        outbound.put_notice({"status": "skipped", "duplicate": True})
+                        continue
+                if group is not None and frame is not None:
+                    response, events = await analyze_group_frame(client_id, group, frame, ts, tier, fingerprint)
+                else:
+                    response, events = await analyze_frame(client_id, frame, ts, tier, probe, results, fingerprint)
+                if frame is not None:
+                    frame_pool.release(frame)  # inference/crop ใช้เสร็จแล้ว (เฟรม JPEG ไม่ได้มาจาก pool -> ไม่มีผล)
+                for event in events:
+                    outbound.put_event(event)
+                outbound.put_state(response)
+
+        async def writer():
+            while True:
+                kind, message = await outbound.get()
+                state = kind == OutboundChannel.STATE
+                if state and group is not None and "people" in message:
+                    # แนบข้อความตอนส่งจริงรายคน: state ของ group ที่ถูกเขียนทับก่อนส่งไม่ทำให้ข้อความเต็มหาย
+                    for track_id, person in message["people"].items():
+                        track = group.tracks.get(int(track_id))
+                        attach_advice_text(person, clients.clients.get(track.session_id) if track else None)
+                elif (state and group is None) or "batch" in message:
+                    attach_advice_text(message, clients.clients.get(client_id))
+                await send_encoded(websocket, encoder, message, state=state)
+                if "batch" in message:
+                    encoder.request_snapshot()  # state ถัดไปเป็น full เพราะ batch ส่งแบบเต็ม
+
+        tasks = [
+            asyncio.create_task(reader()),
+            asyncio.create_task(stream_decoder()),
+            asyncio.create_task(analyzer_stage()),
+            asyncio.create_task(writer())
+        ]
+        if decode_pool:
+            tasks.append(asyncio.create_task(decoder()))
+        done, _ = await asyncio.wait(tasks, return_when=asyncio.FIRST_COMPLETED)
+        for task in done:
+            exc = task.exception()
+            if isinstance(exc, SlowConsumer):
+                logger.warning(f"[SLOW CLIENT] {client_id}: {exc}")
+                try:
+                    await websocket.close(code=1013)  # Try Again Later
+                except Exception:
+                    pass
+            elif exc and not isinstance(exc, WebSocketDisconnect):
+                logger.error(f"[UNEXPECTED ERROR] {exc}", exc_info=exc)
         logger.info(f"[DISCONNECTED] {client_id}")
-    except Exception as e:
-        logger.error(f"[UNEXPECTED ERROR] {e}", exc_info=True)
-        clients.remove(client_id)
+    finally:
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        if client_id is not None:
+            scheduler.remove_session(client_id)
+            if group:
+                for track in group.close():
+                    await close_person_session(group, track)
+            set_recording(client_id, False)
+            clients.remove(client_id)
+        if admitted:
+            await admission.release(host)
 
 # ---------------- HTTP ----------------
 @app.get("/")
@@ -225,13 +973,20 @@ async def root():
             "Hold time tracking for 2 exercises (Plank, Side Plank)",
             "Real-time form feedback in Thai",
             "Confidence scoring (0-20% when body not visible, 0-100% when visible)",
-            "Pose-specific landmark validation"
+            "Pose-specific landmark validation",
+            "Multi-person group mode from one camera (/ws/pose?mode=group)",
+            "Compressed video stream input (binary H.264/VP8 chunks, /ws/pose?stream=h264)"
         ],
+        "stream_codecs": available_codecs(),
         "websocket_endpoint": "/ws/pose",
         "http_endpoints": {
             "root": "/",
             "health": "/health",
-            "poses": "/poses"
+            "ready": "/ready",
+            "metrics": "/metrics",
+            "messages": "/messages",
+            "poses": "/poses",
+            "video_jobs": "/jobs/video"
         },
         "documentation": "See API docs for integration details"
     }
@@ -240,6 +995,51 @@ async def root():
 async def health():
     return {"status": "healthy", "active_clients": clients.count(), "timestamp": time.time()}
 
+@app.get("/ready")
+async def ready():
+    """Readiness สำหรับ load balancer: 503 เมื่อไม่มี capacity เหลือ"""
+    ok, reason = admission.check(None)
+    body = {
+        "ready": ok,
+        "reason": reason,
+        **admission.stats(),
+        "tier": load.stats()["tier"],
+        "utilization": load.stats()["utilization"],
+        "timestamp": time.time()
+    }
+    if not ok:
+        return JSONResponse(body, status_code=503, headers={"Retry-After": str(admission.retry_after)})
+    return body
+
+@app.get("/metrics")
+async def metrics():
+    """สถานะโหลดของ node และ quality tier ปัจจุบัน"""
+    return {
+        "active_clients": clients.count(),
+        "backend": config.POSE_BACKEND,
+        "load": load.stats(),
+        "admission": admission.stats(),
+        "scheduler": scheduler.stats(),
+        "video_jobs": video_jobs.stats(),
+        "recorder": recorder.stats() if recorder else None,
+        "person_trackers": person_trackers.stats(),
+        "duplicates_skipped": clients.duplicate_stats(),
+        "timestamp": time.time()
+    }
+
+@app.get("/messages")
+async def messages(version: int = None):
+    """Catalogue ของข้อความ advice (client ดึงครั้งเดียวแล้ว cache ตาม version)"""
+    if version is not None and version != MESSAGES_VERSION:
+        return JSONResponse(
+            {"error": "unknown_version", "current_version": MESSAGES_VERSION},
+            status_code=404
+        )
+    return JSONResponse(
+        {"version": MESSAGES_VERSION, "messages": MESSAGES},
+        headers={"ETag": f'"messages-v{MESSAGES_VERSION}"', "Cache-Control": "public, max-age=86400"}
+    )
+
 @app.get("/poses")
 async def list_poses():
     """รายการท่าออกกำลังกายทั้งหมด"""
@@ -255,6 +1055,12 @@ async def list_poses():
             "note": "Reps counted only when full body is visible throughout movement"
         },
         "all_poses": list(PoseAnalyzer.DETECTORS.keys()),
+        "auto_detect": {
+            "description": "Pick the exercise automatically when no pose is selected",
+            "enabled_by_default": config.AUTO_DETECT,
+            "enable": {"select_pose": "auto"},
+            "note": "Sends {\"status\": \"pose_selected\", \"auto\": true} once the vote is clear"
+        },
         "tracking_requirements": {
             "full_body_visible": "Must see shoulders, hips, knees, and ankles",
             "min_visibility": "At least 6 out of 8 key landmarks visible",
@@ -262,6 +1068,47 @@ async def list_poses():
         }
     }
 
+@app.post("/jobs/video")
+async def submit_video_job(request: Request, pose: str, stride: int = 1, max_width: int = None):
+    """
+    อัปโหลดวิดีโอเป็น raw body (เช่น Content-Type: video/mp4) แล้ววิเคราะห์เบื้องหลัง
+    ตอบ 202 พร้อม job_id -> ดูสถานะที่ /jobs/{job_id}, ผลที่ /jobs/{job_id}/results
+    """
+    if pose not in PoseAnalyzer.DETECTORS:
+        return JSONResponse({"error": "unknown_pose", "detail": pose}, status_code=400)
+    try:
+        path = await video_jobs.save_upload(request.stream(), config.VIDEO_MAX_UPLOAD_MB * 1024 * 1024)
+    except UploadTooLarge as e:
+        return JSONResponse({"error": "upload_too_large", "detail": str(e)}, status_code=413)
+    except JobQueueFull as e:
+        return JSONResponse(
+            {"error": "jobs_busy", "detail": str(e), "retry_after": config.RETRY_AFTER},
+            status_code=503,
+            headers={"Retry-After": str(config.RETRY_AFTER)}
+        )
+    except ValueError as e:
+        return JSONResponse({"error": "invalid_upload", "detail": str(e)}, status_code=400)
+    job = video_jobs.submit(path, pose, stride=max(1, stride), max_width=max_width)
+    logger.info(f"[VIDEO JOB] {job['job_id']} queued ({pose})")
+    return JSONResponse(video_jobs.describe(job), status_code=202)
+
+@app.get("/jobs/{job_id}")
+async def video_job_status(job_id: str):
+    job = video_jobs.get(job_id)
+    if not job:
+        return JSONResponse({"error": "job_not_found"}, status_code=404)
+    return video_jobs.describe(job)
+
+@app.get("/jobs/{job_id}/results")
+async def video_job_results(job_id: str):
+    """ผลเต็ม: จำนวน rep, เวลาค้างท่า และ timeline (rep, hold segments, confidence curve)"""
+    job = video_jobs.get(job_id)
+    if not job:
+        return JSONResponse({"error": "job_not_found"}, status_code=404)
+    if job["status"] != "done":
+        return JSONResponse(video_jobs.describe(job), status_code=409)
+    return {"job_id": job_id, **job["result"]}
+
 @app.get("/debug/client/{client_id}")
 async def debug_client(client_id: str):
     """ดูข้อมูล debug ของ client เฉพาะ"""
@@ -0,0 +1,142 @@
+# modules/admission.py
+import asyncio
+import time
+
+
+class AdmissionController:
+    """
+    Admission control สำหรับ /ws/pose
+    - ประเมินจำนวน session ที่รับได้จากเวลา inference จริง (ผ่าน LoadController)
+      ไม่มีตัวอย่างใน window (เพิ่งเปิด / ว่างนาน) -> ใช้ค่าเฉลี่ยล่าสุดที่เคยวัดได้ หรือ cold_capacity ถ้ายังไม่เคยวัด
+    - จำกัดจำนวน session ต่อ IP
+    - ถ้าเต็ม -> รอคิว (ถ้าเปิด queue_timeout) หรือปฏิเสธพร้อม retry_after
+    """
+
+    def __init__(self, load, max_sessions=0, max_per_ip=4, session_fps=15.0,
+                 headroom=0.85, queue_timeout=0.0, retry_after=5, cold_capacity=4):
+        self.load = load
+        self.max_sessions = max_sessions  # 0 = ใช้ค่าประเมินจาก capacity อย่างเดียว
+        self.max_per_ip = max_per_ip
+        self.session_fps = session_fps
+        self.headroom = headroom
+        self.queue_timeout = queue_timeout
+        self.retry_after = retry_after
+        self.cold_capacity = max(1, cold_capacity)
+
+        self.active = 0
+        self.per_ip = {}
+        self.waiting = 0
+        self.rejected = 0
+        self._cond = None
+        self._last_mean = 0.0
+
+    # ---------------- Capacity ----------------
+    def estimated_capacity(self):
+        """จำนวน session ที่ node รับได้ ประเมินจาก mean inference time"""
+        mean = self.load.mean_inference_time()
+        if mean > 0:
+            self._last_mean = mean
+        else:
+            mean = self._last_mean  # burst หลังว่างนาน: ใช้ค่าที่วัดได้ล่าสุด ไม่ใช่ไม่จำกัด
+        if mean > 0:
+            frames_per_sec = self.load.workers * self.headroom / mean
+            estimate = max(1, int(frames_per_sec / self.session_fps))
+        else:
+            estimate = self.cold_capacity
+        if self.max_sessions:
+            return min(self.max_sessions, estimate)
+        return estimate
+
+    def remaining(self):
+        return max(0, self.estimated_capacity() - self.active)
+
+    def _saturated(self):
+        """tier ต่ำสุดแล้วแต่ยังอิ่มตัว -> ไม่มีทางลดคุณภาพต่อได้แล้ว"""
+        return (self.load.level == len(self.load.TIERS) - 1
+                and self.load.utilization() >= self.load.high_watermark)
+
+    def check(self, host):
+        """Return (ok, reason) โดยไม่จอง slot"""
+        if self.max_per_ip and self.per_ip.get(host, 0) >= self.max_per_ip:
+            return False, "per_ip_limit"
+        if self.remaining() <= 0 or self._saturated():
+            return False, "capacity"
+        return True, None
+
+    # ---------------- Acquire / Release ----------------
+    def _take(self, host):
+        self.active += 1
+        self.per_ip[host] = self.per_ip.get(host, 0) + 1
+
+    async def acquire(self, host, on_queued=None):
+        """จอง slot ให้ session ใหม่ คืนค่า (ok, reason)"""
+        ok, reason = self.check(host)
+        if ok:
+            self._take(host)
+            return True, None
+        if reason != "capacity" or self.queue_timeout <= 0:
+            self.rejected += 1
+            return False, reason
+
+        if self._cond is None:
+            self._cond = asyncio.Condition()
+        deadline = time.monotonic() + self.queue_timeout
+        self.waiting += 1
+        try:
+            if on_queued:
+                await on_queued(self.waiting)
+            async with self._cond:
+                while True:
+                    ok, reason = self.check(host)
+                    if ok:
+                        self._take(host)
+                        return True, None
+                    timeout = deadline - time.monotonic()
+                    if timeout <= 0:
+                        self.rejected += 1
+                        return False, reason
+                    try:
+                        # ตรวจซ้ำเป็นระยะ เพราะ capacity เปลี่ยนตามโหลดได้ด้วย
+                        await asyncio.wait_for(self._cond.wait(), min(timeout, 1.0))
+                    except asyncio.TimeoutError:
+                        pass
+        finally:
+            self.waiting -= 1
+
+    def acquire_extra(self):
+        """จอง slot เพิ่มให้ connection ที่รับไปแล้ว (คนที่ 2+ ใน group mode) แบบไม่รอคิว คืนค่า True ถ้าได้"""
+        if self.remaining() <= 0 or self._saturated():
+            return False
+        self.active += 1
+        return True
+
+    async def release(self, host):
+        count = self.per_ip.get(host, 0) - 1
+        if count > 0:
+            self.per_ip[host] = count
+        else:
+            self.per_ip.pop(host, None)
+        await self.release_extra()
+
+    async def release_extra(self):
+        self.active = max(0, self.active - 1)
+        if self._cond is not None:
+            async with self._cond:
+                self._cond.notify()
+
+    def busy_message(self, reason):
+        return {
+            "status": "server_busy",
+            "reason": reason,
+            "retry_after": self.retry_after
+        }
+
+    def stats(self):
+        return {
+            "active_sessions": self.active,
+            "capacity": self.estimated_capacity(),
+            "remaining": self.remaining(),
+            "waiting": self.waiting,
+            "rejected": self.rejected,
+            "max_per_ip": self.max_per_ip
+        }
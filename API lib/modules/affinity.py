@@ -0,0 +1,62 @@
+# modules/affinity.py
+# จำนวน thread ของ OpenCV และการ pin CPU ของ inference worker / process pool
+# - cv2 มี thread pool ของตัวเอง: ขนานที่ระดับ worker แล้ว ให้ cv2 ใช้ 1 thread กันแย่ง core กับ graph
+# - thread ภายใน graph ของ MediaPipe (TFLite/XNNPACK) สืบ affinity จาก thread ที่สร้าง graph
+#   -> สร้าง analyzer ใน thread ที่ pin แล้ว = จำกัด core (และจำนวน thread ที่วิ่งพร้อมกัน) ต่อ graph
+# pin ได้เฉพาะ Linux (os.sched_setaffinity) ระบบอื่นข้ามไปเฉยๆ
+import os
+
+
+def parse_cpus(spec):
+    """ "0-3,6" -> [0, 1, 2, 3, 6] (ว่าง -> []) """
+    cpus = []
+    for part in str(spec or "").split(","):
+        part = part.strip()
+        if not part:
+            continue
+        if "-" in part:
+            lo, hi = part.split("-", 1)
+            cpus.extend(range(int(lo), int(hi) + 1))
+        else:
+            cpus.append(int(part))
+    return sorted(set(cpus))
+
+
+def available_cpus():
+    if hasattr(os, "sched_getaffinity"):
+        return sorted(os.sched_getaffinity(0))
+    return list(range(os.cpu_count() or 1))
+
+
+def worker_cpu_sets(spec, workers, per_worker=0, exclude=()):
+    """
+    แบ่ง core ให้ worker แต่ละตัว (ไม่ซ้อนกันถ้า core พอ) คืนค่า list ของ cpu set หรือ None = ไม่ pin
+    spec: core ที่ให้ inference ใช้ (ว่าง = ทุก core ที่ process ใช้ได้ ยกเว้น exclude)
+    per_worker: core ต่อ worker (0 = แบ่งเท่าๆ กัน) - ไม่ระบุทั้งสองอย่าง = ไม่ pin
+    exclude: core ที่กันไว้ให้ส่วนอื่น (เช่น event loop) - ถ้าเหลือไม่พอก็ใช้ทุก core
+    """
+    if not spec and not per_worker:
+        return None
+    cpus = parse_cpus(spec) or [c for c in available_cpus() if c not in exclude] or available_cpus()
+    per = per_worker or max(1, len(cpus) // max(1, workers))
+    return [[cpus[(idx * per + k) % len(cpus)] for k in range(per)] for idx in range(workers)]
+
+
+def pin_current_thread(cpus):
+    """pin thread ที่เรียก (Linux: pid 0 = thread ปัจจุบัน) คืนค่า True ถ้า pin ได้"""
+    if not cpus or not hasattr(os, "sched_setaffinity"):
+        return False
+    os.sched_setaffinity(0, cpus)
+    return True
+
+
+def set_cv2_threads(threads):
+    """cv2.setNumThreads (ค่าติดลบ = ค่า default ของ OpenCV)"""
+    import cv2
+    cv2.setNumThreads(threads)
+
+
+def init_worker_process(cv2_threads, cpus=None):
+    """initializer ของ process pool: ตั้ง thread ของ cv2 และ pin ทั้ง process ก่อนสร้าง tracker"""
+    set_cv2_threads(cv2_threads)
+    pin_current_thread(cpus)
@@ -0,0 +1,122 @@
+# modules/buffers.py
+# buffer ของเฟรมที่จองไว้ล่วงหน้าแล้ววนใช้ซ้ำ (ส่งเข้า OpenCV ผ่าน dst=) แทนการสร้าง ndarray ใหม่ทุกเฟรม
+# - PoseAnalyzer: resize + BGR->RGB ลง buffer ของ analyzer (ใช้ทีละงาน, graph copy ภาพเข้า packet เอง)
+# - video stream: YUV ของ decoder -> I420 -> BGR ลง buffer ที่ยืมจาก pool ของ session (คืนหลังวิเคราะห์เสร็จ)
+import threading
+import weakref
+from collections import OrderedDict
+
+import cv2
+import numpy as np
+
+
+class FramePool:
+    """
+    buffer สองแบบ
+    - get(): scratch แยกตาม (tag, shape, dtype) วนใช้ depth ชุดแบบ ring - ใช้เมื่อรู้แน่ว่าไม่มีใครถือ
+      buffer เกิน depth งาน (เช่น analyzer ที่ทำทีละเฟรม) เพราะครบรอบแล้วเขียนทับโดยไม่ถาม
+    - acquire() / release(): ยืมออกไปจนกว่าจะคืนเอง ไม่ถูกเขียนทับระหว่างนั้น (เฟรมที่ผ่านหลาย stage / thread)
+      ไม่ได้คืน (เช่น ถูกทิ้งจากคิว) -> หายไปกับ GC, pool เก็บ buffer ว่างไว้ไม่เกิน max_free ต่อขนาด
+    ขนาดภาพเปลี่ยน -> key ใหม่, key ที่ไม่ได้ใช้นานสุดถูกทิ้งเมื่อเกิน max_keys
+    """
+
+    def __init__(self, depth=1, max_keys=4, max_free=4):
+        self.depth = max(1, depth)
+        self.max_keys = max_keys
+        self.max_free = max_free
+        self._rings = OrderedDict()  # key -> [buffers, index ถัดไป]
+        self._free = OrderedDict()  # (shape, dtype) -> buffer ว่างของ acquire
+        self._lent = weakref.WeakValueDictionary()  # id -> buffer ที่ยืมออกไป
+        self._lock = threading.Lock()  # acquire ใน decode thread, release ใน event loop
+        self.allocated = 0
+        self.reused = 0
+
+    def get(self, tag, shape, dtype=np.uint8):
+        key = (tag, tuple(shape), np.dtype(dtype).str)
+        ring = self._rings.get(key)
+        if ring is None:
+            ring = self._rings[key] = [[], 0]
+            while len(self._rings) > self.max_keys:
+                self._rings.popitem(last=False)
+        else:
+            self._rings.move_to_end(key)
+        buffers, idx = ring
+        if idx == len(buffers):
+            buffers.append(np.empty(shape, dtype))
+            self.allocated += 1
+        else:
+            self.reused += 1
+        ring[1] = (idx + 1) % self.depth
+        return buffers[idx]
+
+    def acquire(self, shape, dtype=np.uint8):
+        """buffer ที่ผู้เรียกถือไว้จนกว่าจะ release()"""
+        key = (tuple(shape), np.dtype(dtype).str)
+        with self._lock:
+            free = self._free.get(key)
+            buf = free.pop() if free else None
+            if buf is None:
+                buf = np.empty(shape, dtype)
+                self.allocated += 1
+            else:
+                self.reused += 1
+            self._lent[id(buf)] = buf
+        return buf
+
+    def release(self, buf):
+        """คืน buffer ที่ได้จาก acquire() (array อื่นไม่สนใจ) - ห้ามใช้ buf ต่อหลังคืน"""
+        with self._lock:
+            if self._lent.get(id(buf)) is not buf:
+                return
+            del self._lent[id(buf)]
+            key = (buf.shape, buf.dtype.str)
+            free = self._free.get(key)
+            if free is None:
+                free = self._free[key] = []
+                while len(self._free) > self.max_keys:
+                    self._free.popitem(last=False)
+            else:
+                self._free.move_to_end(key)
+            if len(free) < self.max_free:
+                free.append(buf)
+
+    def stats(self):
+        return {
+            "keys": len(self._rings) + len(self._free),
+            "bytes": sum(b.nbytes for buffers, _ in self._rings.values() for b in buffers)
+            + sum(b.nbytes for free in self._free.values() for b in free),
+            "lent": len(self._lent),
+            "allocated": self.allocated,
+            "reused": self.reused
+        }
+
+
+def prepare_rgb(frame, max_width=None, pool=None):
+    """ย่อภาพ (ถ้ากว้างเกิน max_width) แล้วแปลง BGR -> RGB - มี pool -> เขียนลง buffer ของ pool"""
+    if max_width and frame.shape[1] > max_width:
+        height = max(1, int(round(frame.shape[0] * max_width / frame.shape[1])))
+        dst = pool.get("resize", (height, max_width) + frame.shape[2:]) if pool else None
+        frame = cv2.resize(frame, (max_width, height), dst=dst, interpolation=cv2.INTER_AREA)
+    dst = pool.get("rgb", frame.shape) if pool else None
+    return cv2.cvtColor(frame, cv2.COLOR_BGR2RGB, dst=dst)
+
+
+def _plane(plane, rows, cols):
+    """view ของ plane (ตัด padding ท้ายบรรทัด) ไม่ copy"""
+    return np.frombuffer(plane, np.uint8).reshape(-1, plane.line_size)[:rows, :cols]
+
+
+def yuv420p_to_bgr(frame, pool):
+    """
+    av.VideoFrame (yuv420p) -> BGR: copy 3 plane เป็น I420 (scratch) แล้ว cvtColor (BT.601 เหมือน swscale)
+    ลง buffer ที่ยืมจาก pool -> ผู้เรียกต้อง pool.release() เมื่อใช้เฟรมเสร็จ
+    """
+    w, h = frame.width, frame.height
+    i420 = pool.get("i420", (h * 3 // 2, w))
+    flat = i420.reshape(-1)
+    y, u, v = frame.planes
+    np.copyto(i420[:h], _plane(y, h, w))
+    quarter = (h // 2) * (w // 2)
+    np.copyto(flat[h * w:h * w + quarter].reshape(h // 2, w // 2), _plane(u, h // 2, w // 2))
+    np.copyto(flat[h * w + quarter:].reshape(h // 2, w // 2), _plane(v, h // 2, w // 2))
+    return cv2.cvtColor(i420, cv2.COLOR_YUV2BGR_I420, dst=pool.acquire((h, w, 3)))
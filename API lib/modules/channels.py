@@ -0,0 +1,92 @@
+# modules/channels.py
+import asyncio
+from collections import deque
+
+
+class SlowConsumer(Exception):
+    """client อ่าน event ไม่ทันจนคิวเต็ม -> ปิด connection (event ทิ้งไม่ได้)"""
+
+
+class LatestQueue:
+    """
+    Bounded queue ระหว่าง reader -> analyzer
+    เต็มแล้วทิ้งของเก่าสุด (เฟรมเก่าไม่มีประโยชน์เมื่อมีเฟรมใหม่กว่า)
+    item ที่ droppable=False (เช่น batch) ไม่ถูกทิ้งและไม่นับรวมใน maxsize
+    """
+
+    def __init__(self, maxsize=1):
+        self.maxsize = max(1, maxsize)
+        self.items = deque()  # (droppable, item)
+        self.dropped = 0
+        self._ready = asyncio.Event()
+
+    def put(self, item, droppable=True):
+        if droppable:
+            droppables = [entry for entry in self.items if entry[0]]
+            while len(droppables) >= self.maxsize:
+                self.items.remove(droppables.pop(0))
+                self.dropped += 1
+        self.items.append((droppable, item))
+        self._ready.set()
+
+    async def get(self):
+        while not self.items:
+            self._ready.clear()
+            await self._ready.wait()
+        return self.items.popleft()[1]
+
+    def __len__(self):
+        return len(self.items)
+
+
+class OutboundChannel:
+    """
+    ช่องทางขาออกของแต่ละ WebSocket (analyzer -> writer)
+    - event (rep, hold, command reply): เข้าคิวตามลำดับ ไม่ทิ้ง
+      คิวมีขนาดจำกัด: เกิน max_events -> get() raise SlowConsumer ให้ปิด connection
+    - state: เก็บแค่ล่าสุด ถ้า writer ยังส่งไม่ทันจะถูกเขียนทับ
+    - notice (skipped, decode error): ส่งเฉพาะเมื่อไม่มี state ค้างอยู่
+    """
+    EVENT = "event"
+    STATE = "state"
+    NOTICE = "notice"
+
+    def __init__(self, max_events=256):
+        self.events = deque()
+        self.max_events = max(1, max_events)
+        self.overflowed = False
+        self.latest = None  # (kind, message)
+        self.overwritten = 0
+        self._ready = asyncio.Event()
+
+    def put_event(self, message):
+        if len(self.events) >= self.max_events:
+            # ทิ้ง event แล้วให้ writer ปิด connection แทน (ส่งต่อแบบขาดหายไม่ได้)
+            self.overflowed = True
+        else:
+            self.events.append(message)
+        self._ready.set()
+
+    def put_state(self, message):
+        if self.latest is not None and self.latest[0] == self.STATE:
+            self.overwritten += 1
+        self.latest = (self.STATE, message)
+        self._ready.set()
+
+    def put_notice(self, message):
+        if self.latest is None or self.latest[0] == self.NOTICE:
+            self.latest = (self.NOTICE, message)
+            self._ready.set()
+
+    async def get(self):
+        """Return (kind, message) ถัดไป: event ก่อนเสมอ แล้วค่อย state/notice ล่าสุด"""
+        while True:
+            if self.overflowed:
+                raise SlowConsumer(f"{len(self.events)} events not yet sent")
+            if self.events:
+                return self.EVENT, self.events.popleft()
+            if self.latest is not None:
+                item, self.latest = self.latest, None
+                return item
+            self._ready.clear()
+            await self._ready.wait()
@@ -6,6 +6,10 @@
 
 import time
 
+from . import registry
+from .recognizer import PoseRecognizer, score_all
+from .rep_detector import RepDetector
+
 class Client:
     def __init__(self, cid):
         self.cid = cid
@@ -19,54 +23,57 @@ class Client:
         self.peak_detected = {}
         self.confidence_history = {}
         self.twist_direction = "center"  # สำหรับ Russian Twist
+        self.last_sample_ts = 0.0  # เวลาเฟรมล่าสุดที่รับเข้าประมวลผล
+        self.ready_to_start = False  # ผลล่าสุด: เห็นเต็มตัวและจุดสำคัญครบ
+        self.person_present = False  # ผลล่าสุด: เจอคนในเฟรมหรือไม่ (probe mode)
+        self.last_advice_code = None  # advice code ที่ส่งไปล่าสุด
+        self.advice_text_always = False  # True = ส่งข้อความเต็มทุกเฟรม
+        self.clock_offset = None  # server time - client capture time (latency ต่ำสุดที่เห็น)
+        self.last_frame_ts = 0.0  # timestamp (server timeline) ของเฟรมล่าสุด
+        self.recorder = None  # SessionRecorder เมื่อเปิดบันทึก
+        self.counting_engine = "threshold"  # "threshold" (เดิม) หรือ "streaming"
+        self.rep_detectors = {}  # pose -> RepDetector (engine "streaming")
+        self.landmark_filter = None  # LandmarkFilter ของท่าที่เลือก
+        self.auto_detect = False  # ยังไม่เลือกท่า -> เลือกให้อัตโนมัติจากการโหวต
+        self.pose_recognizer = None  # PoseRecognizer เมื่อเปิด auto-detect
+        self.last_results = None  # ผล inference ล่าสุด (ใช้ซ้ำกับเฟรมซ้ำ)
+        self.last_fingerprint = None  # fingerprint ของเฟรมที่ได้ last_results (เฟรมที่ทิ้ง/decode ไม่ได้ไม่นับ)
+        self.last_phash = None  # dHash ของภาพล่าสุด (near-duplicate)
+        self.duplicates_skipped = 0  # เฟรมซ้ำที่ข้าม decode / inference
 
 
 class ClientManager:
-    COOLDOWN = {
-        "Bodyweight Squat": 0.8,
-        "Push-ups": 2,  # ปรับให้เร็วขึ้นเล็กน้อย
-        "Sit-ups": 0.8,
-        "Lunge (Split Squat)": 0.8,
-        "Dead Bug": 1.9,
-        "Russian Twist": 0.5,
-        "Lying Leg Raises": 1,
-    }
+    # threshold / cooldown / sampling ต่อท่าประกาศไว้ใน registry.EXERCISES
+    COOLDOWN = registry.COOLDOWN
+    POSE_THRESHOLDS = registry.POSE_THRESHOLDS
+    SAMPLING = registry.SAMPLING
 
-    POSE_THRESHOLDS = {
-        "Bodyweight Squat": {
-            "high": 0.50, "low": 0.30, "smooth_frames": 2, "count_mode": "peak_to_low"
-        },
-        # ✅ Push-ups: เปลี่ยนเป็น continuous mode
-        "Push-ups": {
-            "high": 0.75, "continuous": True, "use_raw": True
-        },
-        "Sit-ups": {
-            "high": 0.45, "low": 0.28, "smooth_frames": 2, "count_mode": "peak_to_low"
-        },
-        "Lunge (Split Squat)": {
-            "high": 0.35, "low": 0.20, "smooth_frames": 2, "count_mode": "on_peak"
-        },
-        "Plank": {
-            "high": 0.55, "low": 0.35, "smooth_frames": 3, "count_mode": "hold"
-        },
-        "Side Plank": {
-            "high": 0.55, "low": 0.35, "smooth_frames": 3, "count_mode": "hold"
-        },
-        "Dead Bug": {
-            "high": 0.75, "continuous": True, "use_raw": True
-        },
-        "Lying Leg Raises": {
-            "high": 0.75, "continuous": True, "use_raw": True
-        },
-        "Russian Twist": {
-            "high": 0.30, "low": 0.10, "smooth_frames": 1,
-            "count_mode": "direction_twist", "use_raw": True, "angle_tolerance": 0.10
-        },
-    }
+    DEFAULT_THRESHOLD = {"high": 0.45, "low": 0.28}
 
-    DEFAULT_THRESHOLD = {"high": 0.45, "low": 0.28, "smooth_frames": 2}
+    # โปรไฟล์การสุ่มเฟรมตาม count_mode: inference fps, smoothing window และ cooldown ตั้งไปพร้อมกัน
+    # ค่าตั้งต้นของ mode - ท่าที่ต้องต่างออกไปตั้ง fps / smooth_frames / cooldown เองใน registry
+    # - hold: ท่าค้าง เปลี่ยนช้า เช็ค 4 Hz ก็พอ
+    # - direction_twist: บิดเร็ว ต้องใช้ full rate (fps=None)
+    SAMPLING_PROFILES = {
+        "hold": {"fps": 4, "smooth_frames": 2, "cooldown": 0.7},
+        "continuous": {"fps": 12, "smooth_frames": 1, "cooldown": 0.7},
+        "direction_twist": {"fps": None, "smooth_frames": 1, "cooldown": 0.5},
+        "on_peak": {"fps": 15, "smooth_frames": 2, "cooldown": 0.7},
+        "peak_to_low": {"fps": 15, "smooth_frames": 2, "cooldown": 0.7},
+    }
+    # engine "streaming" ไม่ขึ้นกับ fps -> ลด inference rate ได้โดยไม่เสียความแม่นยำ
+    STREAMING_FPS = {
+        "hold": 4,
+        "continuous": 6,
+        "direction_twist": 10,
+        "on_peak": 8,
+        "peak_to_low": 8,
+    }
+    COUNTING_ENGINES = ("threshold", "streaming")
     HOLD_THRESHOLD = 0.55
     HOLD_MIN_DURATION = 0.3
+    HOLD_MAX_GAP = 2.0  # dt สูงสุดต่อเฟรมที่นับเป็นเวลาค้างท่า (กันช่วงหลุด/หยุดส่ง)
+    CLOCK_RESYNC = 10.0  # capture time คลาดจาก offset เกินนี้ -> ถือว่า client เปลี่ยนนาฬิกา
 
     def __init__(self):
         self.clients = {}
@@ -103,9 +110,9 @@ class ClientManager:
             return {"current": 0.0, "best": 0.0}
         return client.hold_times.get(pose, {"current": 0.0, "best": 0.0})
     
-    def register(self, host):
-        """ลงทะเบียน client ใหม่"""
-        cid = f"{host}_{int(time.time() * 1000)}"
+    def register(self, host, cid=None):
+        """ลงทะเบียน client ใหม่ (cid: กำหนดเอง เช่น session ของคนใน group mode)"""
+        cid = cid or f"{host}_{int(time.time() * 1000)}"
         self.clients[cid] = Client(cid)
         return cid
 
@@ -114,6 +121,51 @@ class ClientManager:
         if cid in self.clients:
             del self.clients[cid]
 
+    def count(self):
+        """จำนวน client ที่เชื่อมต่ออยู่"""
+        return len(self.clients)
+
+    def duplicate_stats(self):
+        """เฟรมซ้ำที่ข้ามไปต่อ session (เฉพาะ session ที่มี)"""
+        sessions = {cid: c.duplicates_skipped for cid, c in self.clients.items() if c.duplicates_skipped}
+        return {"total": sum(sessions.values()), "sessions": sessions}
+
+    def accept_frame(self, cid, ts, max_fps=None):
+        """Return True ถ้าเฟรมนี้ควรถูกประมวลผล (ไม่เกิน max_fps)"""
+        client = self.clients.get(cid)
+        if not client:
+            return False
+        if max_fps and ts - client.last_sample_ts < 1.0 / max_fps:
+            return False
+        client.last_sample_ts = ts
+        return True
+
+    def frame_timestamp(self, cid, capture_ts, recv_ts):
+        """
+        แปลง capture timestamp ของ client (ms) เป็นเวลาบน timeline ของ server
+        - offset = recv - capture ที่ต่ำสุด (เฟรมที่ delay น้อยสุด) เฟรมที่ค้างคิวจึงไม่ถูกเลื่อนเวลา
+        - คลาดเกิน CLOCK_RESYNC -> resync offset ใหม่
+        - ไม่ย้อนหลังเด็ดขาด (เฟรมสลับลำดับ -> dt = 0)
+        ไม่มี capture_ts -> ใช้เวลาที่รับ (พฤติกรรมเดิม)
+        """
+        client = self.clients.get(cid)
+        if not client:
+            return recv_ts
+        ts = recv_ts
+        try:
+            capture = float(capture_ts) / 1000.0 if capture_ts is not None else None
+        except (TypeError, ValueError):
+            capture = None
+        if capture is not None:
+            offset = recv_ts - capture
+            if (client.clock_offset is None or offset < client.clock_offset
+                    or offset - client.clock_offset > self.CLOCK_RESYNC):
+                client.clock_offset = offset
+            ts = capture + client.clock_offset
+        ts = max(ts, client.last_frame_ts)
+        client.last_frame_ts = ts
+        return ts
+
     # --- Utility functions for main.py ---
     def get_pose(self, cid):
         client = self.clients.get(cid)
@@ -148,8 +200,75 @@ class ClientManager:
     def _get_thresholds(self, pose):
         return self.POSE_THRESHOLDS.get(pose, self.DEFAULT_THRESHOLD)
 
+    def _count_mode(self, pose):
+        thresholds = self._get_thresholds(pose)
+        if thresholds.get("continuous", False):
+            return "continuous"
+        return thresholds.get("count_mode", "peak_to_low")
+
+    def get_sampling_profile(self, pose, engine="threshold"):
+        """Return sampling profile ของท่า (fps, smooth_frames, cooldown) - ค่าของ count_mode ทับด้วยค่าของท่า"""
+        count_mode = self._count_mode(pose)
+        profile = dict(self.SAMPLING_PROFILES[count_mode])
+        profile.update(self.SAMPLING.get(pose, {}))
+        if engine == "streaming":
+            profile["fps"] = self.STREAMING_FPS[count_mode]
+        return profile
+
+    def set_counting_engine(self, cid, engine):
+        """เลือก engine การนับของ session (ValueError ถ้าไม่รู้จัก)"""
+        if engine not in self.COUNTING_ENGINES:
+            raise ValueError(f"Unknown counting engine: {engine}")
+        client = self.clients.get(cid)
+        if client and client.counting_engine != engine:
+            client.counting_engine = engine
+            client.rep_detectors = {}
+
+    def set_auto_detect(self, cid, enabled, window=3.0, min_score=0.6):
+        """เปิด auto-detect: ล้างท่าที่เลือกไว้แล้วเริ่มโหวตใหม่ / ปิด: รอ select_pose ตามเดิม"""
+        client = self.clients.get(cid)
+        if not client:
+            return
+        client.auto_detect = enabled
+        if enabled:
+            client.selected_pose = None
+            client.pose_recognizer = PoseRecognizer(window, min_score)
+        else:
+            client.pose_recognizer = None
+
+    def recognize_pose(self, cid, ts, landmarks):
+        """
+        auto-detect: ให้คะแนนทุกท่าจาก landmark ชุดเดียวแล้วโหวต
+        โหวตชนะ -> set_selected_pose ให้ session และคืนค่าชื่อท่า (ยังไม่ชัด -> None)
+        """
+        client = self.clients.get(cid)
+        if not client or not client.auto_detect or client.selected_pose:
+            return None
+        pose = client.pose_recognizer.update(ts, score_all(landmarks))
+        if pose:
+            self.set_selected_pose(cid, pose)
+            client.pose_recognizer.reset()
+        return pose
+
+    def _get_detector(self, client, pose):
+        detector = client.rep_detectors.get(pose)
+        if detector is None:
+            thresholds = self._get_thresholds(pose)
+            count_mode = self._count_mode(pose)
+            detector = RepDetector(
+                count_mode,
+                self.HOLD_THRESHOLD if count_mode == "hold" else thresholds.get("high", 0.5),
+                thresholds.get("low", 0.3),
+                tolerance=thresholds.get("angle_tolerance", 0.0),
+                period=self.get_sampling_profile(pose)["cooldown"],
+                hold_min=self.HOLD_MIN_DURATION,
+                max_gap=self.HOLD_MAX_GAP
+            )
+            client.rep_detectors[pose] = detector
+        return detector
+
     def _check_cooldown(self, client, pose, ts):
-        cooldown = self.COOLDOWN.get(pose, 0.7)
+        cooldown = self.get_sampling_profile(pose)["cooldown"]
         last_time = client.last_rep_time.get(pose, 0)
         return (ts - last_time) >= cooldown
 
@@ -157,7 +276,7 @@ class ClientManager:
         thresholds = self._get_thresholds(pose)
         if thresholds.get("use_raw", False):
             return confidence
-        max_frames = thresholds.get("smooth_frames", 2)
+        max_frames = self.get_sampling_profile(pose)["smooth_frames"]
         if pose not in client.confidence_history:
             client.confidence_history[pose] = []
         hist = client.confidence_history[pose]
@@ -172,6 +291,10 @@ class ClientManager:
         if not client or not pose:
             return
 
+        if client.counting_engine == "streaming":
+            self._update_streaming(client, pose, confidence, ts, full_body_visible)
+            return
+
         thresholds = self._get_thresholds(pose)
         high = thresholds.get("high", 0.5)
         low = thresholds.get("low", 0.3)
@@ -183,7 +306,7 @@ class ClientManager:
         # (1) Hold mode
         if count_mode == "hold":
             hold = client.hold_times.get(pose, {"current": 0.0, "best": 0.0})
-            dt = ts - client.last_ts
+            dt = min(max(0.0, ts - client.last_ts), self.HOLD_MAX_GAP)
             if full_body_visible and conf > self.HOLD_THRESHOLD:
                 hold["current"] += dt
             else:
@@ -248,6 +371,23 @@ class ClientManager:
         client.last_confidence[pose] = conf
         client.last_ts = ts
 
+    def _update_streaming(self, client, pose, confidence, ts, full_body_visible):
+        """engine "streaming": ใช้ raw confidence + timestamp ผ่าน RepDetector ของท่า"""
+        detector = self._get_detector(client, pose)
+        reps = detector.update(ts, confidence, full_body_visible)
+        if reps:
+            client.reps_counts[pose] = client.reps_counts.get(pose, 0) + reps
+            client.last_rep_time[pose] = ts
+            print(f"[{pose}] 📈 STREAMING REP #{client.reps_counts[pose]} ({confidence:.2f})")
+        if detector.count_mode == "hold":
+            hold = client.hold_times.get(pose, {"current": 0.0, "best": 0.0})
+            hold["current"] = detector.hold_current
+            hold["best"] = max(hold["best"], detector.hold_best)
+            client.hold_times[pose] = hold
+        client.pose_states[pose] = detector.state
+        client.last_confidence[pose] = confidence
+        client.last_ts = ts
+
     def get_state_debug(self, cid, pose):
         c = self.clients.get(cid)
         if not c:
@@ -0,0 +1,104 @@
+# modules/config.py
+import os
+import tempfile
+
+
+def _env_int(name, default):
+    value = os.getenv(name)
+    return int(value) if value not in (None, "") else default
+
+
+def _env_float(name, default):
+    value = os.getenv(name)
+    return float(value) if value not in (None, "") else default
+
+
+class Config:
+    """การตั้งค่าระบบ (override ได้ผ่าน environment variables)"""
+    MODEL_COMPLEXITY = _env_int("POSE_MODEL_COMPLEXITY", 1)
+
+    # --- Pose backend ---
+    POSE_BACKEND = os.getenv("POSE_BACKEND", "solutions")  # solutions = mp.solutions.pose | tasks = PoseLandmarker LIVE_STREAM
+    TASKS_MODEL_DIR = os.getenv("POSE_TASKS_MODEL_DIR", "models")  # pose_landmarker_{lite,full,heavy}.task
+    TASKS_TIMEOUT = _env_float("POSE_TASKS_TIMEOUT", 1.0)  # วินาทีที่รอ callback ก่อนถือว่าเฟรมหาย
+
+    # --- Overload controller ---
+    INFERENCE_WORKERS = _env_int("POSE_INFERENCE_WORKERS", 1)
+    LOAD_WINDOW = _env_float("POSE_LOAD_WINDOW", 5.0)
+    LOAD_HIGH_WATERMARK = _env_float("POSE_LOAD_HIGH", 0.85)
+    LOAD_LOW_WATERMARK = _env_float("POSE_LOAD_LOW", 0.60)
+    LOAD_STEP_DOWN_AFTER = _env_float("POSE_LOAD_STEP_DOWN_AFTER", 1.0)
+    LOAD_STEP_UP_AFTER = _env_float("POSE_LOAD_STEP_UP_AFTER", 5.0)
+
+    # --- Threads / CPU affinity (pin ได้เฉพาะ Linux, หาค่าที่เหมาะด้วย benchmark_threads.py) ---
+    CV2_THREADS = _env_int("POSE_CV2_THREADS", 1)  # cv2.setNumThreads (-1 = default ของ OpenCV)
+    INFERENCE_CPUS = os.getenv("POSE_INFERENCE_CPUS", "")  # core ของ inference workers เช่น "0-5" (ว่าง = ทุก core ยกเว้น SERVER_CPUS)
+    CPUS_PER_WORKER = _env_int("POSE_CPUS_PER_WORKER", 0)  # core ต่อ worker (0 + ไม่ระบุ INFERENCE_CPUS = ไม่ pin)
+    SERVER_CPUS = os.getenv("POSE_SERVER_CPUS", "")  # event loop + decode pool (ว่าง = ไม่ pin)
+    VIDEO_JOB_CPUS = os.getenv("POSE_VIDEO_JOB_CPUS", "")  # process pool ของ video jobs (ว่าง = ทุก core ยกเว้น SERVER_CPUS)
+
+    # --- Inference scheduler ---
+    SESSION_MAX_INFERENCE_FPS = _env_float("POSE_SESSION_MAX_INFERENCE_FPS", 15.0)
+    PRIORITY_TIERS = os.getenv("POSE_PRIORITY_TIERS", "1") == "1"
+
+    # --- Counting ---
+    COUNTING_ENGINE = os.getenv("POSE_COUNTING_ENGINE", "threshold")  # threshold | streaming
+    LANDMARK_FILTER = os.getenv("POSE_LANDMARK_FILTER", "1") == "1"  # One-Euro ก่อนเข้า detector
+
+    # --- Auto-detect (ไม่ได้ส่ง select_pose -> เลือกท่าจากการโหวต) ---
+    AUTO_DETECT = os.getenv("POSE_AUTO_DETECT", "0") == "1"  # 1 = เปิดทุก session (ปกติเปิดเฉพาะ ?pose=auto)
+    AUTO_DETECT_FPS = _env_float("POSE_AUTO_DETECT_FPS", 5.0)  # inference rate ระหว่างโหวต
+    AUTO_DETECT_WINDOW = _env_float("POSE_AUTO_DETECT_WINDOW", 3.0)  # วินาทีที่ใช้โหวต
+    AUTO_DETECT_MIN_SCORE = _env_float("POSE_AUTO_DETECT_MIN_SCORE", 0.6)
+
+    # --- Presence probe (ยังไม่เลือกท่า / ยังไม่เจอคน) ---
+    PROBE_FPS = _env_float("POSE_PROBE_FPS", 2.0)
+    PROBE_MODEL_COMPLEXITY = _env_int("POSE_PROBE_MODEL_COMPLEXITY", 0)
+    PROBE_MAX_WIDTH = _env_int("POSE_PROBE_MAX_WIDTH", 256)
+
+    # --- Per-connection pipeline ---
+    INBOUND_QUEUE_SIZE = _env_int("POSE_INBOUND_QUEUE_SIZE", 1)  # เฟรมที่รอวิเคราะห์ได้สูงสุด
+    OUTBOUND_MAX_EVENTS = _env_int("POSE_OUTBOUND_MAX_EVENTS", 256)  # event ที่ยังไม่ได้ส่ง (เกิน -> ปิด connection)
+    DECODE_WORKERS = _env_int("POSE_DECODE_WORKERS", 2)  # 0 = decode ใน analyzer (ไม่ overlap)
+    BATCH_MAX_ITEMS = _env_int("POSE_BATCH_MAX_ITEMS", 64)  # รายการสูงสุดต่อ batch message
+    DEDUP = os.getenv("POSE_DEDUP", "1") == "1"  # เฟรม JPEG ที่ bytes ซ้ำเฟรมก่อน -> ใช้ผลล่าสุด ไม่ decode
+    DEDUP_PHASH_DISTANCE = _env_int("POSE_DEDUP_PHASH_DISTANCE", -1)  # dHash ต่างกันไม่เกิน N bit = ภาพเดิม (-1 = ปิด)
+
+    # --- Video stream ingestion (binary H.264/VP8 chunks แทน JPEG ทีละเฟรม, ต้องมี PyAV) ---
+    STREAM_QUEUE_SIZE = _env_int("POSE_STREAM_QUEUE_SIZE", 64)  # chunk ที่รอ decode (เต็ม -> reader รอ, ไม่ทิ้ง)
+    STREAM_DECODE_THREADS = _env_int("POSE_STREAM_DECODE_THREADS", 1)  # thread ของ FFmpeg ต่อ session
+
+    # --- Group mode (/ws/pose?mode=group: หลายคนจากกล้องตัวเดียว) ---
+    GROUP_MAX_PEOPLE = _env_int("POSE_GROUP_MAX_PEOPLE", 6)  # คนสูงสุดต่อ stream
+    GROUP_TRACKER_POOL = _env_int("POSE_GROUP_TRACKER_POOL", 12)  # PoseAnalyzer ที่ยืมให้ track ได้ทั้ง server
+    GROUP_DETECT_INTERVAL = _env_float("POSE_GROUP_DETECT_INTERVAL", 1.0)  # วินาทีต่อรอบ person detector
+    GROUP_DETECT_WIDTH = _env_int("POSE_GROUP_DETECT_WIDTH", 480)  # ย่อภาพก่อน detect
+    GROUP_MAX_AGE = _env_float("POSE_GROUP_MAX_AGE", 1.5)  # ไม่เห็นคนนานเกินนี้ -> ปิด track
+
+    # --- Video jobs (ไฟล์ที่อัปโหลด) ---
+    VIDEO_JOB_WORKERS = _env_int("POSE_VIDEO_JOB_WORKERS", 1)  # process แยกจาก WebSocket
+    VIDEO_UPLOAD_DIR = os.getenv("POSE_VIDEO_UPLOAD_DIR", os.path.join(tempfile.gettempdir(), "pose_uploads"))
+    VIDEO_MAX_UPLOAD_MB = _env_int("POSE_VIDEO_MAX_UPLOAD_MB", 500)
+    VIDEO_MAX_JOBS = _env_int("POSE_VIDEO_MAX_JOBS", 100)  # งานที่เก็บสถานะไว้ใน memory
+    VIDEO_MAX_PENDING = _env_int("POSE_VIDEO_MAX_PENDING", 8)  # งาน queued + running + กำลังอัปโหลด (เกิน -> 503)
+    VIDEO_MAX_DISK_MB = _env_int("POSE_VIDEO_MAX_DISK_MB", 4096)  # ไฟล์อัปโหลดที่รอวิเคราะห์รวมกัน (0 = ไม่จำกัด)
+
+    # --- Session recording (debug การนับ) ---
+    RECORD_DIR = os.getenv("POSE_RECORD_DIR", "")  # ว่าง = ปิดการบันทึก
+    RECORD_ALL = os.getenv("POSE_RECORD_ALL", "0") == "1"  # 0 = เฉพาะ session ที่ขอ (?record=1)
+    RECORD_QUEUE_SIZE = _env_int("POSE_RECORD_QUEUE_SIZE", 2000)
+
+    # --- Output encoding ---
+    SNAPSHOT_INTERVAL = _env_int("POSE_SNAPSHOT_INTERVAL", 30)  # full snapshot ทุก N state (0 = เฉพาะเมื่อ client ขอ)
+
+    # --- Admission control ---
+    MAX_SESSIONS = _env_int("POSE_MAX_SESSIONS", 0)  # 0 = ประเมินจาก capacity
+    MAX_SESSIONS_PER_IP = _env_int("POSE_MAX_SESSIONS_PER_IP", 4)
+    SESSION_FPS = _env_float("POSE_SESSION_FPS", 15.0)
+    CAPACITY_HEADROOM = _env_float("POSE_CAPACITY_HEADROOM", 0.85)
+    COLD_START_SESSIONS = _env_int("POSE_COLD_START_SESSIONS", 4)  # capacity ก่อนมีเวลา inference ให้ประเมิน
+    ADMISSION_QUEUE_TIMEOUT = _env_float("POSE_ADMISSION_QUEUE_TIMEOUT", 0.0)
+    RETRY_AFTER = _env_int("POSE_RETRY_AFTER", 5)
+
+
+config = Config()
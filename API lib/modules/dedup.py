@@ -0,0 +1,28 @@
+# modules/dedup.py
+# ตรวจเฟรมซ้ำ (SDK บางตัวส่งภาพเดิมซ้ำตอนกล้องค้าง) -> ไม่ต้อง decode / inference ใหม่
+# - frame_fingerprint: hash ของ payload ที่ encode แล้ว (bytes เดียวกันเป๊ะ) เช็คก่อน decode
+# - dhash: perceptual hash 64 bit ของภาพที่ decode แล้ว (ภาพเดิมที่ถูก encode ใหม่) เช็คก่อน inference
+import cv2
+import numpy as np
+
+# เฟรมซ้ำที่ข้าม decode มาแล้ว: analyzer ใช้ผล inference ล่าสุดของ session แทน
+REUSE_LAST = object()
+
+
+def frame_fingerprint(payload):
+    """hash ของ base64 payload (str cache hash ไว้ในตัว - เรียกซ้ำไม่คำนวณใหม่)"""
+    return (len(payload), hash(payload))
+
+
+def dhash(frame, size=8):
+    """difference hash: ย่อเป็น gray (size+1) x size แล้วเทียบ pixel ติดกันในแนวนอน -> int size*size bit"""
+    # เลือก pixel แบบ stride ก่อน (view ไม่ copy) ให้เหลือกว้าง ~16 เท่าของ hash แล้วค่อยเฉลี่ย: เร็วกว่าย่อทั้งภาพ ~20 เท่า
+    step = max(1, frame.shape[1] // (16 * (size + 1)))
+    small = cv2.resize(frame[::step, ::step], (size + 1, size), interpolation=cv2.INTER_AREA)
+    gray = cv2.cvtColor(small, cv2.COLOR_BGR2GRAY) if small.ndim == 3 else small
+    bits = np.packbits((gray[:, 1:] > gray[:, :-1]).ravel())
+    return int.from_bytes(bits.tobytes(), "big")
+
+
+def hamming(a, b):
+    return bin(a ^ b).count("1")
@@ -1,48 +1,16 @@
 # modules/detectors.py - IMPROVED VERSION
+# detector รับ Features (modules/features.py) ของท่าตัวเอง: points[ชื่อ] = (x, y), angles[ชื่อ] = องศา
+# landmark / มุมที่แต่ละตัวใช้ประกาศไว้ใน registry.EXERCISES
 import numpy as np
-from .utils import landmark_xy, angle, check_visibility
 
-def _get(lm, mp, name):
-    """Helper: return lm[index] where index is mp.PoseLandmark.<name>.value"""
-    return lm[getattr(mp.PoseLandmark, name).value]
-
-def _check_landmarks_visible(lm, mp, landmark_names, min_visibility=0.5):
-    """ตรวจสอบว่า landmarks ที่ระบุมองเห็นได้หรือไม่"""
-    visible_count = 0
-    for name in landmark_names:
-        try:
-            landmark = _get(lm, mp, name)
-            if check_visibility(landmark, min_visibility):
-                visible_count += 1
-        except Exception:
-            pass
-    
-    required_ratio = 0.7
-    return visible_count >= len(landmark_names) * required_ratio
-
-def detect_squat(lm, mp):
+def detect_squat(f):
     """Squat Detection"""
-    required = ["RIGHT_HIP", "RIGHT_KNEE", "RIGHT_ANKLE", 
-                "LEFT_HIP", "LEFT_KNEE", "LEFT_ANKLE",
-                "RIGHT_SHOULDER", "LEFT_SHOULDER"]
-    
-    if not _check_landmarks_visible(lm, mp, required, 0.4):
-        return 0.0
-    
-    try:
-        R_hip = landmark_xy(_get(lm, mp, "RIGHT_HIP"))
-        R_knee = landmark_xy(_get(lm, mp, "RIGHT_KNEE"))
-        R_ankle = landmark_xy(_get(lm, mp, "RIGHT_ANKLE"))
-        L_hip = landmark_xy(_get(lm, mp, "LEFT_HIP"))
-        L_knee = landmark_xy(_get(lm, mp, "LEFT_KNEE"))
-        L_ankle = landmark_xy(_get(lm, mp, "LEFT_ANKLE"))
-        R_sh = landmark_xy(_get(lm, mp, "RIGHT_SHOULDER"))
-        L_sh = landmark_xy(_get(lm, mp, "LEFT_SHOULDER"))
-    except Exception:
-        return 0.0
+    p, a = f.points, f.angles
+    R_hip, L_hip = p["RIGHT_HIP"], p["LEFT_HIP"]
+    R_sh, L_sh = p["RIGHT_SHOULDER"], p["LEFT_SHOULDER"]
 
-    R_knee_angle = angle(R_hip, R_knee, R_ankle)
-    L_knee_angle = angle(L_hip, L_knee, L_ankle)
+    R_knee_angle = a["right_knee"]
+    L_knee_angle = a["left_knee"]
     avg_knee_angle = (R_knee_angle + L_knee_angle) / 2
     
     if 70 <= avg_knee_angle <= 100:
@@ -54,8 +22,8 @@ def detect_squat(lm, mp):
     else:
         knee_score = np.interp(avg_knee_angle, [50, 70], [0.5, 1.0])
     
-    R_torso_angle = angle(R_sh, R_hip, R_knee)
-    L_torso_angle = angle(L_sh, L_hip, L_knee)
+    R_torso_angle = a["right_torso"]
+    L_torso_angle = a["left_torso"]
     avg_torso_angle = (R_torso_angle + L_torso_angle) / 2
     
     if 30 <= avg_torso_angle <= 90:
@@ -73,31 +41,15 @@ def detect_squat(lm, mp):
     
     return float(np.clip(final_score, 0, 1))
 
-def detect_pushup(lm, mp):
+def detect_pushup(f):
     """Push-up Detection"""
-    required = ["RIGHT_ELBOW", "RIGHT_SHOULDER", "RIGHT_WRIST",
-                "LEFT_ELBOW", "LEFT_SHOULDER", "LEFT_WRIST",
-                "RIGHT_HIP", "LEFT_HIP", "RIGHT_ANKLE", "LEFT_ANKLE"]
-    
-    if not _check_landmarks_visible(lm, mp, required, 0.4):
-        return 0.0
-    
-    try:
-        R_el = landmark_xy(_get(lm, mp, "RIGHT_ELBOW"))
-        R_sh = landmark_xy(_get(lm, mp, "RIGHT_SHOULDER"))
-        R_wr = landmark_xy(_get(lm, mp, "RIGHT_WRIST"))
-        L_el = landmark_xy(_get(lm, mp, "LEFT_ELBOW"))
-        L_sh = landmark_xy(_get(lm, mp, "LEFT_SHOULDER"))
-        L_wr = landmark_xy(_get(lm, mp, "LEFT_WRIST"))
-        R_hip = landmark_xy(_get(lm, mp, "RIGHT_HIP"))
-        L_hip = landmark_xy(_get(lm, mp, "LEFT_HIP"))
-        R_ankle = landmark_xy(_get(lm, mp, "RIGHT_ANKLE"))
-        L_ankle = landmark_xy(_get(lm, mp, "LEFT_ANKLE"))
-    except Exception:
-        return 0.0
+    p, a = f.points, f.angles
+    R_sh, L_sh = p["RIGHT_SHOULDER"], p["LEFT_SHOULDER"]
+    R_hip, L_hip = p["RIGHT_HIP"], p["LEFT_HIP"]
+    R_ankle, L_ankle = p["RIGHT_ANKLE"], p["LEFT_ANKLE"]
 
-    R_angle = angle(R_sh, R_el, R_wr)
-    L_angle = angle(L_sh, L_el, L_wr)
+    R_angle = a["right_elbow"]
+    L_angle = a["left_elbow"]
     avg_elbow = (R_angle + L_angle) / 2
     
     if avg_elbow < 100:
@@ -117,11 +69,7 @@ def detect_pushup(lm, mp):
     
     straight_score = 1.0 - min(deviation / torso_len * 1.0, 0.3)
     
-    body_angle = angle(
-        ((R_sh[0] + L_sh[0])/2, (R_sh[1] + L_sh[1])/2),
-        ((R_hip[0] + L_hip[0])/2, (R_hip[1] + L_hip[1])/2),
-        ((R_ankle[0] + L_ankle[0])/2, (R_ankle[1] + L_ankle[1])/2)
-    )
+    body_angle = a["body_line"]
     alignment_score = np.interp(body_angle, [140, 180], [0.5, 1.0])
     alignment_score = np.clip(alignment_score, 0, 1)
     
@@ -129,24 +77,12 @@ def detect_pushup(lm, mp):
     
     return float(np.clip(final_score, 0, 1))
 
-def detect_plank(lm, mp):
+def detect_plank(f):
     """Plank Detection"""
-    required = ["RIGHT_SHOULDER", "LEFT_SHOULDER", 
-                "RIGHT_HIP", "LEFT_HIP",
-                "RIGHT_ANKLE", "LEFT_ANKLE"]
-    
-    if not _check_landmarks_visible(lm, mp, required, 0.7):
-        return 0.0
-    
-    try:
-        R_sh = landmark_xy(_get(lm, mp, "RIGHT_SHOULDER"))
-        L_sh = landmark_xy(_get(lm, mp, "LEFT_SHOULDER"))
-        R_hip = landmark_xy(_get(lm, mp, "RIGHT_HIP"))
-        L_hip = landmark_xy(_get(lm, mp, "LEFT_HIP"))
-        R_ankle = landmark_xy(_get(lm, mp, "RIGHT_ANKLE"))
-        L_ankle = landmark_xy(_get(lm, mp, "LEFT_ANKLE"))
-    except Exception:
-        return 0.0
+    p = f.points
+    R_sh, L_sh = p["RIGHT_SHOULDER"], p["LEFT_SHOULDER"]
+    R_hip, L_hip = p["RIGHT_HIP"], p["LEFT_HIP"]
+    R_ankle, L_ankle = p["RIGHT_ANKLE"], p["LEFT_ANKLE"]
 
     sh_y = (R_sh[1] + L_sh[1]) / 2
     hip_y = (R_hip[1] + L_hip[1]) / 2
@@ -168,27 +104,11 @@ def detect_plank(lm, mp):
     
     return float(np.clip(final_score, 0, 1))
 
-def detect_situp(lm, mp):
+def detect_situp(f):
     """Sit-up Detection"""
-    required = ["RIGHT_SHOULDER", "LEFT_SHOULDER", 
-                "RIGHT_HIP", "LEFT_HIP",
-                "RIGHT_KNEE", "LEFT_KNEE"]
-    
-    if not _check_landmarks_visible(lm, mp, required, 0.4):
-        return 0.0
-    
-    try:
-        R_sh = landmark_xy(_get(lm, mp, "RIGHT_SHOULDER"))
-        L_sh = landmark_xy(_get(lm, mp, "LEFT_SHOULDER"))
-        R_hip = landmark_xy(_get(lm, mp, "RIGHT_HIP"))
-        L_hip = landmark_xy(_get(lm, mp, "LEFT_HIP"))
-        R_knee = landmark_xy(_get(lm, mp, "RIGHT_KNEE"))
-        L_knee = landmark_xy(_get(lm, mp, "LEFT_KNEE"))
-    except Exception:
-        return 0.0
-    
-    R_torso_angle = angle(R_sh, R_hip, R_knee)
-    L_torso_angle = angle(L_sh, L_hip, L_knee)
+    a = f.angles
+    R_torso_angle = a["right_torso"]
+    L_torso_angle = a["left_torso"]
     avg_angle = (R_torso_angle + L_torso_angle) / 2
     
     if 40 <= avg_angle <= 70:
@@ -202,30 +122,15 @@ def detect_situp(lm, mp):
     
     return float(np.clip(score, 0, 1))
 
-def detect_lunge(lm, mp):
+def detect_lunge(f):
     """Lunge Detection"""
-    required = ["RIGHT_KNEE", "LEFT_KNEE",
-                "RIGHT_HIP", "LEFT_HIP",
-                "RIGHT_ANKLE", "LEFT_ANKLE",
-                "RIGHT_SHOULDER", "LEFT_SHOULDER"]
-    
-    if not _check_landmarks_visible(lm, mp, required, 0.3):
-        return 0.0
-    
-    try:
-        R_knee = landmark_xy(_get(lm, mp, "RIGHT_KNEE"))
-        L_knee = landmark_xy(_get(lm, mp, "LEFT_KNEE"))
-        R_hip = landmark_xy(_get(lm, mp, "RIGHT_HIP"))
-        L_hip = landmark_xy(_get(lm, mp, "LEFT_HIP"))
-        R_ankle = landmark_xy(_get(lm, mp, "RIGHT_ANKLE"))
-        L_ankle = landmark_xy(_get(lm, mp, "LEFT_ANKLE"))
-        R_sh = landmark_xy(_get(lm, mp, "RIGHT_SHOULDER"))
-        L_sh = landmark_xy(_get(lm, mp, "LEFT_SHOULDER"))
-    except Exception:
-        return 0.0
-    
-    R_knee_angle = angle(R_hip, R_knee, R_ankle)
-    L_knee_angle = angle(L_hip, L_knee, L_ankle)
+    p, a = f.points, f.angles
+    R_knee, L_knee = p["RIGHT_KNEE"], p["LEFT_KNEE"]
+    R_hip, L_hip = p["RIGHT_HIP"], p["LEFT_HIP"]
+    R_sh, L_sh = p["RIGHT_SHOULDER"], p["LEFT_SHOULDER"]
+
+    R_knee_angle = a["right_knee"]
+    L_knee_angle = a["left_knee"]
     
     if R_knee_angle < L_knee_angle:
         front_angle = R_knee_angle
@@ -284,36 +189,16 @@ def detect_lunge(lm, mp):
     
     return float(np.clip(final_score, 0, 1))
 
-def detect_dead_bug(lm, mp):
+def detect_dead_bug(f):
     """Dead Bug Detection"""
-    required = ["LEFT_WRIST", "RIGHT_WRIST",
-                "LEFT_ELBOW", "RIGHT_ELBOW",
-                "LEFT_ANKLE", "RIGHT_ANKLE",
-                "LEFT_KNEE", "RIGHT_KNEE",
-                "LEFT_SHOULDER", "RIGHT_SHOULDER",
-                "LEFT_HIP", "RIGHT_HIP"]
-    
-    if not _check_landmarks_visible(lm, mp, required, 0.3):
-        return 0.0
-    
-    try:
-        L_wrist = landmark_xy(_get(lm, mp, "LEFT_WRIST"))
-        R_wrist = landmark_xy(_get(lm, mp, "RIGHT_WRIST"))
-        L_elbow = landmark_xy(_get(lm, mp, "LEFT_ELBOW"))
-        R_elbow = landmark_xy(_get(lm, mp, "RIGHT_ELBOW"))
-        L_ankle = landmark_xy(_get(lm, mp, "LEFT_ANKLE"))
-        R_ankle = landmark_xy(_get(lm, mp, "RIGHT_ANKLE"))
-        L_knee = landmark_xy(_get(lm, mp, "LEFT_KNEE"))
-        R_knee = landmark_xy(_get(lm, mp, "RIGHT_KNEE"))
-        L_sh = landmark_xy(_get(lm, mp, "LEFT_SHOULDER"))
-        R_sh = landmark_xy(_get(lm, mp, "RIGHT_SHOULDER"))
-        L_hip = landmark_xy(_get(lm, mp, "LEFT_HIP"))
-        R_hip = landmark_xy(_get(lm, mp, "RIGHT_HIP"))
-    except Exception:
-        return 0.0
-    
-    R_arm_angle = angle(R_sh, R_elbow, R_wrist)
-    L_arm_angle = angle(L_sh, L_elbow, L_wrist)
+    p, a = f.points, f.angles
+    L_wrist, R_wrist = p["LEFT_WRIST"], p["RIGHT_WRIST"]
+    L_ankle, R_ankle = p["LEFT_ANKLE"], p["RIGHT_ANKLE"]
+    L_sh, R_sh = p["LEFT_SHOULDER"], p["RIGHT_SHOULDER"]
+    L_hip, R_hip = p["LEFT_HIP"], p["RIGHT_HIP"]
+
+    R_arm_angle = a["right_elbow"]
+    L_arm_angle = a["left_elbow"]
     avg_arm_angle = (R_arm_angle + L_arm_angle) / 2
     
     if 110 <= avg_arm_angle <= 180:
@@ -323,8 +208,8 @@ def detect_dead_bug(lm, mp):
     else:
         arm_score = 0.7
     
-    R_leg_angle = angle(R_hip, R_knee, R_ankle)
-    L_leg_angle = angle(L_hip, L_knee, L_ankle)
+    R_leg_angle = a["right_knee"]
+    L_leg_angle = a["left_knee"]
     avg_leg_angle = (R_leg_angle + L_leg_angle) / 2
     
     if 110 <= avg_leg_angle <= 180:
@@ -356,21 +241,12 @@ def detect_dead_bug(lm, mp):
     
     return float(np.clip(final_score, 0, 1))
 
-def detect_side_plank(lm, mp):
+def detect_side_plank(f):
     """Side Plank Detection"""
-    required = ["RIGHT_SHOULDER", "RIGHT_HIP", "RIGHT_ANKLE"]
-    
-    if not _check_landmarks_visible(lm, mp, required, 0.7):
-        return 0.0
-    
-    try:
-        sh = landmark_xy(_get(lm, mp, "RIGHT_SHOULDER"))
-        hip = landmark_xy(_get(lm, mp, "RIGHT_HIP"))
-        ankle = landmark_xy(_get(lm, mp, "RIGHT_ANKLE"))
-    except Exception:
-        return 0.0
-    
-    body_angle = angle(sh, hip, ankle)
+    p = f.points
+    sh, hip, ankle = p["RIGHT_SHOULDER"], p["RIGHT_HIP"], p["RIGHT_ANKLE"]
+
+    body_angle = f.angles["right_body"]
     
     angle_score = np.interp(body_angle, [155, 180], [0.6, 1.0])
     angle_score = np.clip(angle_score, 0, 1)
@@ -387,26 +263,16 @@ def detect_side_plank(lm, mp):
     
     return float(np.clip(final_score, 0, 1))
 
-def detect_russian_twist(lm, mp):
+def detect_russian_twist(f):
     """
     ✅ IMPROVED Russian Twist Detection
     - นับ Reps เมื่อบิดตัวไปมา (ซ้าย-ขวา)
     - ตรวจจับการหมุนไหล่ชัดเจน
     - Reset ง่ายเมื่อกลับกลางตัว
     """
-    required = ["LEFT_SHOULDER", "RIGHT_SHOULDER",
-                "LEFT_HIP", "RIGHT_HIP"]
-    
-    if not _check_landmarks_visible(lm, mp, required, 0.4):
-        return 0.0
-    
-    try:
-        L_sh = landmark_xy(_get(lm, mp, "LEFT_SHOULDER"))
-        R_sh = landmark_xy(_get(lm, mp, "RIGHT_SHOULDER"))
-        L_hip = landmark_xy(_get(lm, mp, "LEFT_HIP"))
-        R_hip = landmark_xy(_get(lm, mp, "RIGHT_HIP"))
-    except Exception:
-        return 0.0
+    p = f.points
+    L_sh, R_sh = p["LEFT_SHOULDER"], p["RIGHT_SHOULDER"]
+    L_hip, R_hip = p["LEFT_HIP"], p["RIGHT_HIP"]
     
     # 1. ✅ การหมุนไหล่ (ซ้าย-ขวา) - ตัวชี้วัดหลัก
     shoulder_x_diff = abs(L_sh[0] - R_sh[0])
@@ -442,35 +308,18 @@ def detect_russian_twist(lm, mp):
     
     return float(np.clip(final_score, 0, 1))
 
-def detect_lying_leg_raises(lm, mp):
+def detect_lying_leg_raises(f):
     """
     ✅ IMPROVED Lying Leg Raises Detection
     - นับ Reps เมื่อยกขาสูงสุดแล้ว (มุม 20-80°)
     - ให้ confidence สูงเฉพาะเมื่อขาอยู่ในตำแหน่งที่ถูกต้อง
     """
-    required = ["LEFT_ANKLE", "RIGHT_ANKLE",
-                "LEFT_HIP", "RIGHT_HIP",
-                "LEFT_SHOULDER", "RIGHT_SHOULDER",
-                "LEFT_KNEE", "RIGHT_KNEE"]
-    
-    if not _check_landmarks_visible(lm, mp, required, 0.3):
-        return 0.0
-    
-    try:
-        L_ankle = landmark_xy(_get(lm, mp, "LEFT_ANKLE"))
-        R_ankle = landmark_xy(_get(lm, mp, "RIGHT_ANKLE"))
-        L_hip = landmark_xy(_get(lm, mp, "LEFT_HIP"))
-        R_hip = landmark_xy(_get(lm, mp, "RIGHT_HIP"))
-        L_sh = landmark_xy(_get(lm, mp, "LEFT_SHOULDER"))
-        R_sh = landmark_xy(_get(lm, mp, "RIGHT_SHOULDER"))
-        L_knee = landmark_xy(_get(lm, mp, "LEFT_KNEE"))
-        R_knee = landmark_xy(_get(lm, mp, "RIGHT_KNEE"))
-    except Exception:
-        return 0.0
-    
+    p, a = f.points, f.angles
+    L_ankle, R_ankle = p["LEFT_ANKLE"], p["RIGHT_ANKLE"]
+
     # 1. ✅ มุมสะโพก - ใช้ range กว้างขึ้น
-    R_hip_angle = angle(R_sh, R_hip, R_ankle)
-    L_hip_angle = angle(L_sh, L_hip, L_ankle)
+    R_hip_angle = a["right_body"]
+    L_hip_angle = a["left_body"]
     avg_angle = (R_hip_angle + L_hip_angle) / 2
     
     # ✅ ให้ confidence สูงเมื่อยกขาสูง (20-80°)
@@ -485,8 +334,8 @@ def detect_lying_leg_raises(lm, mp):
         score = np.interp(avg_angle, [110, 140], [0.3, 0.05])
     
     # 2. ความตรงของขา
-    R_leg_straight = angle(R_hip, R_knee, R_ankle)
-    L_leg_straight = angle(L_hip, L_knee, L_ankle)
+    R_leg_straight = a["right_knee"]
+    L_leg_straight = a["left_knee"]
     avg_leg_straight = (R_leg_straight + L_leg_straight) / 2
     
     if avg_leg_straight > 150:
@@ -0,0 +1,122 @@
+# modules/encoding.py
+import json
+
+try:
+    import msgpack
+except ImportError:  # optional dependency
+    msgpack = None
+
+# key ย่อสำหรับโหมด compact / msgpack
+SHORT_KEYS = {
+    "status": "s",
+    "pose": "p",
+    "confidence": "c",
+    "advice": "a",
+    "advice_code": "ac",
+    "advice_params": "ap",
+    "reps": "r",
+    "holds": "h",
+    "state": "st",
+    "last_conf": "lc",
+    "visibility_score": "v",
+    "full_body_visible": "fb",
+    "ready_to_start": "rs",
+    "missing_parts": "m",
+    "person_detected": "pd",
+    "tier": "t",
+    "probe": "pr",
+    "error": "e",
+    "detail": "d",
+    "mode": "md",
+    "events": "ev",
+    "batch": "b",
+    "people": "pp",
+    "track_id": "ti",
+    "box": "bx",
+    "count": "n",
+}
+SEQ_KEY = "_q"
+FULL_KEY = "_f"
+DELETED_KEY = "_x"
+
+_MISSING = object()
+
+
+class ResponseEncoder:
+    """
+    Encoder ต่อ connection ที่ negotiate ได้
+    - json: dict เต็มทุกเฟรม (เหมือนเดิม)
+    - compact: JSON key ย่อ ส่งเฉพาะ field ที่เปลี่ยน + full snapshot เป็นระยะ
+    - msgpack: เหมือน compact แต่ encode เป็น MessagePack (binary frame)
+    """
+    MODES = ("json", "compact", "msgpack")
+
+    def __init__(self, mode="json", snapshot_interval=30):
+        self.mode = "json"
+        self.snapshot_interval = max(0, snapshot_interval)  # 0 = full snapshot เฉพาะเมื่อขอ / เปลี่ยน mode
+        self.seq = 0
+        self._last = None
+        self.set_mode(mode)
+
+    def set_mode(self, mode):
+        if mode not in self.MODES:
+            raise ValueError(f"Unknown output mode: {mode}")
+        if mode == "msgpack" and msgpack is None:
+            raise ValueError("msgpack is not installed on this server")
+        self.mode = mode
+        self.request_snapshot()
+
+    def request_snapshot(self):
+        """บังคับให้ state ถัดไปเป็น full snapshot"""
+        self._last = None
+
+    # ---------------- Encoding ----------------
+    def _shorten(self, message):
+        body = {SHORT_KEYS.get(k, k): v for k, v in message.items()}
+        people = message.get("people")
+        if isinstance(people, dict):
+            # group mode: state ของแต่ละคนย่อ key ด้วย
+            body[SHORT_KEYS["people"]] = {tid: self._shorten(person) for tid, person in people.items()}
+        return body
+
+    def _dump(self, body):
+        if self.mode == "msgpack":
+            return msgpack.packb(body, use_bin_type=True), True
+        return json.dumps(body, separators=(",", ":"), ensure_ascii=False), False
+
+    def encode_message(self, message):
+        """Encode control/event message (ไม่ทำ delta) คืนค่า (payload, is_binary)"""
+        if self.mode == "json":
+            return json.dumps(message, ensure_ascii=False), False
+        return self._dump(self._shorten(message))
+
+    def encode_state(self, response):
+        """Encode per-frame state แบบ delta เทียบกับ state ที่ส่งไปล่าสุด"""
+        if self.mode == "json":
+            return json.dumps(response, ensure_ascii=False), False
+
+        self.seq += 1
+        last = self._last
+        if last is None or (self.snapshot_interval and self.seq % self.snapshot_interval == 0):
+            body = self._shorten(response)
+            body[FULL_KEY] = 1
+        else:
+            body = self._shorten({
+                k: v
+                for k, v in response.items()
+                if last.get(k, _MISSING) != v
+            })
+            deleted = [SHORT_KEYS.get(k, k) for k in last if k not in response]
+            if deleted:
+                body[DELETED_KEY] = deleted
+        body[SEQ_KEY] = self.seq
+        self._last = response
+        return self._dump(body)
+
+    def describe(self):
+        return {
+            "status": "output_mode",
+            "mode": self.mode,
+            "keys": SHORT_KEYS if self.mode != "json" else {},
+            "snapshot_interval": self.snapshot_interval
+        }
@@ -0,0 +1,106 @@
+# modules/features.py
+# ดึงเฉพาะ landmark / มุมที่ท่าหนึ่งใช้ จาก index ที่คำนวณไว้ครั้งเดียว (ไม่แตะจุดที่ไม่ต้องใช้)
+# มุมทั้งหมดของท่าคำนวณใน numpy op ชุดเดียว แทน angle() ทีละมุม
+from collections import namedtuple
+
+import numpy as np
+
+# ลำดับเดียวกับ mediapipe PoseLandmark (index 0..32)
+LANDMARK_NAMES = [
+    "NOSE", "LEFT_EYE_INNER", "LEFT_EYE", "LEFT_EYE_OUTER", "RIGHT_EYE_INNER", "RIGHT_EYE",
+    "RIGHT_EYE_OUTER", "LEFT_EAR", "RIGHT_EAR", "MOUTH_LEFT", "MOUTH_RIGHT",
+    "LEFT_SHOULDER", "RIGHT_SHOULDER", "LEFT_ELBOW", "RIGHT_ELBOW", "LEFT_WRIST", "RIGHT_WRIST",
+    "LEFT_PINKY", "RIGHT_PINKY", "LEFT_INDEX", "RIGHT_INDEX", "LEFT_THUMB", "RIGHT_THUMB",
+    "LEFT_HIP", "RIGHT_HIP", "LEFT_KNEE", "RIGHT_KNEE", "LEFT_ANKLE", "RIGHT_ANKLE",
+    "LEFT_HEEL", "RIGHT_HEEL", "LEFT_FOOT_INDEX", "RIGHT_FOOT_INDEX",
+]
+LANDMARK_INDEX = {name: idx for idx, name in enumerate(LANDMARK_NAMES)}
+
+# จุดกึ่งกลางซ้าย-ขวา (ใช้เป็นจุดของมุมได้เหมือน landmark จริง)
+MIDPOINTS = {
+    "MID_SHOULDER": ("RIGHT_SHOULDER", "LEFT_SHOULDER"),
+    "MID_HIP": ("RIGHT_HIP", "LEFT_HIP"),
+    "MID_ANKLE": ("RIGHT_ANKLE", "LEFT_ANKLE"),
+}
+
+# มุม ABC (องศา) ที่ detector ใช้ได้: ชื่อ -> (A, B, C)
+ANGLES = {
+    "right_knee": ("RIGHT_HIP", "RIGHT_KNEE", "RIGHT_ANKLE"),
+    "left_knee": ("LEFT_HIP", "LEFT_KNEE", "LEFT_ANKLE"),
+    "right_torso": ("RIGHT_SHOULDER", "RIGHT_HIP", "RIGHT_KNEE"),
+    "left_torso": ("LEFT_SHOULDER", "LEFT_HIP", "LEFT_KNEE"),
+    "right_elbow": ("RIGHT_SHOULDER", "RIGHT_ELBOW", "RIGHT_WRIST"),
+    "left_elbow": ("LEFT_SHOULDER", "LEFT_ELBOW", "LEFT_WRIST"),
+    "right_body": ("RIGHT_SHOULDER", "RIGHT_HIP", "RIGHT_ANKLE"),
+    "left_body": ("LEFT_SHOULDER", "LEFT_HIP", "LEFT_ANKLE"),
+    "body_line": ("MID_SHOULDER", "MID_HIP", "MID_ANKLE"),
+}
+
+# points: ชื่อ -> (x, y) / angles: ชื่อ -> องศา (float)
+Features = namedtuple("Features", ["points", "angles"])
+
+
+def batch_angles(a, b, c):
+    """มุม ABC (องศา) ของหลายมุมพร้อมกัน: a, b, c เป็น array (K, 2) - ความยาวแขน ~0 -> 0.0 เหมือน utils.angle"""
+    ba, bc = a - b, c - b
+    norm_ba = np.sqrt((ba * ba).sum(axis=1))
+    norm_bc = np.sqrt((bc * bc).sum(axis=1))
+    valid = (norm_ba >= 1e-6) & (norm_bc >= 1e-6)
+    denom = np.where(valid, norm_ba * norm_bc, 1.0)
+    cosang = np.clip((ba * bc).sum(axis=1) / denom, -1.0, 1.0)
+    return np.where(valid, np.degrees(np.arccos(cosang)), 0.0)
+
+
+class FeatureSet:
+    """
+    ชุด landmark + มุมที่ต้องใช้ (ประกาศครั้งเดียวตอนสร้าง)
+    extract() ดึงแค่ landmark ที่อยู่ในชุดแล้วคำนวณมุมทั้งหมดพร้อมกัน
+    """
+
+    def __init__(self, points=(), angles=()):
+        landmarks = []
+        mids = []
+
+        def add(name):
+            if name in MIDPOINTS:
+                for side in MIDPOINTS[name]:
+                    add(side)
+                if name not in mids:
+                    mids.append(name)
+            elif name not in landmarks:
+                landmarks.append(name)
+
+        for name in points:
+            add(name)
+        for key in angles:
+            for name in ANGLES[key]:
+                add(name)
+
+        self.landmarks = landmarks  # landmark จริงที่ใช้ (ไม่รวม midpoint)
+        self.angle_names = list(angles)
+        self.point_names = landmarks + mids
+        self._idx = [LANDMARK_INDEX[name] for name in landmarks]
+        self.landmark_idx = np.array(self._idx, dtype=np.intp)
+
+        row = {name: i for i, name in enumerate(self.point_names)}
+        self._mid_idx = np.array([[row[MIDPOINTS[m][0]], row[MIDPOINTS[m][1]]] for m in mids],
+                                 dtype=np.intp).reshape(-1, 2)
+        self._angle_idx = np.array([[row[n] for n in ANGLES[key]] for key in angles],
+                                   dtype=np.intp).reshape(-1, 3)
+
+    def extract(self, landmarks):
+        """landmark objects หรือ array (33, 4) -> Features ของชุดนี้"""
+        if isinstance(landmarks, np.ndarray):
+            xy = landmarks[self.landmark_idx, :2].astype(np.float64)
+        else:
+            xy = np.array([(landmarks[i].x, landmarks[i].y) for i in self._idx], dtype=np.float64).reshape(-1, 2)
+        if len(self._mid_idx):
+            xy = np.concatenate([xy, (xy[self._mid_idx[:, 0]] + xy[self._mid_idx[:, 1]]) / 2])
+
+        angles = {}
+        if len(self._angle_idx):
+            idx = self._angle_idx
+            values = batch_angles(xy[idx[:, 0]], xy[idx[:, 1]], xy[idx[:, 2]])
+            angles = dict(zip(self.angle_names, values.tolist()))
+        points = dict(zip(self.point_names, map(tuple, xy.tolist())))
+        return Features(points, angles)
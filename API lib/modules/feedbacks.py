@@ -1,135 +1,218 @@
 # modules/feedbacks.py
+# feedback แต่ละท่าคืนค่าเป็น (message_code, params)
+# ข้อความจริงอยู่ใน MESSAGES -> client ดึง catalogue ครั้งเดียวจาก /messages
+
+MESSAGES_VERSION = 2
+
+MESSAGES = {
+    # --- สถานะทั่วไป ---
+    "status.select_pose": "กรุณาเลือกท่าที่ต้องการออกกำลังกาย",
+    "status.step_back": "!! ถอยออกให้เห็นร่างกายเต็มตัว (ขาด: {missing})",
+    "status.adjust_camera": "!! ปรับมุมกล้องให้เห็นท่า {pose} ชัดเจนขึ้น",
+    "status.enter_frame": "กรุณาเข้ามาในกรอบกล้อง",
+    "status.detecting_pose": "เริ่มออกกำลังกายได้เลย กำลังตรวจจับท่า...",
+
+    # --- Squat ---
+    "squat.perfect": "Perfect! ย่อลงและหลังตรง ๆ",
+    "squat.great": "ดีมาก! รักษาท่านี้ไว้",
+    "squat.good": "ดีแล้ว แต่ลองย่อลงกว่านี้อีกนิด",
+    "squat.deeper": "ย่อเข่าลงอีก ให้สะโพกต่ำกว่าเข่า",
+    "squat.slow": "ลองยืนตรง แล้วค่อย ๆ ย่อลงช้า ๆ",
+    "squat.start": "เข้าท่ายืนตรงก่อน แล้วเริ่มย่อลง",
+
+    # --- Push-ups ---
+    "pushup.perfect": "สุดยอด! ท่าสมบูรณ์แบบ",
+    "pushup.great": "ดีเมาก! รักษาลำตัวให้ตรงเอาไว้",
+    "pushup.good": "ดีแล้ว ลองงอศอกลงกว่านี้อีกหน่อย",
+    "pushup.bend_more": "งอศอกให้มากขึ้น ให้หน้าอกใกล้พื้น",
+    "pushup.keep_straight": "รักษาลำตัวให้ตรงตลอด และงอศอกช้า ๆ",
+    "pushup.start": "เข้าท่าอัพก่อน แขนยืดตรง",
+
+    # --- Plank ---
+    "plank.excellent": "เยี่ยมมาก! ค้างไว้ได้ {hold} วินาที",
+    "plank.good": "ดี! ({hold} วินาที) แต่ลองยกสะโพกขึ้นเล็กน้อย",
+    "plank.align": "ปรับลำตัวให้ตรงเป็นแนวเดียวกัน",
+    "plank.raise_hips": "ยกสะโพกขึ้นให้สูงกว่านี้",
+    "plank.start": "เข้าท่า Plank ศอกแนบพื้น ลำตัวตรง",
+
+    # --- Sit-ups ---
+    "situp.perfect": "Perfect! ทำท่าได้ถูกต้อง",
+    "situp.great": "ดีมาก! ยกตัวขึ้นได้ดี",
+    "situp.curl_more": "ลองงอลำตัวขึ้นอีกหน่อย",
+    "situp.use_abs": "ใช้กล้ามท้องดึงตัวขึ้น",
+    "situp.start": "นอนราบก่อน แล้วค่อยนั่งขึ้นช้า ๆ",
+
+    # --- Lunge ---
+    "lunge.perfect": "สมบูรณ์แบบ! เข่าได้มุม 90° พอดี",
+    "lunge.great": "ดีมาก! รักษาความสมดุล",
+    "lunge.lower": "ลองย่อลงอีกนิด เข่าหน้า 90°",
+    "lunge.longer_step": "ก้าวขาให้ยาวขึ้น แล้วย่อลง",
+    "lunge.start": "ยืนตรง แล้วก้าวขาหน้าออกไป",
+
+    # --- Dead Bug ---
+    "dead_bug.excellent": "เยี่ยม! เหยียดแขนขาได้ดี",
+    "dead_bug.good": "ดี! รักษาท่านี้แล้วสลับข้าง",
+    "dead_bug.extend": "เหยียดแขนขาให้ตรงมากขึ้น",
+    "dead_bug.raise": "นอนราบ ยกแขนขาขึ้น",
+    "dead_bug.start": "นอนหงายก่อน แล้วยกแขนขาขึ้น",
+
+    # --- Side Plank ---
+    "side_plank.perfect": "สุดยอด! ท่าสมบูรณ์ {hold}s",
+    "side_plank.good": "ดี! ({hold}วินาที) ยกสะโพกขึ้นอีกหน่อย",
+    "side_plank.align": "รักษาลำตัวให้ตรงเป็นแนวเดียว",
+    "side_plank.raise_hips": "ยกสะโพกขึ้นให้สูงขึ้น",
+    "side_plank.start": "นอนตะแคง ศอกแนบพื้น ยกตัวขึ้น",
+
+    # --- Russian Twist ---
+    "russian_twist.excellent": "เยี่ยม! บิดลำตัวได้ดี",
+    "russian_twist.good": "ดี! รักษาจังหวะการบิดลำตัวเอาไว้",
+    "russian_twist.lean_more": "โน้มตัวลงไปอีกนิด และบิดให้มากขึ้น",
+    "russian_twist.twist": "นั่งโน้มตัวลงไป แล้วบิดซ้าย-ขวา",
+    "russian_twist.start": "นั่งแล้วโน้มตัวลงไป เตรียมบิดลำตัว",
+
+    # --- Lying Leg Raises ---
+    "leg_raises.perfect": "เพอร์เฟ็กต์! ยกขาได้ถูกต้อง",
+    "leg_raises.great": "ดีมาก! ยกขาได้ดี",
+    "leg_raises.higher": "ยกขาให้สูงขึ้นอีก ตั้งฉากกับพื้น",
+    "leg_raises.straight": "รักษาขาให้ตรงและชิดกัน แล้วยกขึ้นช้า ๆ",
+    "leg_raises.start": "นอนราบ ขาชิดกัน เตรียมยกขึ้น",
+}
+
+
+def render_message(code, params=None):
+    """แปลง code + params เป็นข้อความ (ใช้ฝั่ง server เมื่อ code เปลี่ยน)"""
+    template = MESSAGES.get(code)
+    if template is None:
+        return ""
+    try:
+        return template.format(**(params or {}))
+    except (KeyError, IndexError, ValueError):
+        return template
+
+
+def _hold(hold):
+    return {"hold": round(float(hold), 1)}
+
 
 def feedback_squat(conf, hold=0.0):
     """Feedback สำหรับ Squat แบบละเอียด"""
     if conf > 0.90:
-        return "Perfect! ย่อลงและหลังตรง ๆ"
+        return "squat.perfect", {}
     elif conf > 0.75:
-        return "ดีมาก! รักษาท่านี้ไว้"
+        return "squat.great", {}
     elif conf > 0.60:
-        return "ดีแล้ว แต่ลองย่อลงกว่านี้อีกนิด"
+        return "squat.good", {}
     elif conf > 0.40:
-        return "ย่อเข่าลงอีก ให้สะโพกต่ำกว่าเข่า"
+        return "squat.deeper", {}
     elif conf > 0.20:
-        return "ลองยืนตรง แล้วค่อย ๆ ย่อลงช้า ๆ"
+        return "squat.slow", {}
     else:
-        return "เข้าท่ายืนตรงก่อน แล้วเริ่มย่อลง"
+        return "squat.start", {}
 
 def feedback_pushup(conf, hold=0.0):
     """Feedback สำหรับ Push-ups"""
     if conf > 0.90:
-        return "สุดยอด! ท่าสมบูรณ์แบบ"
+        return "pushup.perfect", {}
     elif conf > 0.75:
-        return "ดีเมาก! รักษาลำตัวให้ตรงเอาไว้"
+        return "pushup.great", {}
     elif conf > 0.60:
-        return "ดีแล้ว ลองงอศอกลงกว่านี้อีกหน่อย"
+        return "pushup.good", {}
     elif conf > 0.40:
-        return "งอศอกให้มากขึ้น ให้หน้าอกใกล้พื้น"
+        return "pushup.bend_more", {}
     elif conf > 0.20:
-        return "รักษาลำตัวให้ตรงตลอด และงอศอกช้า ๆ"
+        return "pushup.keep_straight", {}
     else:
-        return "เข้าท่าอัพก่อน แขนยืดตรง"
+        return "pushup.start", {}
 
 def feedback_plank(conf, hold=0.0):
     """Feedback สำหรับ Plank พร้อมเวลา"""
     if conf > 0.85:
-        return f"เยี่ยมมาก! ค้างไว้ได้ {hold:.1f} วินาที"
+        return "plank.excellent", _hold(hold)
     elif conf > 0.70:
-        return f"ดี! ({hold:.1f} วินาที) แต่ลองยกสะโพกขึ้นเล็กน้อย"
+        return "plank.good", _hold(hold)
     elif conf > 0.50:
-        return "ปรับลำตัวให้ตรงเป็นแนวเดียวกัน"
+        return "plank.align", {}
     elif conf > 0.30:
-        return "ยกสะโพกขึ้นให้สูงกว่านี้"
+        return "plank.raise_hips", {}
     else:
-        return "เข้าท่า Plank ศอกแนบพื้น ลำตัวตรง"
+        return "plank.start", {}
 
 def feedback_situp(conf, hold=0.0):
     """Feedback สำหรับ Sit-ups"""
     if conf > 0.85:
-        return "Perfect! ทำท่าได้ถูกต้อง"
+        return "situp.perfect", {}
     elif conf > 0.70:
-        return "ดีมาก! ยกตัวขึ้นได้ดี"
+        return "situp.great", {}
     elif conf > 0.50:
-        return "ลองงอลำตัวขึ้นอีกหน่อย"
+        return "situp.curl_more", {}
     elif conf > 0.30:
-        return "ใช้กล้ามท้องดึงตัวขึ้น"
+        return "situp.use_abs", {}
     else:
-        return "นอนราบก่อน แล้วค่อยนั่งขึ้นช้า ๆ"
-"""
+        return "situp.start", {}
+
 def feedback_lunge(conf, hold=0.0):
-    Feedback สำหรับ Lunge
+    """Feedback สำหรับ Lunge"""
     if conf > 0.85:
-        return "สมบูรณ์แบบ! เข่าได้มุม 90° พอดี"
+        return "lunge.perfect", {}
     elif conf > 0.70:
-        return "ดีมาก! รักษาความสมดุล"
+        return "lunge.great", {}
     elif conf > 0.50:
-        return "ลองย่อลงอีกนิด เข่าหน้า 90°"
+        return "lunge.lower", {}
     elif conf > 0.30:
-        return "ก้าวขาให้ยาวขึ้น แล้วย่อลง"
+        return "lunge.longer_step", {}
     else:
-        return "ยืนตรง แล้วก้าวขาหน้าออกไป"
-"""
+        return "lunge.start", {}
+
 def feedback_dead_bug(conf, hold=0.0):
     """Feedback สำหรับ Dead Bug"""
     if conf > 0.85:
-        return "เยี่ยม! เหยียดแขนขาได้ดี"
+        return "dead_bug.excellent", {}
     elif conf > 0.70:
-        return "ดี! รักษาท่านี้แล้วสลับข้าง"
+        return "dead_bug.good", {}
     elif conf > 0.50:
-        return "เหยียดแขนขาให้ตรงมากขึ้น"
+        return "dead_bug.extend", {}
     elif conf > 0.30:
-        return "นอนราบ ยกแขนขาขึ้น"
+        return "dead_bug.raise", {}
     else:
-        return "นอนหงายก่อน แล้วยกแขนขาขึ้น"
+        return "dead_bug.start", {}
 
 def feedback_side_plank(conf, hold=0.0):
     """Feedback สำหรับ Side Plank"""
     if conf > 0.85:
-        return f"สุดยอด! ท่าสมบูรณ์ {hold:.1f}s"
+        return "side_plank.perfect", _hold(hold)
     elif conf > 0.70:
-        return f"ดี! ({hold:.1f}วินาที) ยกสะโพกขึ้นอีกหน่อย"
+        return "side_plank.good", _hold(hold)
     elif conf > 0.50:
-        return "รักษาลำตัวให้ตรงเป็นแนวเดียว"
+        return "side_plank.align", {}
     elif conf > 0.30:
-        return "ยกสะโพกขึ้นให้สูงขึ้น"
+        return "side_plank.raise_hips", {}
     else:
-        return "นอนตะแคง ศอกแนบพื้น ยกตัวขึ้น"
+        return "side_plank.start", {}
 
 def feedback_russian_twist(conf, hold=0.0):
     """Feedback สำหรับ Russian Twist"""
     if conf > 0.85:
-        return "เยี่ยม! บิดลำตัวได้ดี"
+        return "russian_twist.excellent", {}
     elif conf > 0.70:
-        return "ดี! รักษาจังหวะการบิดลำตัวเอาไว้"
+        return "russian_twist.good", {}
     elif conf > 0.50:
-        return "โน้มตัวลงไปอีกนิด และบิดให้มากขึ้น"
+        return "russian_twist.lean_more", {}
     elif conf > 0.30:
-        return "นั่งโน้มตัวลงไป แล้วบิดซ้าย-ขวา"
+        return "russian_twist.twist", {}
     else:
-        return "นั่งแล้วโน้มตัวลงไป เตรียมบิดลำตัว"
+        return "russian_twist.start", {}
 
 def feedback_lying_leg_raises(conf, hold=0.0):
     """Feedback สำหรับ Lying Leg Raises"""
     if conf > 0.85:
-        return "เพอร์เฟ็กต์! ยกขาได้ถูกต้อง"
+        return "leg_raises.perfect", {}
     elif conf > 0.70:
-        return "ดีมาก! ยกขาได้ดี"
+        return "leg_raises.great", {}
     elif conf > 0.50:
-        return "ยกขาให้สูงขึ้นอีก ตั้งฉากกับพื้น"
+        return "leg_raises.higher", {}
     elif conf > 0.30:
-        return "รักษาขาให้ตรงและชิดกัน แล้วยกขึ้นช้า ๆ"
+        return "leg_raises.straight", {}
     else:
-        return "นอนราบ ขาชิดกัน เตรียมยกขึ้น"
-
-# Dictionary สำหรับเรียกใช้ง่าย
-FEEDBACKS = {
-    "Bodyweight Squat": feedback_squat,
-    "Push-ups": feedback_pushup,
-    "Plank": feedback_plank,
-    "Sit-ups": feedback_situp,
-    "Lunge (Split Squat)": feedback_lunge,
-    "Dead Bug": feedback_dead_bug,
-    "Side Plank": feedback_side_plank,
-    "Russian Twist": feedback_russian_twist,
-    "Lying Leg Raises": feedback_lying_leg_raises,
-}
\ No newline at end of file
+        return "leg_raises.start", {}
+
+# ท่า -> feedback function ผูกไว้ใน registry.EXERCISES (registry.FEEDBACKS)
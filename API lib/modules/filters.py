@@ -0,0 +1,76 @@
+# modules/filters.py
+# กรอง landmark ต่อ session ตามเวลาของเฟรม (One-Euro) ก่อนส่งเข้า detector
+# smooth_landmarks ของ mediapipe ช่วยได้เฉพาะเมื่อทุกเฟรมผ่าน tracker เดิม
+# แต่เราข้ามเฟรม/สลับ tracker/รับ landmark จาก client -> ต้องกรองเองแบบรู้ dt
+import math
+
+import numpy as np
+
+from .registry import EXERCISES
+
+# min_cutoff (Hz): ยิ่งต่ำยิ่งนิ่งตอนอยู่กับที่ / beta: ยิ่งสูงยิ่งตามการเคลื่อนไหวเร็วทัน
+# profile เฉพาะท่าประกาศไว้ใน registry (Exercise.filter_profile)
+FILTER_PROFILES = {
+    "default": {"min_cutoff": 1.0, "beta": 5.0, "d_cutoff": 1.0},
+    **{name: ex.filter_profile for name, ex in EXERCISES.items() if ex.filter_profile}
+}
+
+
+def _alpha(cutoff, dt):
+    tau = 1.0 / (2.0 * math.pi * cutoff)
+    return 1.0 / (1.0 + tau / dt)
+
+
+class OneEuroFilter:
+    """One-Euro filter แบบ vectorized: กรองทุกค่าใน array พร้อมกัน, dt มาจาก timestamp จริง"""
+
+    def __init__(self, min_cutoff=1.0, beta=0.0, d_cutoff=1.0, max_gap=1.0):
+        self.min_cutoff = min_cutoff
+        self.beta = beta
+        self.d_cutoff = d_cutoff
+        self.max_gap = max_gap  # ช่องว่างนานกว่านี้ -> เริ่มใหม่ (ไม่ดึงค่าเก่ามาปน)
+        self.reset()
+
+    def reset(self):
+        self.x_prev = None
+        self.dx_prev = None
+        self.t_prev = None
+
+    def __call__(self, t, x):
+        if self.t_prev is None or t - self.t_prev > self.max_gap:
+            self.x_prev = x.copy()
+            self.dx_prev = np.zeros_like(x)
+            self.t_prev = t
+            return x
+        dt = t - self.t_prev
+        if dt <= 0:
+            return self.x_prev  # เฟรมซ้ำเวลาเดิม
+
+        a_d = _alpha(self.d_cutoff, dt)
+        dx = (x - self.x_prev) / dt
+        dx_hat = a_d * dx + (1.0 - a_d) * self.dx_prev
+        cutoff = self.min_cutoff + self.beta * np.abs(dx_hat)
+        a = 1.0 / (1.0 + 1.0 / (2.0 * math.pi * cutoff * dt))
+        x_hat = a * x + (1.0 - a) * self.x_prev
+
+        self.x_prev = x_hat
+        self.dx_prev = dx_hat
+        self.t_prev = t
+        return x_hat
+
+
+class LandmarkFilter:
+    """กรองพิกัด x, y, z ของ landmark (33, 4) ตาม profile ของท่า - visibility ไม่กรอง (gate ต้องตอบสนองทันที)"""
+
+    def __init__(self, pose=None, max_gap=1.0):
+        self.pose = pose
+        profile = FILTER_PROFILES.get(pose, FILTER_PROFILES["default"])
+        self._filter = OneEuroFilter(max_gap=max_gap, **profile)
+
+    def __call__(self, t, landmarks):
+        out = landmarks.copy()
+        out[:, :3] = self._filter(t, landmarks[:, :3])
+        return out
+
+    def reset(self):
+        self._filter.reset()
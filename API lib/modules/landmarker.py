@@ -0,0 +1,127 @@
+# modules/landmarker.py
+# Backend ทางเลือกของ PoseAnalyzer: MediaPipe Tasks PoseLandmarker โหมด LIVE_STREAM
+# - detect_async(image, timestamp_ms) คืนทันที ผลกลับมาทาง result_callback (thread ของ MediaPipe)
+# - submit() คืนค่า concurrent Future -> scheduler รอผลแบบ async ไม่ถือ inference thread ระหว่าง graph รัน
+# - process_frame() (รอผลแบบ sync) ยังใช้ได้ -> ใช้แทน PoseAnalyzer เดิมได้ทุกที่
+# ต้องมีไฟล์ model pose_landmarker_{lite,full,heavy}.task (model_complexity 0/1/2) ใน model_dir
+import os
+import threading
+import time
+from concurrent.futures import Future
+from concurrent.futures import TimeoutError as FutureTimeout
+from functools import partial
+
+from .pose_analyzer import PoseAnalyzer
+from .utils import Landmark, LandmarkList, PoseResult
+
+try:
+    import mediapipe as mp
+    from mediapipe.tasks.python import vision
+except ImportError:  # optional dependency (mediapipe รุ่นที่มี Tasks API)
+    mp = vision = None
+
+MODEL_FILES = {0: "pose_landmarker_lite.task", 1: "pose_landmarker_full.task", 2: "pose_landmarker_heavy.task"}
+
+
+def _resolve(future, value):
+    if future.set_running_or_notify_cancel():  # False = ผู้รอ timeout/cancel ไปแล้ว
+        future.set_result(value)
+
+
+class TasksPoseAnalyzer(PoseAnalyzer):
+    """
+    PoseAnalyzer ที่ใช้ PoseLandmarker (LIVE_STREAM) แทน mp.solutions.pose.Pose
+    - landmarker หนึ่งตัวต่อ model complexity (เหมือน tracker เดิม), timestamp เพิ่มขึ้นเสมอ
+    - LIVE_STREAM ทิ้งเฟรมเองเมื่อ graph ยังไม่ว่าง: ผลมาตามลำดับ timestamp
+      เฟรมก่อนหน้าที่ยังไม่ได้ callback จึงได้ผล None (เหมือนเฟรมที่ถูกแทนที่ในคิว scheduler)
+    """
+    LIVE_STREAM = True
+
+    def __init__(self, model_dir, model_complexity=1, timeout=1.0):
+        if vision is None:
+            raise ValueError("POSE_BACKEND=tasks requires mediapipe with the Tasks API")
+        self.model_dir = model_dir
+        self.timeout = timeout
+        self._lock = threading.Lock()
+        self._pending = {}  # timestamp_ms -> (model_complexity, Future)
+        self._last_ts = 0
+        self.dropped = 0
+        super().__init__(None, model_complexity=model_complexity)
+
+    def _get_tracker(self, model_complexity):
+        tracker = self._trackers.get(model_complexity)
+        if tracker is None:
+            path = os.path.join(self.model_dir, MODEL_FILES.get(model_complexity, MODEL_FILES[1]))
+            options = vision.PoseLandmarkerOptions(
+                base_options=mp.tasks.BaseOptions(model_asset_path=path),
+                running_mode=vision.RunningMode.LIVE_STREAM,
+                num_poses=1,
+                min_pose_detection_confidence=0.5,
+                min_pose_presence_confidence=0.5,
+                min_tracking_confidence=0.5,
+                output_segmentation_masks=False,
+                result_callback=partial(self._on_result, model_complexity)
+            )
+            tracker = vision.PoseLandmarker.create_from_options(options)
+            self._trackers[model_complexity] = tracker
+        return tracker
+
+    def reset(self):
+        super().reset()  # landmarker ไม่มี reset -> close แล้วสร้างใหม่
+        with self._lock:
+            waiting = list(self._pending.values())
+            self._pending.clear()
+        for _, future in waiting:
+            _resolve(future, None)
+
+    # ---------------- Inference ----------------
+    def submit(self, frame, model_complexity=None, max_width=None):
+        """ส่งเฟรมเข้า landmarker แล้วคืนทันที: concurrent Future ที่ได้ PoseResult (หรือ None ถ้าเฟรมถูกทิ้ง)"""
+        if model_complexity is None:
+            model_complexity = self.model_complexity
+        rgb = self._prepare(frame, max_width)
+        landmarker = self._get_tracker(model_complexity)
+        future = Future()
+        with self._lock:
+            ts = max(self._last_ts + 1, int(time.monotonic() * 1000))
+            self._last_ts = ts
+            self._pending[ts] = (model_complexity, future)
+        try:
+            landmarker.detect_async(mp.Image(image_format=mp.ImageFormat.SRGB, data=rgb), ts)
+        except Exception:
+            with self._lock:
+                self._pending.pop(ts, None)
+            raise
+        return future
+
+    def process_frame(self, frame, model_complexity=None, max_width=None):
+        future = self.submit(frame, model_complexity, max_width)
+        try:
+            return future.result(timeout=self.timeout)
+        except FutureTimeout:
+            future.cancel()
+            return None
+
+    def _on_result(self, model_complexity, result, image, timestamp_ms):
+        with self._lock:
+            entry = self._pending.pop(timestamp_ms, None)
+            stale = [ts for ts, (mc, _) in self._pending.items() if mc == model_complexity and ts < timestamp_ms]
+            dropped = [self._pending.pop(ts)[1] for ts in stale]
+            self.dropped += len(dropped)
+        for future in dropped:
+            _resolve(future, None)
+        if entry:
+            _resolve(entry[1], self._to_result(result))
+
+    @staticmethod
+    def _to_result(result):
+        """PoseLandmarkerResult -> รูปแบบเดียวกับผลของ mp.solutions.pose (คนแรกคนเดียว)"""
+        if not result.pose_landmarks:
+            return PoseResult(None)
+        return PoseResult(LandmarkList([
+            Landmark(lm.x, lm.y, lm.z, lm.visibility if lm.visibility is not None else 1.0)
+            for lm in result.pose_landmarks[0]
+        ]))
+
+    def stats(self):
+        return {"backend": "tasks", "pending": len(self._pending), "dropped": self.dropped}
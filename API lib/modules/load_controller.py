@@ -0,0 +1,118 @@
+# modules/load_controller.py
+import time
+import threading
+from collections import deque
+
+
+class LoadController:
+    """
+    ควบคุมคุณภาพระดับ node ตาม utilization ของ inference
+    - วัดเวลาที่ใช้ inference จริงในช่วง window ล่าสุด
+    - ถ้าเครื่องอิ่มตัวนานพอ -> ลด tier ลงทีละขั้น (complexity -> resolution -> fps)
+    - ถ้ามี headroom กลับมานานพอ -> เพิ่ม tier กลับขึ้นทีละขั้น
+    """
+    TIERS = [
+        {"name": "full", "model_complexity": None, "max_width": None, "target_fps": 30},
+        {"name": "lite", "model_complexity": 0, "max_width": 640, "target_fps": 30},
+        {"name": "lite_480", "model_complexity": 0, "max_width": 480, "target_fps": 20},
+        {"name": "lite_320", "model_complexity": 0, "max_width": 320, "target_fps": 15},
+        {"name": "survival", "model_complexity": 0, "max_width": 256, "target_fps": 8},
+    ]
+
+    def __init__(self, workers=1, window=5.0, high_watermark=0.85, low_watermark=0.60,
+                 step_down_after=1.0, step_up_after=5.0):
+        self.workers = max(1, workers)
+        self.window = window
+        self.high_watermark = high_watermark
+        self.low_watermark = low_watermark
+        self.step_down_after = step_down_after
+        self.step_up_after = step_up_after
+
+        self.level = 0
+        self._samples = deque()  # (end_ts, duration)
+        self._busy = 0.0
+        self._over_since = None
+        self._under_since = None
+        self._started_at = time.monotonic()
+        self._lock = threading.Lock()
+
+    # ---------------- Measurement ----------------
+    def record(self, duration, now=None):
+        """บันทึกเวลาที่ใช้ inference ของหนึ่งเฟรม (วินาที)"""
+        now = time.monotonic() if now is None else now
+        with self._lock:
+            self._samples.append((now, duration))
+            self._busy += duration
+            self._evict(now)
+        self.update(now)
+
+    def _evict(self, now):
+        cutoff = now - self.window
+        while self._samples and self._samples[0][0] < cutoff:
+            _, duration = self._samples.popleft()
+            self._busy -= duration
+
+    def utilization(self, now=None):
+        """สัดส่วนเวลาที่ worker ทั้งหมดไม่ว่างในช่วง window ล่าสุด (0..1+)"""
+        now = time.monotonic() if now is None else now
+        with self._lock:
+            self._evict(now)
+            span = min(self.window, max(now - self._started_at, 1e-6))
+            return max(0.0, self._busy) / (span * self.workers)
+
+    def inference_rate(self, now=None):
+        """จำนวนเฟรมที่ inference ต่อวินาทีในช่วง window ล่าสุด"""
+        now = time.monotonic() if now is None else now
+        with self._lock:
+            self._evict(now)
+            span = min(self.window, max(now - self._started_at, 1e-6))
+            return len(self._samples) / span
+
+    def mean_inference_time(self):
+        with self._lock:
+            if not self._samples:
+                return 0.0
+            return max(0.0, self._busy) / len(self._samples)
+
+    # ---------------- Control ----------------
+    def update(self, now=None):
+        """ประเมิน utilization แล้วขยับ tier (มี hysteresis กันแกว่ง)"""
+        now = time.monotonic() if now is None else now
+        util = self.utilization(now)
+
+        with self._lock:
+            if util >= self.high_watermark:
+                self._under_since = None
+                if self._over_since is None:
+                    self._over_since = now
+                elif now - self._over_since >= self.step_down_after and self.level < len(self.TIERS) - 1:
+                    self.level += 1
+                    self._over_since = now
+            elif util <= self.low_watermark:
+                self._over_since = None
+                if self._under_since is None:
+                    self._under_since = now
+                elif now - self._under_since >= self.step_up_after and self.level > 0:
+                    self.level -= 1
+                    self._under_since = now
+            else:
+                self._over_since = None
+                self._under_since = None
+            return self.TIERS[self.level]
+
+    def current_tier(self, now=None):
+        return self.update(now)
+
+    def stats(self):
+        tier = self.TIERS[self.level]
+        return {
+            "tier": tier["name"],
+            "level": self.level,
+            "utilization": round(self.utilization(), 3),
+            "inference_fps": round(self.inference_rate(), 2),
+            "mean_inference_ms": round(self.mean_inference_time() * 1000, 2),
+            "workers": self.workers,
+            "model_complexity": tier["model_complexity"],
+            "max_width": tier["max_width"],
+            "target_fps": tier["target_fps"],
+        }
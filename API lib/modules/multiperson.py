@@ -0,0 +1,237 @@
+# modules/multiperson.py
+# Multi-person (group class) จากกล้องตัวเดียว: decode ครั้งเดียว แล้วแยกคนเป็น ROI
+# - PersonDetector: HOG people detector ของ OpenCV (ไม่ต้องมี model เพิ่ม) รันเป็นระยะบนภาพย่อ
+# - ระหว่างรอบ detect: ROI ของแต่ละคนมาจาก landmark ของเฟรมก่อน (detector-then-tracker)
+# - แต่ละ track ยืม PoseAnalyzer จาก TrackerPool (mp_pose.Pose เป็น temporal tracker ต้องตามคนเดียว)
+# HOG ตรวจคนยืน/นั่งได้ดี ท่านอนพื้นอาจไม่เจอจนกว่าจะลุก แต่ track ที่มีอยู่แล้วตามต่อด้วย landmark
+import itertools
+
+import cv2
+import numpy as np
+
+from .utils import Landmark, LandmarkList, PoseResult
+
+
+def box_iou(a, b):
+    """IoU ของกล่อง (x0, y0, x1, y1)"""
+    ix = max(0.0, min(a[2], b[2]) - max(a[0], b[0]))
+    iy = max(0.0, min(a[3], b[3]) - max(a[1], b[1]))
+    inter = ix * iy
+    union = (a[2] - a[0]) * (a[3] - a[1]) + (b[2] - b[0]) * (b[3] - b[1]) - inter
+    return inter / union if union > 0 else 0.0
+
+
+class PersonDetector:
+    """HOG + linear SVM (cv2.HOGDescriptor_getDefaultPeopleDetector) คืนกล่องเป็น pixel ของภาพเต็ม"""
+
+    def __init__(self, max_width=480, min_weight=0.3, nms_iou=0.5):
+        self.max_width = max_width
+        self.min_weight = min_weight
+        self.nms_iou = nms_iou
+        self.hog = cv2.HOGDescriptor()
+        self.hog.setSVMDetector(cv2.HOGDescriptor_getDefaultPeopleDetector())
+
+    def detect(self, frame):
+        scale = min(1.0, self.max_width / frame.shape[1]) if self.max_width else 1.0
+        small = frame if scale >= 1.0 else cv2.resize(frame, None, fx=scale, fy=scale, interpolation=cv2.INTER_AREA)
+        rects, weights = self.hog.detectMultiScale(small, winStride=(8, 8), padding=(8, 8), scale=1.05)
+        candidates = sorted(
+            (
+                (float(w), (x / scale, y / scale, (x + bw) / scale, (y + bh) / scale))
+                for (x, y, bw, bh), w in zip(rects, np.ravel(weights))
+                if w >= self.min_weight
+            ),
+            reverse=True
+        )
+        boxes = []
+        for _, box in candidates:
+            if all(box_iou(box, kept) < self.nms_iou for kept in boxes):
+                boxes.append(box)
+        return boxes
+
+
+class TrackerPool:
+    """
+    PoseAnalyzer ที่ยืมให้ track (สร้างไม่เกิน max_size, คืนแล้ว reset ก่อนใช้ซ้ำ)
+    ใช้ร่วมกันทุก group session -> โหลด model ครั้งเดียวต่อ tracker
+    """
+
+    def __init__(self, factory, max_size=8):
+        self.factory = factory
+        self.max_size = max_size
+        self.created = 0
+        self._idle = []
+
+    def acquire(self):
+        """คืนค่า PoseAnalyzer ว่าง หรือ None ถ้าเต็ม pool"""
+        if self._idle:
+            return self._idle.pop()
+        if self.created >= self.max_size:
+            return None
+        self.created += 1
+        return self.factory()
+
+    def release(self, analyzer):
+        """คืน analyzer (ต้องไม่มีงานค้างบน analyzer แล้ว - ดู InferenceScheduler.wait_idle)"""
+        analyzer.reset()
+        self._idle.append(analyzer)
+
+    def stats(self):
+        return {
+            "max_size": self.max_size,
+            "created": self.created,
+            "idle": len(self._idle),
+            "in_use": self.created - len(self._idle)
+        }
+
+
+class Track:
+    __slots__ = ("track_id", "session_id", "box", "roi", "analyzer", "slot", "last_seen", "last_detected")
+
+    def __init__(self, track_id, session_id, box, analyzer, ts, slot=False):
+        self.track_id = track_id
+        self.session_id = session_id
+        self.box = box  # (x0, y0, x1, y1) pixel ของภาพเต็ม
+        self.roi = None  # กล่องที่ crop จริงในเฟรมล่าสุด (int)
+        self.analyzer = analyzer
+        self.slot = slot  # ถือ admission slot เพิ่ม (คนแรกใช้ slot ของ connection)
+        self.last_seen = ts  # เจอ landmark ล่าสุด
+        self.last_detected = ts  # detector เจอล่าสุด
+
+
+class GroupSession:
+    """
+    track ของทุกคนใน stream เดียว (track_id คงที่ตลอดที่คนนั้นยังอยู่ในภาพ)
+    session_id ของแต่ละคน = "<group_id>#<track_id>" ใช้เป็น ClientManager session แยกกัน
+    admit: callable จอง admission slot ให้คนที่ 2 ขึ้นไป (คืนค่า False = node เต็ม ไม่รับคนเพิ่ม)
+    track ที่ expire/close ยังถือ analyzer อยู่ -> เจ้าของต้องรองานค้างก่อนแล้วเรียก release(track)
+    """
+    MATCH_IOU = 0.3
+    DUPLICATE_IOU = 0.6
+    VISIBLE = 0.5
+    MIN_MARGIN = 16
+
+    def __init__(self, group_id, detector, pool, max_people=6, detect_interval=1.0, max_age=1.5, margin=0.25,
+                 admit=None):
+        self.group_id = group_id
+        self.detector = detector
+        self.pool = pool
+        self.max_people = max_people
+        self.detect_interval = detect_interval
+        self.max_age = max_age
+        self.margin = margin
+        self.admit = admit
+        self.tracks = {}
+        self.last_detect = float("-inf")
+        self.record = False  # session ของคนใหม่เปิดบันทึกด้วย
+        self._ids = itertools.count(1)
+
+    def session_ids(self):
+        return [track.session_id for track in self.tracks.values()]
+
+    # ---------------- Detection ----------------
+    def needs_detection(self, ts):
+        """ยังไม่มีใคร หรือครบรอบ detect_interval -> ต้องรัน person detector"""
+        return not self.tracks or ts - self.last_detect >= self.detect_interval
+
+    def update_detections(self, boxes, ts):
+        """จับคู่กล่องที่ detect ได้กับ track เดิม (IoU) กล่องที่เหลือเป็นคนใหม่ คืนค่า track ที่สร้างใหม่"""
+        self.last_detect = ts
+        pairs = sorted(
+            ((box_iou(track.box, box), tid, i) for tid, track in self.tracks.items() for i, box in enumerate(boxes)),
+            reverse=True
+        )
+        used_tracks, used_boxes = set(), set()
+        for score, tid, i in pairs:
+            if score < self.MATCH_IOU:
+                break
+            if tid in used_tracks or i in used_boxes:
+                continue
+            used_tracks.add(tid)
+            used_boxes.add(i)
+            track = self.tracks[tid]
+            track.last_detected = ts
+            if track.last_seen < ts:
+                track.box = boxes[i]  # เฟรมนี้ landmark หาย -> ใช้กล่องจาก detector แทน
+
+        created = []
+        for i, box in enumerate(boxes):
+            if i in used_boxes or len(self.tracks) >= self.max_people:
+                continue
+            analyzer = self.pool.acquire()
+            if analyzer is None:
+                break
+            slot = bool(self.tracks) and self.admit is not None
+            if slot and not self.admit():
+                self.pool.release(analyzer)  # node เต็ม: ลองใหม่รอบ detect ถัดไป
+                break
+            tid = next(self._ids)
+            track = Track(tid, f"{self.group_id}#{tid}", box, analyzer, ts, slot=slot)
+            self.tracks[tid] = track
+            created.append(track)
+        return created
+
+    # ---------------- Per-person ROI ----------------
+    def crop(self, frame, track):
+        """ตัด ROI (ขยาย margin) ของ track จากเฟรมเต็ม - คืนค่า view ไม่ copy"""
+        h, w = frame.shape[:2]
+        x0, y0, x1, y1 = track.box
+        # margin อย่างน้อย MIN_MARGIN px กันกล่องเล็ก/แบนจาก landmark ไม่กี่จุด
+        mx = max((x1 - x0) * self.margin, self.MIN_MARGIN)
+        my = max((y1 - y0) * self.margin, self.MIN_MARGIN)
+        roi = (max(0, int(x0 - mx)), max(0, int(y0 - my)), min(w, int(x1 + mx)), min(h, int(y1 + my)))
+        track.roi = roi
+        return frame[roi[1]:roi[3], roi[0]:roi[2]]
+
+    def observe(self, track, results, ts, frame_shape):
+        """
+        แปลง landmark ใน ROI กลับเป็นพิกัด normalized ของภาพเต็ม (detector ใช้สเกลเดียวกับโหมดคนเดียว)
+        และเลื่อนกล่องของ track ตาม landmark ที่มองเห็น
+        """
+        if not results or not results.pose_landmarks:
+            return PoseResult(None)
+        h, w = frame_shape[:2]
+        x0, y0, x1, y1 = track.roi
+        rw, rh = x1 - x0, y1 - y0
+        landmarks = [
+            Landmark((x0 + lm.x * rw) / w, (y0 + lm.y * rh) / h, lm.z * rw / w, getattr(lm, "visibility", 1.0))
+            for lm in results.pose_landmarks.landmark
+        ]
+        seen = [lm for lm in landmarks if lm.visibility >= self.VISIBLE]
+        if seen:
+            xs = [lm.x * w for lm in seen]
+            ys = [lm.y * h for lm in seen]
+            track.box = (max(0.0, min(xs)), max(0.0, min(ys)), min(float(w), max(xs)), min(float(h), max(ys)))
+        track.last_seen = ts
+        return PoseResult(LandmarkList(landmarks))
+
+    def box_normalized(self, track, frame_shape):
+        h, w = frame_shape[:2]
+        x0, y0, x1, y1 = track.box
+        return [round(x0 / w, 3), round(y0 / h, 3), round(x1 / w, 3), round(y1 / h, 3)]
+
+    # ---------------- Lifecycle ----------------
+    def expire(self, ts):
+        """ลบ track ที่หายไปนานเกิน max_age หรือซ้อนกับ track ที่เก่ากว่า คืนค่า track ที่ถูกลบ"""
+        gone = [
+            tid for tid, track in self.tracks.items()
+            if ts - max(track.last_seen, track.last_detected) > self.max_age
+        ]
+        alive = sorted(tid for tid in self.tracks if tid not in gone)
+        for i, older in enumerate(alive):
+            for newer in alive[i + 1:]:
+                if newer not in gone and box_iou(self.tracks[older].box, self.tracks[newer].box) > self.DUPLICATE_IOU:
+                    gone.append(newer)
+        return [self._remove(tid) for tid in gone]
+
+    def close(self):
+        return [self._remove(tid) for tid in list(self.tracks)]
+
+    def _remove(self, tid):
+        return self.tracks.pop(tid)
+
+    def release(self, track):
+        """คืน analyzer ของ track ที่ถูกลบแล้วเข้า pool"""
+        if track.analyzer is not None:
+            self.pool.release(track.analyzer)
+            track.analyzer = None
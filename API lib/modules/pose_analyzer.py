@@ -1,56 +1,83 @@
 # modules/pose_analyzer.py
-import cv2
-from .detectors import *
-from .feedbacks import FEEDBACKS
+from . import registry
+from .buffers import FramePool, prepare_rgb
+from .visibility import visibility_gate
 
 class PoseAnalyzer:
-    HOLD_POSES = {"Plank", "Side Plank"}
-    REPS_POSES = {"Bodyweight Squat", "Push-ups", "Sit-ups",
-                  "Lunge (Split Squat)", "Dead Bug", "Russian Twist", "Lying Leg Raises"}
-
-    DETECTORS = {
-        "Bodyweight Squat": detect_squat,
-        "Push-ups": detect_pushup,
-        "Plank": detect_plank,
-        "Sit-ups": detect_situp,
-        "Lunge (Split Squat)": detect_lunge,
-        "Dead Bug": detect_dead_bug,
-        "Side Plank": detect_side_plank,
-        "Russian Twist": detect_russian_twist,
-        "Lying Leg Raises": detect_lying_leg_raises,
-    }
-
-    def __init__(self, mp_pose):
+    # ท่าทั้งหมดประกาศไว้ใน registry.EXERCISES
+    HOLD_POSES = registry.HOLD_POSES
+    REPS_POSES = registry.REPS_POSES
+    DETECTORS = registry.DETECTORS
+
+    def __init__(self, mp_pose, model_complexity=1):
         self.mp_pose = mp_pose
-        self.pose_detector = mp_pose.Pose(
-            static_image_mode=False,
-            model_complexity=1,
-            enable_segmentation=False,
-            min_detection_confidence=0.5,
-            min_tracking_confidence=0.5,
-            smooth_landmarks=True
-        )
-
-    def process_frame(self, frame):
-        rgb = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
-        return self.pose_detector.process(rgb)
-
-    def detect(self, pose_name, landmarks):
-        if not pose_name or pose_name not in self.DETECTORS:
+        self.model_complexity = model_complexity
+        self._trackers = {}
+        self.buffers = FramePool(depth=1)  # resize / RGB ของเฟรมที่กำลังประมวลผล (ทีละงาน)
+        self.pose_detector = self._get_tracker(model_complexity)
+
+    def _get_tracker(self, model_complexity):
+        """สร้าง tracker แยกตาม model complexity (สร้างครั้งเดียวแล้วใช้ซ้ำ)"""
+        tracker = self._trackers.get(model_complexity)
+        if tracker is None:
+            tracker = self.mp_pose.Pose(
+                static_image_mode=False,
+                model_complexity=model_complexity,
+                enable_segmentation=False,
+                min_detection_confidence=0.5,
+                min_tracking_confidence=0.5,
+                smooth_landmarks=True
+            )
+            self._trackers[model_complexity] = tracker
+        return tracker
+
+    def reset(self):
+        """ล้างสถานะการ track ก่อนนำ analyzer ไปใช้กับคนใหม่ (TrackerPool)"""
+        for complexity, tracker in list(self._trackers.items()):
+            if hasattr(tracker, "reset"):
+                tracker.reset()
+            else:
+                tracker.close()
+                del self._trackers[complexity]
+        self.pose_detector = self._get_tracker(self.model_complexity)
+
+    def _prepare(self, frame, max_width=None):
+        """ย่อภาพ (ถ้ากว้างเกิน max_width) แล้วแปลง BGR -> RGB ลง buffer ของ analyzer (graph copy เข้า packet เอง)"""
+        return prepare_rgb(frame, max_width, self.buffers)
+
+    def process_frame(self, frame, model_complexity=None, max_width=None):
+        rgb = self._prepare(frame, max_width)
+        if model_complexity is None:
+            model_complexity = self.model_complexity
+        return self._get_tracker(model_complexity).process(rgb)
+
+    @staticmethod
+    def detect(pose_name, landmarks, gate=None):
+        """
+        ไม่ใช้ tracker: เรียกผ่าน PoseAnalyzer.detect(...) ได้โดยไม่ต้องสร้าง graph
+        gate: ผลของ visibility_gate ที่คำนวณไว้แล้ว (ไม่ส่งมา -> คำนวณให้)
+        ดึงเฉพาะ landmark / มุมที่ท่านี้ประกาศไว้ แล้วส่งให้ detector
+        """
+        exercise = registry.get_exercise(pose_name)
+        if exercise is None:
+            return 0.0
+        if gate is None:
+            gate = visibility_gate(landmarks, pose_name)
+        if not gate.detector_visible:
             return 0.0
-        # detector expects (landmarks, mp_pose)
-        fn = self.DETECTORS[pose_name]
         try:
-            val = fn(landmarks, self.mp_pose)
+            val = exercise.detector(exercise.features.extract(landmarks))
             return float(max(0.0, min(1.0, val)))
         except Exception:
             return 0.0
 
-    def feedback(self, pose_name, landmarks, confidence, hold_time=0.0):
-        fb = FEEDBACKS.get(pose_name)
+    @staticmethod
+    def feedback(pose_name, landmarks, confidence, hold_time=0.0):
+        """Return (message_code, params) ดูข้อความได้จาก feedbacks.MESSAGES"""
+        fb = registry.FEEDBACKS.get(pose_name)
         if not fb:
-            return ""
+            return None, {}
         try:
             return fb(confidence, hold_time)
         except Exception:
-            return ""
+            return None, {}
@@ -0,0 +1,92 @@
+# modules/recognizer.py
+# Auto-detect ท่า (ผู้ใช้ไม่ได้ส่ง select_pose): ให้คะแนนทุกท่าจาก landmark ชุดเดียว
+# - feature ของทุกท่าดึงครั้งเดียว (FeatureSet รวม: gather + มุมทั้งหมดใน numpy op เดียว)
+# - visibility ระดับ detector ของทุกท่าตรวจพร้อมกันด้วย mask (ท่า x 33)
+# - โหวตตามเวลา (ไม่ขึ้นกับ fps) แล้วค่อยเลือกท่าให้ session
+from collections import Counter, deque
+
+import numpy as np
+
+from .features import FeatureSet
+from .registry import EXERCISES
+from .visibility import DETECTOR_IDX, DETECTOR_MIN_RATIO, visibility_column
+
+POSE_NAMES = list(EXERCISES)
+_DETECTORS = [EXERCISES[name].detector for name in POSE_NAMES]
+
+# feature ที่ทุกท่าใช้รวมกัน (ท่าละชุดซ้อนกันเยอะ -> ~20 จุด, 9 มุม)
+ALL_FEATURES = FeatureSet(
+    points=list(dict.fromkeys(n for ex in EXERCISES.values() for n in ex.features.point_names)),
+    angles=list(dict.fromkeys(a for ex in EXERCISES.values() for a in ex.features.angle_names))
+)
+
+_MASK = np.zeros((len(POSE_NAMES), 33), dtype=bool)
+_MIN_VIS = np.zeros((len(POSE_NAMES), 1), dtype=np.float32)
+for _i, _name in enumerate(POSE_NAMES):
+    _idx, _min_vis = DETECTOR_IDX[_name]
+    _MASK[_i, _idx] = True
+    _MIN_VIS[_i, 0] = _min_vis
+_NEEDED = _MASK.sum(axis=1) * DETECTOR_MIN_RATIO
+
+
+def score_all(landmarks, vis=None):
+    """คะแนน 0..1 ของทุกท่า (ลำดับตาม POSE_NAMES) - detector ที่มองไม่เห็นจุดที่ต้องใช้ได้ 0"""
+    if vis is None:
+        vis = visibility_column(landmarks)
+    visible = ((vis[None, :] > _MIN_VIS) & _MASK).sum(axis=1) >= _NEEDED
+    scores = np.zeros(len(POSE_NAMES), dtype=np.float32)
+    if not visible.any():
+        return scores
+    features = ALL_FEATURES.extract(landmarks)
+    for i in np.flatnonzero(visible):
+        try:
+            scores[i] = max(0.0, min(1.0, _DETECTORS[i](features)))
+        except Exception:
+            pass
+    return scores
+
+
+class PoseRecognizer:
+    """
+    โหวตท่าจากคะแนนของทุกท่าในช่วง window วินาทีล่าสุด
+    - เฟรมที่ท่าอันดับ 1 ได้คะแนนไม่ถึง min_score หรือชนะอันดับ 2 ไม่ขาด (min_margin) = งดออกเสียง
+    - เลือกท่าเมื่อได้อย่างน้อย min_votes เสียง และ >= min_share ของเฟรมใน window
+    """
+    MIN_MARGIN = 0.05
+    MIN_VOTES = 4
+    MIN_SHARE = 0.6
+
+    def __init__(self, window=3.0, min_score=0.6, min_margin=MIN_MARGIN, min_votes=MIN_VOTES, min_share=MIN_SHARE):
+        self.window = window
+        self.min_score = min_score
+        self.min_margin = min_margin
+        self.min_votes = min_votes
+        self.min_share = min_share
+        self.votes = deque()
+
+    def reset(self):
+        self.votes.clear()
+
+    def update(self, ts, scores):
+        """ป้อนคะแนนของเฟรมถัดไป คืนค่าชื่อท่าเมื่อโหวตชนะ (ยังไม่ชัด -> None)"""
+        order = np.argsort(scores)
+        best = float(scores[order[-1]])
+        second = float(scores[order[-2]]) if len(order) > 1 else 0.0
+        vote = POSE_NAMES[order[-1]] if best >= self.min_score and best - second >= self.min_margin else None
+
+        self.votes.append((ts, vote))
+        while self.votes and ts - self.votes[0][0] > self.window:
+            self.votes.popleft()
+
+        counts = Counter(v for _, v in self.votes if v)
+        if not counts:
+            return None
+        pose, n = counts.most_common(1)[0]
+        if n >= self.min_votes and n >= len(self.votes) * self.min_share:
+            return pose
+        return None
+
+    def leader(self):
+        """ท่าที่นำโหวตอยู่ตอนนี้ (สำหรับแสดงผลระหว่างตรวจจับ)"""
+        counts = Counter(v for _, v in self.votes if v)
+        return counts.most_common(1)[0][0] if counts else None
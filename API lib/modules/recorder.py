@@ -0,0 +1,224 @@
+# modules/recorder.py
+# บันทึกสิ่งที่ server เห็นต่อ session ลงไฟล์ binary แบบ append-only (สำหรับ debug การนับ/replay)
+#
+# รูปแบบไฟล์ (.posrec):
+#   MAGIC (8 bytes) | header length (uint32 LE) | header JSON (pad ให้ครบ HEADER_ALIGN) | records...
+#   แต่ละ record ขนาดคงที่ตาม RECORD_DTYPE -> อ่านด้วย np.memmap ได้ทันทีแบบ zero-copy
+import json
+import os
+import queue
+import struct
+import threading
+import time
+
+import numpy as np
+
+from .utils import landmarks_to_array
+
+MAGIC = b"POSEREC1"
+HEADER_ALIGN = 64
+LANDMARK_SCALE = 8192.0  # int16: x, y, z ช่วง ±4.0, visibility 0..1 ละเอียด 1/8192
+NUM_LANDMARKS = 33
+
+FLAG_PERSON = 1
+FLAG_FULL_BODY = 2
+FLAG_READY = 4
+
+RECORD_DTYPE = np.dtype([
+    ("ts", "<f8"),
+    ("confidence", "<f4"),
+    ("hold", "<f4"),
+    ("reps", "<u2"),
+    ("state", "u1"),  # 0 = low, 1 = high (สถานะ rep ของท่าที่เลือก)
+    ("flags", "u1"),
+    ("landmarks", "<i2", (NUM_LANDMARKS, 4)),  # x, y, z, visibility (quantized)
+])
+
+
+def quantize_landmarks(landmarks):
+    """แปลง landmark ของ mediapipe เป็น int16 (33, 4)"""
+    return np.clip(np.round(landmarks_to_array(landmarks) * LANDMARK_SCALE), -32768, 32767).astype(np.int16)
+
+
+class SessionRecorder:
+    """handle ต่อ session: record() แค่สร้าง tuple แล้วเข้าคิว งานหนักอยู่ใน writer thread"""
+
+    def __init__(self, owner, sid, path):
+        self.owner = owner
+        self.sid = sid
+        self.path = path
+        self.frames = 0
+
+    def record(self, ts, landmarks, confidence=0.0, reps=0, hold=0.0, state=0, flags=0):
+        if self.owner.enqueue(("rec", self.sid, (ts, landmarks, confidence, reps, hold, state, flags))):
+            self.frames += 1
+
+    def close(self):
+        self.owner.enqueue(("close", self.sid, None))
+
+
+class Recorder:
+    """
+    Writer thread เดียวสำหรับทุก session (ไม่อยู่ใน event loop / inference path)
+    คิวเต็ม -> ทิ้ง record และนับ dropped (การบันทึกต้องไม่ถ่วง live traffic)
+    """
+
+    def __init__(self, directory, queue_size=2000):
+        self.directory = directory
+        self.queue_size = queue_size
+        self._queue = queue.Queue()
+        self._thread = None
+        self._files = {}
+        self.written = 0
+        self.dropped = 0
+
+    # ---------------- Lifecycle ----------------
+    def start(self):
+        if self._thread is None:
+            os.makedirs(self.directory, exist_ok=True)
+            self._thread = threading.Thread(target=self._run, name="pose-recorder", daemon=True)
+            self._thread.start()
+
+    def stop(self):
+        if self._thread is not None:
+            self._queue.put(("stop", None, None))
+            self._thread.join(timeout=5.0)
+            self._thread = None
+
+    # ---------------- Sessions ----------------
+    def open_session(self, sid, meta=None):
+        self.start()
+        safe = "".join(ch if ch.isalnum() or ch in "-_." else "_" for ch in sid)
+        path = os.path.join(self.directory, f"{safe}.posrec")
+        header = {"session": sid, "created": time.time(), "landmark_scale": LANDMARK_SCALE,
+                  "dtype": RECORD_DTYPE.descr, **(meta or {})}
+        self.enqueue(("open", sid, (path, header)))
+        return SessionRecorder(self, sid, path)
+
+    def enqueue(self, item):
+        """open/close เข้าคิวเสมอ, record ถูกทิ้งเมื่อคิวยาวเกิน queue_size"""
+        if item[0] == "rec" and self._queue.qsize() >= self.queue_size:
+            self.dropped += 1
+            return False
+        self._queue.put_nowait(item)
+        return True
+
+    # ---------------- Writer thread ----------------
+    def _run(self):
+        record = np.zeros(1, dtype=RECORD_DTYPE)
+        while True:
+            kind, sid, payload = self._queue.get()
+            try:
+                if kind == "stop":
+                    break
+                if kind == "open":
+                    path, header = payload
+                    self._files[sid] = open_recording_file(path, header)
+                elif kind == "close":
+                    f = self._files.pop(sid, None)
+                    if f:
+                        f.close()
+                elif kind == "rec":
+                    f = self._files.get(sid)
+                    if f is None:
+                        continue
+                    ts, landmarks, confidence, reps, hold, state, flags = payload
+                    record["ts"] = ts
+                    record["confidence"] = confidence
+                    record["hold"] = hold
+                    record["reps"] = min(int(reps), 65535)
+                    record["state"] = state
+                    record["flags"] = flags
+                    record["landmarks"] = quantize_landmarks(landmarks) if landmarks is not None else 0
+                    f.write(record.tobytes())
+                    self.written += 1
+            except Exception:
+                self.dropped += 1
+        for f in self._files.values():
+            f.close()
+        self._files = {}
+
+    def stats(self):
+        return {
+            "directory": self.directory,
+            "sessions": len(self._files),
+            "queued": self._queue.qsize(),
+            "written": self.written,
+            "dropped": self.dropped
+        }
+
+
+def _records_offset(path):
+    """offset ของ record แรกในไฟล์ที่มีอยู่แล้ว (None = header เสีย/ไม่ครบ)"""
+    with open(path, "rb") as f:
+        if f.read(len(MAGIC)) != MAGIC:
+            return None
+        raw = f.read(4)
+        if len(raw) < 4:
+            return None
+        offset = len(MAGIC) + 4 + struct.unpack("<I", raw)[0]
+    return offset if os.path.getsize(path) >= offset else None
+
+
+def open_recording_file(path, header):
+    """
+    สร้างไฟล์ใหม่พร้อม header หรือเปิดต่อท้ายถ้ามีอยู่แล้ว
+    ไฟล์เดิมที่ crash กลาง record -> ตัดเศษท้ายให้เหลือ record เต็มก่อน (ไม่อย่างนั้น record ใหม่เหลื่อมทั้งหมด)
+    """
+    if os.path.exists(path) and os.path.getsize(path) > 0:
+        offset = _records_offset(path)
+        if offset is not None:
+            whole = (os.path.getsize(path) - offset) // RECORD_DTYPE.itemsize
+            f = open(path, "r+b", buffering=64 * 1024)
+            f.truncate(offset + whole * RECORD_DTYPE.itemsize)
+            f.seek(0, os.SEEK_END)
+            return f
+        # header ไม่ครบ: เริ่มไฟล์ใหม่
+    body = json.dumps(header, ensure_ascii=False).encode("utf-8")
+    prefix = len(MAGIC) + 4
+    padded = -(-(prefix + len(body)) // HEADER_ALIGN) * HEADER_ALIGN - prefix
+    f = open(path, "wb", buffering=64 * 1024)
+    f.write(MAGIC + struct.pack("<I", padded) + body.ljust(padded, b" "))
+    return f
+
+
+class RecordingReader:
+    """
+    อ่านไฟล์ .posrec แบบ memory-map (zero-copy)
+    - records: structured array ยาว N
+    - landmarks: int16 (N, 33, 4) view ตรงจากไฟล์, landmarks_float() คืนค่าเป็นพิกัดจริง
+    record ท้ายไฟล์ที่เขียนไม่ครบ (crash) จะถูกตัดทิ้ง
+    """
+
+    def __init__(self, path):
+        self.path = path
+        with open(path, "rb") as f:
+            if f.read(len(MAGIC)) != MAGIC:
+                raise ValueError(f"Not a pose recording: {path}")
+            (length,) = struct.unpack("<I", f.read(4))
+            self.meta = json.loads(f.read(length).decode("utf-8"))
+        offset = len(MAGIC) + 4 + length
+        count = (os.path.getsize(path) - offset) // RECORD_DTYPE.itemsize
+        if count > 0:
+            self.records = np.memmap(path, dtype=RECORD_DTYPE, mode="r", offset=offset, shape=(count,))
+        else:
+            self.records = np.zeros(0, dtype=RECORD_DTYPE)
+
+    def __len__(self):
+        return len(self.records)
+
+    @property
+    def ts(self):
+        return self.records["ts"]
+
+    @property
+    def confidence(self):
+        return self.records["confidence"]
+
+    @property
+    def landmarks(self):
+        return self.records["landmarks"]
+
+    def landmarks_float(self):
+        scale = self.meta.get("landmark_scale", LANDMARK_SCALE)
+        return self.records["landmarks"].astype(np.float32) / scale
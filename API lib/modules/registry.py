@@ -0,0 +1,159 @@
+# modules/registry.py
+# ทะเบียนท่าออกกำลังกาย: แต่ละท่าประกาศ detector, feedback, landmark/มุมที่ใช้, count mode,
+# threshold, cooldown และ filter profile ไว้ที่เดียว
+# ตารางเดิมที่ต้อง sync กันเอง (DETECTORS, HOLD_POSES, POSE_THRESHOLDS, COOLDOWN, visibility,
+# FEEDBACKS, FILTER_PROFILES) สร้างจาก EXERCISES ทั้งหมด -> เพิ่มท่าใหม่ = เพิ่ม Exercise เดียว
+from .detectors import (
+    detect_squat, detect_pushup, detect_plank, detect_situp, detect_lunge,
+    detect_dead_bug, detect_side_plank, detect_russian_twist, detect_lying_leg_raises
+)
+from .feedbacks import (
+    feedback_squat, feedback_pushup, feedback_plank, feedback_situp, feedback_lunge,
+    feedback_dead_bug, feedback_side_plank, feedback_russian_twist, feedback_lying_leg_raises
+)
+from .features import FeatureSet
+
+
+class Exercise:
+    """
+    สเปกของท่าหนึ่ง
+    - points / angles: สิ่งที่ detector อ่านจาก Features (ดึงเฉพาะของท่านี้ต่อเฟรม)
+      landmark ที่ได้จากทั้งสองอย่างคือชุดที่ detector ต้องเห็น (> detector_min_visibility, 70%)
+    - required: จุดที่ต้องเห็นก่อนเริ่มนับ (status.adjust_camera)
+    - thresholds: รูปแบบเดียวกับ ClientManager.POSE_THRESHOLDS เดิม
+    - fps / smooth_frames / cooldown: ทับค่าใน ClientManager.SAMPLING_PROFILES ของ count_mode (None = ใช้ของ mode)
+    """
+
+    def __init__(self, name, detector, feedback, thresholds, points=(), angles=(), required=(),
+                 detector_min_visibility=0.4, cooldown=None, filter_profile=None, fps=None, smooth_frames=None):
+        self.name = name
+        self.detector = detector
+        self.feedback = feedback
+        self.thresholds = thresholds
+        self.features = FeatureSet(points, angles)
+        self.required = list(required)
+        self.detector_min_visibility = detector_min_visibility
+        self.cooldown = cooldown
+        self.filter_profile = filter_profile
+        self.fps = fps
+        self.smooth_frames = smooth_frames
+
+    @property
+    def count_mode(self):
+        if self.thresholds.get("continuous", False):
+            return "continuous"
+        return self.thresholds.get("count_mode", "peak_to_low")
+
+    @property
+    def sampling(self):
+        """ค่า sampling ที่ท่านี้กำหนดเอง (เฉพาะที่ไม่ใช่ None)"""
+        values = {"fps": self.fps, "smooth_frames": self.smooth_frames, "cooldown": self.cooldown}
+        return {key: value for key, value in values.items() if value is not None}
+
+    def __repr__(self):
+        return f"Exercise({self.name!r}, {self.count_mode})"
+
+
+EXERCISES = {ex.name: ex for ex in [
+    Exercise(
+        "Bodyweight Squat", detect_squat, feedback_squat,
+        {"high": 0.50, "low": 0.30, "count_mode": "peak_to_low"},
+        points=["RIGHT_HIP", "LEFT_HIP", "RIGHT_SHOULDER", "LEFT_SHOULDER"],
+        angles=["right_knee", "left_knee", "right_torso", "left_torso"],
+        required=["LEFT_HIP", "RIGHT_HIP", "LEFT_KNEE", "RIGHT_KNEE",
+                  "LEFT_ANKLE", "RIGHT_ANKLE", "LEFT_SHOULDER", "RIGHT_SHOULDER"],
+        cooldown=0.8,
+    ),
+    # ✅ Push-ups: continuous mode
+    Exercise(
+        "Push-ups", detect_pushup, feedback_pushup,
+        {"high": 0.75, "continuous": True, "use_raw": True},
+        points=["RIGHT_SHOULDER", "LEFT_SHOULDER", "RIGHT_HIP", "LEFT_HIP", "RIGHT_ANKLE", "LEFT_ANKLE"],
+        angles=["right_elbow", "left_elbow", "body_line"],
+        required=["LEFT_SHOULDER", "RIGHT_SHOULDER", "LEFT_ELBOW", "RIGHT_ELBOW",
+                  "LEFT_WRIST", "RIGHT_WRIST", "LEFT_HIP", "RIGHT_HIP"],
+        cooldown=2,  # ปรับให้เร็วขึ้นเล็กน้อย
+        filter_profile={"min_cutoff": 1.0, "beta": 6.0, "d_cutoff": 1.0},
+    ),
+    Exercise(
+        "Plank", detect_plank, feedback_plank,
+        {"high": 0.55, "low": 0.35, "count_mode": "hold"},
+        points=["RIGHT_SHOULDER", "LEFT_SHOULDER", "RIGHT_HIP", "LEFT_HIP", "RIGHT_ANKLE", "LEFT_ANKLE"],
+        required=["LEFT_SHOULDER", "RIGHT_SHOULDER", "LEFT_HIP", "RIGHT_HIP", "LEFT_ANKLE", "RIGHT_ANKLE"],
+        detector_min_visibility=0.7,
+        smooth_frames=3,
+        filter_profile={"min_cutoff": 0.3, "beta": 0.5, "d_cutoff": 1.0},
+    ),
+    Exercise(
+        "Sit-ups", detect_situp, feedback_situp,
+        {"high": 0.45, "low": 0.28, "count_mode": "peak_to_low"},
+        angles=["right_torso", "left_torso"],
+        required=["LEFT_SHOULDER", "RIGHT_SHOULDER", "LEFT_HIP", "RIGHT_HIP"],
+        cooldown=0.8,
+    ),
+    Exercise(
+        "Lunge (Split Squat)", detect_lunge, feedback_lunge,
+        {"high": 0.35, "low": 0.20, "count_mode": "on_peak"},
+        points=["RIGHT_KNEE", "LEFT_KNEE", "RIGHT_HIP", "LEFT_HIP", "RIGHT_SHOULDER", "LEFT_SHOULDER"],
+        angles=["right_knee", "left_knee"],
+        required=["LEFT_HIP", "RIGHT_HIP", "LEFT_KNEE", "RIGHT_KNEE", "LEFT_ANKLE", "RIGHT_ANKLE"],
+        detector_min_visibility=0.3,
+        cooldown=0.8,
+    ),
+    Exercise(
+        "Dead Bug", detect_dead_bug, feedback_dead_bug,
+        {"high": 0.75, "continuous": True, "use_raw": True},
+        points=["LEFT_WRIST", "RIGHT_WRIST", "LEFT_ANKLE", "RIGHT_ANKLE",
+                "LEFT_SHOULDER", "RIGHT_SHOULDER", "LEFT_HIP", "RIGHT_HIP"],
+        angles=["right_elbow", "left_elbow", "right_knee", "left_knee"],
+        required=["LEFT_WRIST", "RIGHT_WRIST", "LEFT_ANKLE", "RIGHT_ANKLE", "LEFT_SHOULDER", "RIGHT_SHOULDER"],
+        detector_min_visibility=0.3,
+        cooldown=1.9,
+        filter_profile={"min_cutoff": 0.8, "beta": 4.0, "d_cutoff": 1.0},
+    ),
+    Exercise(
+        "Side Plank", detect_side_plank, feedback_side_plank,
+        {"high": 0.55, "low": 0.35, "count_mode": "hold"},
+        points=["RIGHT_SHOULDER", "RIGHT_HIP", "RIGHT_ANKLE"],
+        angles=["right_body"],
+        required=["RIGHT_SHOULDER", "RIGHT_HIP", "RIGHT_ANKLE"],
+        detector_min_visibility=0.7,
+        smooth_frames=3,
+        filter_profile={"min_cutoff": 0.3, "beta": 0.5, "d_cutoff": 1.0},
+    ),
+    Exercise(
+        "Russian Twist", detect_russian_twist, feedback_russian_twist,
+        {"high": 0.30, "low": 0.10, "count_mode": "direction_twist", "use_raw": True, "angle_tolerance": 0.10},
+        points=["LEFT_SHOULDER", "RIGHT_SHOULDER", "LEFT_HIP", "RIGHT_HIP"],
+        required=["LEFT_SHOULDER", "RIGHT_SHOULDER", "LEFT_HIP", "RIGHT_HIP"],
+        cooldown=0.5,
+        filter_profile={"min_cutoff": 1.5, "beta": 10.0, "d_cutoff": 1.0},
+    ),
+    Exercise(
+        "Lying Leg Raises", detect_lying_leg_raises, feedback_lying_leg_raises,
+        {"high": 0.75, "continuous": True, "use_raw": True},
+        points=["LEFT_ANKLE", "RIGHT_ANKLE"],
+        angles=["right_body", "left_body", "right_knee", "left_knee"],
+        required=["LEFT_HIP", "RIGHT_HIP", "LEFT_ANKLE", "RIGHT_ANKLE"],
+        detector_min_visibility=0.3,
+        cooldown=1,
+        filter_profile={"min_cutoff": 0.8, "beta": 4.0, "d_cutoff": 1.0},
+    ),
+]}
+
+
+def get_exercise(name):
+    """Return Exercise ของท่า (ไม่รู้จัก -> None)"""
+    return EXERCISES.get(name)
+
+
+# --- ตารางที่สร้างจาก registry (ชื่อ/รูปแบบเดิมที่โค้ดส่วนอื่นใช้อยู่) ---
+DETECTORS = {name: ex.detector for name, ex in EXERCISES.items()}
+FEEDBACKS = {name: ex.feedback for name, ex in EXERCISES.items()}
+HOLD_POSES = {name for name, ex in EXERCISES.items() if ex.count_mode == "hold"}
+REPS_POSES = {name for name, ex in EXERCISES.items() if ex.count_mode != "hold"}
+POSE_THRESHOLDS = {name: ex.thresholds for name, ex in EXERCISES.items()}
+COOLDOWN = {name: ex.cooldown for name, ex in EXERCISES.items() if ex.cooldown is not None}
+SAMPLING = {name: ex.sampling for name, ex in EXERCISES.items()}
+POSE_REQUIREMENTS = {name: ex.required for name, ex in EXERCISES.items()}
+DETECTOR_REQUIREMENTS = {name: (ex.features.landmarks, ex.detector_min_visibility) for name, ex in EXERCISES.items()}
@@ -0,0 +1,165 @@
+# modules/rep_detector.py
+# Streaming rep detector: นับจากรูปคลื่นของ confidence ตามเวลาของเฟรม (ไม่ผูกกับ fps)
+# - peak/valley แบบ online ด้วย prominence (ต้องขึ้น/ลงจากจุดสุดขั้วพอ ถึงจะยืนยัน)
+# - เวลาข้ามช่องว่างระหว่างเฟรมประมาณแบบ linear interpolation (hold / continuous)
+# - state ต่อ session เป็นค่าคงที่ไม่กี่ตัว (O(1) memory ไม่เก็บ history)
+
+
+def _time_above(a, b, dt, level):
+    """เวลาในช่วง dt ที่เส้นตรงจาก a ไป b อยู่ >= level"""
+    if a >= level and b >= level:
+        return dt
+    if a < level and b < level:
+        return 0.0
+    return dt * (max(a, b) - level) / abs(b - a)
+
+
+class RepDetector:
+    MIN_PERIOD = {
+        "peak_to_low": 0.4,
+        "on_peak": 0.4,
+        "direction_twist": 0.2,
+    }
+    MAX_GAP = 2.0  # ช่องว่างนานกว่านี้ -> ไม่รู้ว่าเกิดอะไรขึ้น เริ่มติดตามใหม่
+
+    __slots__ = (
+        "count_mode", "high", "low", "tolerance", "prominence", "min_period", "period",
+        "hold_min", "max_gap", "last_ts", "last_conf", "last_rep_ts", "seeking", "extreme",
+        "extreme_ts", "last_peak", "armed", "above_since", "side", "hold_current", "hold_best"
+    )
+
+    def __init__(self, count_mode, high, low=0.0, tolerance=0.0, prominence=None,
+                 min_period=None, period=1.0, hold_min=0.3, max_gap=MAX_GAP):
+        self.count_mode = count_mode
+        self.high = high
+        self.low = low
+        self.tolerance = tolerance
+        self.prominence = prominence or max(0.05, 0.75 * (high - low))
+        self.min_period = self.MIN_PERIOD.get(count_mode, 0.0) if min_period is None else min_period
+        self.period = period  # continuous: 1 rep ต่อ period วินาทีที่อยู่เหนือ high
+        self.hold_min = hold_min
+        self.max_gap = max_gap
+        self.last_rep_ts = float("-inf")
+        self.hold_current = 0.0
+        self.hold_best = 0.0
+        self.last_ts = None
+        self._reset()
+
+    def _reset(self):
+        self.last_ts = None
+        self.last_conf = 0.0
+        self.seeking = "peak"
+        self.extreme = 0.0
+        self.extreme_ts = 0.0
+        self.last_peak = 0.0
+        self.armed = False
+        self.above_since = None
+        self.side = None
+
+    def _end_hold(self):
+        if self.hold_current > self.hold_min:
+            self.hold_best = max(self.hold_best, self.hold_current)
+        self.hold_current = 0.0
+
+    def _count(self, t):
+        if t - self.last_rep_ts >= self.min_period:
+            self.last_rep_ts = t
+            return 1
+        return 0
+
+    # ---------------- Input ----------------
+    def update(self, ts, conf, visible=True):
+        """ป้อน sample ถัดไป (ts วินาที, conf 0..1) คืนค่าจำนวน rep ที่เพิ่มขึ้น"""
+        if not visible or (self.last_ts is not None and ts - self.last_ts > self.max_gap):
+            self._end_hold()
+            self._reset()
+            if not visible:
+                return 0
+
+        prev_ts, prev_conf = self.last_ts, self.last_conf
+        self.last_ts, self.last_conf = ts, conf
+        if prev_ts is None:
+            # sample แรกหลังเริ่ม/ช่องว่าง: เริ่มสูงอยู่แล้วต้องลงก่อนถึงจะนับ
+            self.extreme, self.extreme_ts = conf, ts
+            self.armed = conf < self.high
+            if self.count_mode == "continuous" and conf >= self.high:
+                self.above_since = ts
+            return self._continuous(conf, conf, 0.0, ts) if self.count_mode == "continuous" else 0
+
+        dt = max(0.0, ts - prev_ts)
+        if self.count_mode == "hold":
+            self.hold_current += _time_above(prev_conf, conf, dt, self.high)
+            if conf < self.high:
+                self._end_hold()
+            return 0
+        if self.count_mode == "continuous":
+            return self._continuous(prev_conf, conf, dt, ts)
+        if self.count_mode == "direction_twist":
+            return self._twist(conf, ts)
+        return self._peaks(conf, ts)
+
+    # ---------------- Modes ----------------
+    def _continuous(self, prev, conf, dt, ts):
+        """1 rep เมื่อขึ้นเหนือ high แล้วเพิ่มทุก period ที่ยังอยู่เหนือ high (เวลาข้ามช่องว่าง interpolate)"""
+        if conf < self.high:
+            self.above_since = None
+            return 0
+        if self.above_since is None:
+            self.above_since = ts - _time_above(prev, conf, dt, self.high)
+        reps = 0
+        due = max(self.above_since, self.last_rep_ts + self.period)
+        while due <= ts:
+            reps += 1
+            self.last_rep_ts = due
+            due += self.period
+        return reps
+
+    def _twist(self, conf, ts):
+        """นับทุกครั้งที่เปลี่ยนฝั่ง ซ้าย <-> ขวา (ช่วงกลางไม่ทำให้นับซ้ำ)"""
+        if conf > self.high + self.tolerance:
+            side = "right"
+        elif conf < self.low - self.tolerance:
+            side = "left"
+        else:
+            return 0
+        if side == self.side:
+            return 0
+        self.side = side
+        return self._count(ts)
+
+    def _peaks(self, conf, ts):
+        reps = 0
+        if self.seeking == "peak":
+            if conf >= self.extreme:
+                self.extreme, self.extreme_ts = conf, ts
+            if self.count_mode == "on_peak" and self.armed and conf >= self.high:
+                self.armed = False
+                reps += self._count(ts)
+            if conf <= self.extreme - self.prominence:
+                # ยืนยัน peak (ลงมาจากจุดสูงสุดพอแล้ว)
+                if self.count_mode == "peak_to_low" and self.armed and self.extreme >= self.high:
+                    self.armed = False
+                    reps += self._count(self.extreme_ts)
+                self.last_peak = self.extreme
+                self.seeking = "valley"
+                self.extreme, self.extreme_ts = conf, ts
+        else:
+            if conf <= self.extreme:
+                self.extreme, self.extreme_ts = conf, ts
+            if conf >= self.extreme + self.prominence:
+                # ยืนยัน valley: ลงต่ำพอ (ต่ำกว่า low หรือลงจาก peak เกินช่วง high-low) -> พร้อมนับ rep ถัดไป
+                if self.extreme <= self.low or self.last_peak - self.extreme >= self.high - self.low:
+                    self.armed = True
+                self.seeking = "peak"
+                self.extreme, self.extreme_ts = conf, ts
+                if self.count_mode == "on_peak" and self.armed and conf >= self.high:
+                    self.armed = False
+                    reps += self._count(ts)
+        return reps
+
+    @property
+    def state(self):
+        """high/low สำหรับ debug (เทียบกับ pose_states ของ engine เดิม)"""
+        if self.count_mode == "direction_twist":
+            return self.side or "center"
+        return "high" if self.seeking == "valley" or self.above_since is not None else "low"
@@ -0,0 +1,246 @@
+# modules/scheduler.py
+import asyncio
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
+
+from .affinity import pin_current_thread
+
+
+class _Job:
+    __slots__ = ("frame", "kwargs", "future", "analyzer", "submitted_at")
+
+    def __init__(self, frame, kwargs, future, analyzer=None):
+        self.frame = frame
+        self.kwargs = kwargs
+        self.future = future
+        self.analyzer = analyzer  # None = ใช้ analyzer ของ worker
+        self.submitted_at = time.monotonic()
+
+
+class _SessionQueue:
+    """คิวของแต่ละ session + สถานะ token bucket และ weighted round-robin"""
+
+    def __init__(self, sid, rate):
+        self.sid = sid
+        self.pending = deque()
+        self.priority = InferenceScheduler.PRIORITY_IDLE
+        self.weight = 1
+        self.current = 0  # smooth weighted round-robin
+        self.tokens = 1.0
+        self.last_refill = time.monotonic()
+        self.rate = rate
+        self.served = 0
+        self.dropped = 0
+        self.wait_total = 0.0
+
+    def refill(self, now):
+        if self.rate:
+            self.tokens = min(InferenceScheduler.BURST, self.tokens + (now - self.last_refill) * self.rate)
+        else:
+            self.tokens = InferenceScheduler.BURST
+        self.last_refill = now
+
+
+class InferenceScheduler:
+    """
+    Fair-share scheduler หน้า pose-inference workers
+    - แต่ละ worker มี PoseAnalyzer (tracker) ของตัวเอง รันใน thread pool
+    - เลือกงานแบบ weighted round-robin ข้าม session ที่มีเฟรมรออยู่
+    - จำกัด inference slot ต่อ session ต่อวินาที (token bucket)
+    - priority tier: session ที่เลือกท่าแล้วและ ready_to_start ได้ก่อน (ถ้าเปิด)
+    - cpu_sets: core ของ worker แต่ละตัว (None = ไม่ pin) - worker มี thread ของตัวเอง
+      และสร้าง analyzer ใน thread นั้น -> thread ภายใน graph อยู่บน core ชุดเดียวกัน
+    """
+    PRIORITY_ACTIVE = 0
+    PRIORITY_IDLE = 1
+    BURST = 2.0
+
+    def __init__(self, analyzer_factory, workers=1, max_rate=15.0, max_pending=1,
+                 priority_tiers=True, load=None, cpu_sets=None):
+        self.analyzer_factory = analyzer_factory
+        self.workers = max(1, workers)
+        self.cpu_sets = cpu_sets
+        self.max_rate = max_rate
+        self.max_pending = max(1, max_pending)
+        self.priority_tiers = priority_tiers
+        self.load = load
+
+        self.sessions = {}
+        self._running = {}  # id(analyzer) -> Event ของงานที่กำลังรันบน analyzer เฉพาะงาน (group mode)
+        self._cond = None
+        self._tasks = []
+        self._executors = []
+
+    # ---------------- Lifecycle ----------------
+    async def start(self):
+        if self._tasks:
+            return
+        self._cond = asyncio.Condition()
+        loop = asyncio.get_running_loop()
+        for idx in range(self.workers):
+            cpus = self.cpu_sets[idx % len(self.cpu_sets)] if self.cpu_sets else None
+            executor = ThreadPoolExecutor(
+                max_workers=1,
+                thread_name_prefix=f"pose-infer-{idx}",
+                initializer=pin_current_thread,
+                initargs=(cpus,)
+            )
+            analyzer = await loop.run_in_executor(executor, self.analyzer_factory)
+            self._executors.append(executor)
+            self._tasks.append(asyncio.create_task(self._worker(analyzer, executor)))
+
+    async def stop(self):
+        for task in self._tasks:
+            task.cancel()
+        self._tasks = []
+        for executor in self._executors:
+            executor.shutdown(wait=False)
+        self._executors = []
+
+    # ---------------- Sessions ----------------
+    def _session(self, sid):
+        queue = self.sessions.get(sid)
+        if queue is None:
+            queue = _SessionQueue(sid, self.max_rate)
+            self.sessions[sid] = queue
+        return queue
+
+    def remove_session(self, sid):
+        queue = self.sessions.pop(sid, None)
+        if queue:
+            for job in queue.pending:
+                if not job.future.done():
+                    job.future.cancel()
+
+    async def wait_idle(self, analyzer):
+        """
+        รองานที่กำลังรันบน analyzer นี้ให้เสร็จ (cancel future ไม่ได้หยุด thread ที่รันอยู่)
+        เรียกหลัง remove_session ก่อนคืน analyzer เข้า pool / reset
+        """
+        done = self._running.get(id(analyzer))
+        if done is not None:
+            await done.wait()
+
+    async def submit(self, sid, frame, priority=PRIORITY_IDLE, weight=1, analyzer=None, **kwargs):
+        """
+        ส่งเฟรมเข้าคิว inference แล้วรอผล
+        คืนค่า None ถ้าเฟรมถูกแทนที่ด้วยเฟรมใหม่กว่าของ session เดียวกันก่อนได้รัน
+        analyzer: tracker เฉพาะของงานนี้ (เช่น track ใน group mode) แทน tracker ของ worker
+        """
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        async with self._cond:
+            queue = self._session(sid)
+            queue.priority = priority if self.priority_tiers else self.PRIORITY_IDLE
+            queue.weight = max(1, weight)
+            while len(queue.pending) >= self.max_pending:
+                stale = queue.pending.popleft()
+                queue.dropped += 1
+                if not stale.future.done():
+                    stale.future.set_result(None)
+            queue.pending.append(_Job(frame, kwargs, future, analyzer))
+            self._cond.notify()
+        return await future
+
+    # ---------------- Scheduling ----------------
+    def _pick(self, now):
+        """Return (job, wait) - job ถัดไปตาม priority + WRR หรือเวลาที่ต้องรอ token"""
+        eligible = []
+        wait = None
+        for queue in self.sessions.values():
+            if not queue.pending:
+                continue
+            queue.refill(now)
+            if queue.tokens >= 1.0:
+                eligible.append(queue)
+            else:
+                need = (1.0 - queue.tokens) / queue.rate
+                wait = need if wait is None else min(wait, need)
+        if not eligible:
+            return None, wait
+
+        top = min(q.priority for q in eligible)
+        group = [q for q in eligible if q.priority == top]
+        total = 0
+        best = None
+        for queue in group:
+            queue.current += queue.weight
+            total += queue.weight
+            if best is None or queue.current > best.current:
+                best = queue
+        best.current -= total
+        best.tokens -= 1.0
+        best.served += 1
+        job = best.pending.popleft()
+        best.wait_total += now - job.submitted_at
+        return job, None
+
+    async def _next_job(self):
+        async with self._cond:
+            while True:
+                job, wait = self._pick(time.monotonic())
+                if job is not None:
+                    if job.future.done():
+                        continue
+                    return job
+                try:
+                    await asyncio.wait_for(self._cond.wait(), wait)
+                except asyncio.TimeoutError:
+                    pass
+
+    async def _worker(self, analyzer, executor):
+        loop = asyncio.get_running_loop()
+        while True:
+            job = await self._next_job()
+            started = time.perf_counter()
+            target = job.analyzer or analyzer
+            running = None
+            if job.analyzer is not None:
+                running = self._running[id(job.analyzer)] = asyncio.Event()
+            try:
+                if getattr(target, "LIVE_STREAM", False):
+                    # Tasks LIVE_STREAM: เตรียมภาพใน thread แล้วรอ callback แบบ async (ไม่ถือ thread ระหว่าง graph รัน)
+                    pending = await loop.run_in_executor(
+                        executor, partial(target.submit, job.frame, **job.kwargs)
+                    )
+                    try:
+                        results = await asyncio.wait_for(asyncio.wrap_future(pending), target.timeout)
+                    except asyncio.TimeoutError:
+                        results = None
+                else:
+                    results = await loop.run_in_executor(
+                        executor, partial(target.process_frame, job.frame, **job.kwargs)
+                    )
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                if not job.future.done():
+                    job.future.set_exception(e)
+            else:
+                if not job.future.done():
+                    job.future.set_result(results)
+            finally:
+                if running is not None:
+                    self._running.pop(id(job.analyzer), None)
+                    running.set()
+                if self.load is not None:
+                    self.load.record(time.perf_counter() - started)
+
+    def stats(self):
+        return {
+            "workers": self.workers,
+            "cpu_sets": self.cpu_sets,
+            "max_rate_per_session": self.max_rate,
+            "pending": sum(len(q.pending) for q in self.sessions.values()),
+            "sessions": {
+                sid: {
+                    "priority": q.priority,
+                    "served": q.served,
+                    "dropped": q.dropped,
+                    "mean_wait_ms": round(q.wait_total / q.served * 1000, 2) if q.served else 0.0
+                }
+                for sid, q in self.sessions.items()
+            }
+        }
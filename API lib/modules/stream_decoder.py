@@ -0,0 +1,82 @@
+# modules/stream_decoder.py
+# รับวิดีโอเป็น encoded stream (H.264 / HEVC / VP8 / VP9) ทีละ binary chunk ผ่าน WebSocket
+# decoder ต่อ session เก็บ state ระหว่างเฟรม (P-frame อ้างอิงเฟรมก่อน) แทน imdecode JPEG ทีละเฟรม
+# ต้องมี PyAV (pip install av) - ไม่มีก็ยังส่งเฟรม JPEG ได้ตามเดิม
+import struct
+
+from .buffers import yuv420p_to_bgr
+
+try:
+    import av
+except ImportError:  # optional dependency
+    av = None
+
+# ชื่อที่ client ส่งมา -> decoder ของ FFmpeg
+CODECS = {"h264": "h264", "avc": "h264", "hevc": "hevc", "h265": "hevc", "vp8": "vp8", "vp9": "vp9"}
+# codec ที่เป็น byte stream (Annex-B): chunk ตัดตรงไหนก็ได้ parser ต่อ NAL ให้เอง
+BYTE_STREAM = {"h264", "hevc"}
+# header (ถ้าเปิด timestamps): capture time (ms, float64 big-endian) นำหน้า chunk
+TS_HEADER = struct.Struct("!d")
+
+
+def available_codecs():
+    return sorted(CODECS) if av is not None else []
+
+
+class StreamDecoder:
+    """
+    decoder ของ session เดียว: ต้องป้อน chunk ตามลำดับและห้ามทิ้ง chunk
+    - h264/hevc: Annex-B byte stream (start code 00 00 01) แบ่ง chunk อย่างไรก็ได้
+    - vp8/vp9: 1 chunk = 1 encoded frame (เช่น EncodedVideoChunk ของ WebCodecs)
+    decode ได้เป็น av.VideoFrame (ยังไม่แปลงสี) -> แปลงเป็น BGR เฉพาะเฟรมที่รับไปวิเคราะห์
+    """
+
+    def __init__(self, codec="h264", threads=1, timestamps=False):
+        if av is None:
+            raise ValueError("Video stream ingestion requires PyAV (pip install av)")
+        name = CODECS.get(str(codec).lower())
+        if name is None:
+            raise ValueError(f"Unknown stream codec: {codec} (use {', '.join(sorted(CODECS))})")
+        self.codec = name
+        self.timestamps = timestamps
+        self.context = av.CodecContext.create(name, "r")
+        self.context.thread_count = max(1, threads)
+        self.chunks = 0
+        self.frames = 0
+        self.errors = 0
+
+    def split(self, chunk):
+        """แยก header timestamp (ถ้าเปิด) คืนค่า (capture_ts ms หรือ None, payload)"""
+        if not self.timestamps:
+            return None, chunk
+        if len(chunk) < TS_HEADER.size:
+            raise ValueError("Chunk shorter than timestamp header")
+        return TS_HEADER.unpack_from(chunk)[0], chunk[TS_HEADER.size:]
+
+    def decode(self, chunk):
+        """
+        chunk (bytes) -> (frames, error) - thread-safe ต่อ session เดียว (เรียกทีละ chunk)
+        frames อาจว่างระหว่างรอ NAL ครบ / รอ keyframe หลัง chunk เสีย
+        """
+        self.chunks += 1
+        frames = []
+        try:
+            packets = self.context.parse(chunk) if self.codec in BYTE_STREAM else [av.Packet(chunk)]
+            for packet in packets:
+                frames.extend(self.context.decode(packet))
+        except (av.error.FFmpegError, ValueError) as e:
+            # chunk เสีย: decoder กลับมาได้เองที่ keyframe ถัดไป
+            self.errors += 1
+            return frames, {"error": "stream_decode_failed", "detail": str(e)}
+        self.frames += len(frames)
+        return frames, None
+
+    @staticmethod
+    def to_bgr(frame, pool=None):
+        """av.VideoFrame -> BGR (มี pool + yuv420p ขนาดคู่ -> buffer ยืมจาก pool, คืนด้วย pool.release)"""
+        if pool is None or frame.format.name != "yuv420p" or frame.width % 2 or frame.height % 2:
+            return frame.to_ndarray(format="bgr24")
+        return yuv420p_to_bgr(frame, pool)
+
+    def stats(self):
+        return {"codec": self.codec, "chunks": self.chunks, "frames": self.frames, "errors": self.errors}
@@ -1,6 +1,16 @@
 # modules/utils.py
 import numpy as np
 import math
+from collections import namedtuple
+
+from .visibility import visibility_gate
+
+# โครงสร้างเดียวกับผลของ mediapipe (results.pose_landmarks.landmark[i].x ...)
+Landmark = namedtuple("Landmark", ["x", "y", "z", "visibility"])
+LandmarkList = namedtuple("LandmarkList", ["landmark"])
+PoseResult = namedtuple("PoseResult", ["pose_landmarks"])
+
+NUM_LANDMARKS = 33
 
 def landmark_xy(lm):
     """Return (x, y) from a mediapipe landmark object."""
@@ -16,95 +26,56 @@ def angle(a, b, c):
     cosang = np.clip(np.dot(ba, bc) / (norm_ba * norm_bc), -1.0, 1.0)
     return math.degrees(math.acos(cosang))
 
+def results_from_landmarks(points):
+    """
+    แปลง landmark ที่ client ส่งมา [[x, y, z, visibility], ...] (33 จุด)
+    เป็นผลรูปแบบเดียวกับ PoseAnalyzer.process_frame - list ว่าง = ไม่เจอคน
+    """
+    if not points:
+        return PoseResult(None)
+    if len(points) != NUM_LANDMARKS:
+        raise ValueError(f"Expected {NUM_LANDMARKS} landmarks, got {len(points)}")
+    landmarks = [
+        Landmark(
+            float(p[0]),
+            float(p[1]),
+            float(p[2]) if len(p) > 2 else 0.0,
+            float(p[3]) if len(p) > 3 else 1.0
+        )
+        for p in points
+    ]
+    return PoseResult(LandmarkList(landmarks))
+
+def landmarks_to_array(landmarks):
+    """landmark objects -> float32 array (33, 4): x, y, z, visibility"""
+    return np.array(
+        [(lm.x, lm.y, lm.z, getattr(lm, "visibility", 1.0)) for lm in landmarks],
+        dtype=np.float32
+    )
+
+def array_to_landmarks(array):
+    """array (33, 4) -> landmark objects ที่ detector ใช้ได้ (lm.x, lm.y, ...)"""
+    return [Landmark(*row) for row in array.tolist()]
+
 def check_visibility(lm, threshold=0.5):
     """Return true if lm has visibility > threshold or no visibility attr."""
     return lm.visibility > threshold if hasattr(lm, "visibility") else True
 
-def check_full_body_visible(landmarks, mp_pose, min_visibility=0.5):
+def check_full_body_visible(landmarks, mp_pose=None, min_visibility=0.5):
     """
     ตรวจสอบว่าเห็นร่างกายเต็มตัวหรือไม่
-    ต้องเห็นจุดสำคัญ: ไหล่, สะโพก, เข่า, ข้อเท้า ทั้งซ้ายและขวา
+    ต้องเห็นจุดสำคัญ: ไหล่, สะโพก, เข่า, ข้อเท้า ทั้งซ้ายและขวา (อย่างน้อย 6 จาก 8 จุด)
     
     Returns:
         tuple: (is_visible: bool, missing_parts: list, visibility_score: float)
     """
-    required_landmarks = [
-        "LEFT_SHOULDER", "RIGHT_SHOULDER",
-        "LEFT_HIP", "RIGHT_HIP",
-        "LEFT_KNEE", "RIGHT_KNEE",
-        "LEFT_ANKLE", "RIGHT_ANKLE"
-    ]
-    
-    missing_parts = []
-    visible_count = 0
-    total_visibility = 0.0
-    
-    for landmark_name in required_landmarks:
-        try:
-            idx = getattr(mp_pose.PoseLandmark, landmark_name).value
-            lm = landmarks[idx]
-            
-            visibility = lm.visibility if hasattr(lm, "visibility") else 1.0
-            total_visibility += visibility
-            
-            if visibility >= min_visibility:
-                visible_count += 1
-            else:
-                missing_parts.append(landmark_name.replace("_", " ").title())
-        except Exception:
-            missing_parts.append(landmark_name.replace("_", " ").title())
-    
-    # ลดเกณฑ์: ต้องเห็นอย่างน้อย 6 จาก 8 จุด (75%) - เดิม 7/8
-    is_visible = visible_count >= 6
-    visibility_score = total_visibility / len(required_landmarks)
-    
-    return is_visible, missing_parts, visibility_score
+    gate = visibility_gate(landmarks, None, min_visibility)
+    return gate.full_body_visible, gate.missing_parts, gate.visibility_score
 
 def check_pose_specific_visibility(landmarks, mp_pose, pose_name, min_visibility=0.5):
     """
-    ตรวจสอบว่าเห็นจุดสำคัญเฉพาะของแต่ละท่าหรือไม่
+    ตรวจสอบว่าเห็นจุดสำคัญเฉพาะของแต่ละท่าหรือไม่ (ต้องเห็นอย่างน้อย 70%)
+    ใช้ visibility_gate ตรง ๆ ถ้าต้องการผลทุกระดับในครั้งเดียว
     """
-    pose_requirements = {
-        "Bodyweight Squat": ["LEFT_HIP", "RIGHT_HIP", "LEFT_KNEE", "RIGHT_KNEE", 
-                             "LEFT_ANKLE", "RIGHT_ANKLE", "LEFT_SHOULDER", "RIGHT_SHOULDER"],
-        "Push-ups": ["LEFT_SHOULDER", "RIGHT_SHOULDER", "LEFT_ELBOW", "RIGHT_ELBOW",
-                     "LEFT_WRIST", "RIGHT_WRIST", "LEFT_HIP", "RIGHT_HIP"],
-        "Plank": ["LEFT_SHOULDER", "RIGHT_SHOULDER", "LEFT_HIP", "RIGHT_HIP",
-                  "LEFT_ANKLE", "RIGHT_ANKLE"],
-        "Sit-ups": ["LEFT_SHOULDER", "RIGHT_SHOULDER", "LEFT_HIP", "RIGHT_HIP"],
-        "Lunge (Split Squat)": ["LEFT_HIP", "RIGHT_HIP", "LEFT_KNEE", "RIGHT_KNEE",
-                                 "LEFT_ANKLE", "RIGHT_ANKLE"],
-        "Dead Bug": ["LEFT_WRIST", "RIGHT_WRIST", "LEFT_ANKLE", "RIGHT_ANKLE",
-                     "LEFT_SHOULDER", "RIGHT_SHOULDER"],
-        "Side Plank": ["RIGHT_SHOULDER", "RIGHT_HIP", "RIGHT_ANKLE"],
-        "Russian Twist": ["LEFT_SHOULDER", "RIGHT_SHOULDER", "LEFT_HIP", "RIGHT_HIP"],
-        "Lying Leg Raises": ["LEFT_HIP", "RIGHT_HIP", "LEFT_ANKLE", "RIGHT_ANKLE"]
-    }
-    
-    required = pose_requirements.get(pose_name, [])
-    if not required:
-        return True, [], 1.0
-    
-    missing = []
-    visible_count = 0
-    total_visibility = 0.0
-    
-    for landmark_name in required:
-        try:
-            idx = getattr(mp_pose.PoseLandmark, landmark_name).value
-            lm = landmarks[idx]
-            visibility = lm.visibility if hasattr(lm, "visibility") else 1.0
-            total_visibility += visibility
-            
-            if visibility >= min_visibility:
-                visible_count += 1
-            else:
-                missing.append(landmark_name.replace("_", " ").title())
-        except Exception:
-            missing.append(landmark_name.replace("_", " ").title())
-    
-    # ลดเกณฑ์: ต้องเห็นอย่างน้อย 70% ของจุดที่ต้องการ
-    is_visible = visible_count >= len(required) * 0.7
-    visibility_score = total_visibility / len(required) if required else 1.0
-    
-    return is_visible, missing, visibility_score
\ No newline at end of file
+    gate = visibility_gate(landmarks, pose_name, min_visibility)
+    return gate.pose_visible, gate.pose_missing, gate.pose_score
@@ -0,0 +1,288 @@
+# modules/video_jobs.py
+import asyncio
+import multiprocessing
+import os
+import time
+import uuid
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor
+
+import cv2
+
+from .affinity import init_worker_process
+from .client_manager import ClientManager
+from .pose_analyzer import PoseAnalyzer
+from .visibility import visibility_gate
+
+
+class UploadTooLarge(ValueError):
+    pass
+
+
+class JobQueueFull(Exception):
+    """งานค้าง (queued + running + กำลังอัปโหลด) หรือไฟล์บน disk เกินที่ตั้งไว้"""
+
+
+def score_frame(analyzer, clients, cid, pose, frame, ts, model_complexity=None, max_width=None):
+    """
+    วิเคราะห์ 1 เฟรมแบบเดียวกับ /ws/pose แล้วอัพเดท counters
+    คืนค่า (confidence, ready) - ready = เห็นเต็มตัวและจุดสำคัญของท่าครบ
+    """
+    results = analyzer.process_frame(frame, model_complexity=model_complexity, max_width=max_width)
+    if not results or not results.pose_landmarks:
+        return 0.0, False
+    landmarks = results.pose_landmarks.landmark
+    gate = visibility_gate(landmarks, pose)
+    if not gate.full_body_visible or not gate.pose_visible:
+        return 0.0, False
+    confidence = analyzer.detect(pose, landmarks, gate)
+    clients.update_counters(cid, pose, confidence, ts, True)
+    return confidence, True
+
+
+def analyze_video(path, pose, analyzer, stride=1, max_width=None, model_complexity=None):
+    """
+    วิเคราะห์ไฟล์วิดีโอทีละเฟรมด้วย tracker ของ analyzer ผ่าน ClientManager session ของตัวเอง
+    เวลาทั้งหมดเป็นวินาทีตามเวลาในวิดีโอ (frame index / fps) ไม่ใช่เวลาที่ประมวลผล
+    """
+    cap = cv2.VideoCapture(path)
+    if not cap.isOpened():
+        raise ValueError(f"Cannot open video: {os.path.basename(path)}")
+    fps = cap.get(cv2.CAP_PROP_FPS) or 30.0
+    total = int(cap.get(cv2.CAP_PROP_FRAME_COUNT) or 0)
+    stride = max(1, int(stride))
+
+    clients = ClientManager()
+    cid = clients.register("video")
+    clients.set_selected_pose(cid, pose)
+    client = clients.clients[cid]
+    client.last_ts = 0.0
+
+    confidences = []  # [t, confidence, ready]
+    reps = []  # {"t", "count", "confidence"}
+    holds = []  # {"start", "end", "duration"}
+    hold_start = None
+    last_hold = 0.0
+    last_t = 0.0
+    idx = 0
+    processed = 0
+    started = time.perf_counter()
+    try:
+        while cap.grab():
+            if idx % stride == 0:
+                ok, frame = cap.retrieve()
+                if ok:
+                    t = idx / fps
+                    reps_before = client.reps_counts.get(pose, 0)
+                    confidence, ready = score_frame(
+                        analyzer, clients, cid, pose, frame, t,
+                        model_complexity=model_complexity, max_width=max_width
+                    )
+                    processed += 1
+                    confidences.append([round(t, 3), round(confidence, 3), ready])
+
+                    count = client.reps_counts.get(pose, 0)
+                    if count > reps_before:
+                        reps.append({"t": round(t, 3), "count": count, "confidence": round(confidence, 3)})
+
+                    current = clients.get_hold_time(cid, pose)["current"]
+                    if current > 0 and hold_start is None:
+                        hold_start = last_t
+                    elif current == 0 and hold_start is not None:
+                        holds.append({"start": round(hold_start, 3), "end": round(t, 3),
+                                      "duration": round(last_hold, 3)})
+                        hold_start = None
+                    last_hold = current
+                    last_t = t
+            idx += 1
+    finally:
+        cap.release()
+
+    if hold_start is not None:
+        holds.append({"start": round(hold_start, 3), "end": round(last_t, 3), "duration": round(last_hold, 3)})
+    elapsed = time.perf_counter() - started
+    hold = clients.get_hold_time(cid, pose)
+    return {
+        "pose": pose,
+        "fps": fps,
+        "frames_total": total or idx,
+        "frames_processed": processed,
+        "stride": stride,
+        "duration": round(idx / fps, 3),
+        "reps": client.reps_counts.get(pose, 0),
+        "best_hold": round(max([hold["best"]] + [h["duration"] for h in holds]), 3),
+        "timeline": {
+            "reps": reps,
+            "holds": holds,
+            "confidence": confidences
+        },
+        "elapsed": round(elapsed, 3),
+        "processing_fps": round(processed / elapsed, 2) if elapsed > 0 else 0.0
+    }
+
+
+def run_video_job(path, pose, model_complexity=1, stride=1, max_width=None):
+    """Entry point ใน process pool: สร้าง tracker เฉพาะงานนี้ แล้ววิเคราะห์ทั้งไฟล์"""
+    import mediapipe as mp
+    analyzer = PoseAnalyzer(mp.solutions.pose, model_complexity=model_complexity)
+    return analyze_video(path, pose, analyzer, stride=stride, max_width=max_width)
+
+
+class VideoJobManager:
+    """
+    คิวงานวิเคราะห์วิดีโอที่อัปโหลด
+    - ไฟล์ถูก stream ลง disk ทีละ chunk (ไม่โหลดทั้งไฟล์เข้า memory)
+    - รันใน process pool แยกจาก inference workers ของ WebSocket
+    - สถานะงาน: queued -> running -> done / failed (เก็บใน memory ล่าสุด max_jobs งาน)
+    - รับงานค้างได้ไม่เกิน max_pending และไฟล์รอวิเคราะห์บน disk ไม่เกิน max_disk_bytes (0 = ไม่จำกัด)
+    - process pool ใช้ spawn: server มี thread (inference, decode, recorder) และ graph ที่โหลดแล้ว
+      fork จาก process แบบนั้นอาจ deadlock ที่ lock ที่ thread อื่นถืออยู่
+    """
+
+    def __init__(self, upload_dir, workers=1, model_complexity=1, max_jobs=100, keep_files=False,
+                 cv2_threads=1, cpus=None, max_pending=8, max_disk_bytes=0):
+        self.upload_dir = upload_dir
+        self.workers = max(1, workers)
+        self.model_complexity = model_complexity
+        self.max_jobs = max_jobs
+        self.keep_files = keep_files
+        self.cv2_threads = cv2_threads
+        self.cpus = cpus  # core ของ process pool (None = ไม่ pin) แยกจาก core ของ inference สด
+        self.max_pending = max_pending
+        self.max_disk_bytes = max_disk_bytes
+
+        self.jobs = OrderedDict()
+        self.uploading = 0
+        self.disk_bytes = 0  # ไฟล์อัปโหลดที่ยังอยู่บน disk (รวมที่กำลังเขียน)
+        self.rejected = 0
+        self._sizes = {}  # path -> bytes
+        self._tasks = set()  # เก็บ reference ของ task ไว้ ไม่ให้ถูก garbage collect ระหว่างรัน
+        self._executor = None
+        self._slots = None
+
+    # ---------------- Upload ----------------
+    def pending(self):
+        return self.uploading + sum(1 for job in self.jobs.values() if job["status"] in ("queued", "running"))
+
+    async def save_upload(self, stream, max_bytes=0):
+        """
+        เขียน request body ลงไฟล์ทีละ chunk คืนค่า path
+        UploadTooLarge ถ้าเกิน max_bytes, JobQueueFull ถ้างานค้างหรือ disk เต็ม (ตรวจก่อนอ่าน body)
+        """
+        if self.max_pending and self.pending() >= self.max_pending:
+            self.rejected += 1
+            raise JobQueueFull(f"{self.pending()} video jobs already pending")
+        os.makedirs(self.upload_dir, exist_ok=True)
+        path = os.path.join(self.upload_dir, f"{uuid.uuid4().hex}.video")
+        self._sizes[path] = 0
+        self.uploading += 1
+        try:
+            with open(path, "wb") as f:
+                async for chunk in stream:
+                    self._sizes[path] += len(chunk)
+                    self.disk_bytes += len(chunk)
+                    if max_bytes and self._sizes[path] > max_bytes:
+                        raise UploadTooLarge(f"Upload exceeds {max_bytes} bytes")
+                    if self.max_disk_bytes and self.disk_bytes > self.max_disk_bytes:
+                        self.rejected += 1
+                        raise JobQueueFull("Upload storage is full")
+                    f.write(chunk)
+            if self._sizes[path] == 0:
+                raise ValueError("Empty upload")
+        except BaseException:
+            self._remove(path)
+            raise
+        finally:
+            self.uploading -= 1
+        return path
+
+    def _remove(self, path):
+        self.disk_bytes -= self._sizes.pop(path, 0)
+        try:
+            os.remove(path)
+        except OSError:
+            pass
+
+    # ---------------- Jobs ----------------
+    def submit(self, path, pose, stride=1, max_width=None):
+        job = {
+            "job_id": uuid.uuid4().hex,
+            "status": "queued",
+            "pose": pose,
+            "stride": stride,
+            "max_width": max_width,
+            "created": time.time(),
+            "started": None,
+            "finished": None,
+            "error": None,
+            "result": None
+        }
+        self.jobs[job["job_id"]] = job
+        self._evict()
+        task = asyncio.create_task(self._run(job, path))
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+        return job
+
+    def _evict(self):
+        """เก็บงานไว้ไม่เกิน max_jobs (ลบงานที่จบแล้วที่เก่าสุดก่อน)"""
+        for job_id in list(self.jobs):
+            if len(self.jobs) <= self.max_jobs:
+                break
+            if self.jobs[job_id]["status"] in ("done", "failed"):
+                del self.jobs[job_id]
+
+    async def _run(self, job, path):
+        if self._executor is None:
+            self._executor = ProcessPoolExecutor(
+                max_workers=self.workers,
+                mp_context=multiprocessing.get_context("spawn"),
+                initializer=init_worker_process,
+                initargs=(self.cv2_threads, self.cpus)
+            )
+            self._slots = asyncio.Semaphore(self.workers)
+        loop = asyncio.get_running_loop()
+        try:
+            async with self._slots:
+                job["status"] = "running"
+                job["started"] = time.time()
+                job["result"] = await loop.run_in_executor(
+                    self._executor, run_video_job,
+                    path, job["pose"], self.model_complexity, job["stride"], job["max_width"]
+                )
+                job["status"] = "done"
+        except Exception as e:
+            job["status"] = "failed"
+            job["error"] = str(e) or e.__class__.__name__
+        finally:
+            job["finished"] = time.time()
+            if not self.keep_files:
+                self._remove(path)
+
+    def get(self, job_id):
+        return self.jobs.get(job_id)
+
+    def describe(self, job):
+        """สถานะงาน (ไม่รวม timeline)"""
+        body = {k: v for k, v in job.items() if k != "result"}
+        if job["result"]:
+            body["summary"] = {k: v for k, v in job["result"].items() if k != "timeline"}
+        return body
+
+    def shutdown(self):
+        if self._executor:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
+
+    def stats(self):
+        counts = {}
+        for job in self.jobs.values():
+            counts[job["status"]] = counts.get(job["status"], 0) + 1
+        return {
+            "workers": self.workers,
+            "jobs": counts,
+            "pending": self.pending(),
+            "max_pending": self.max_pending,
+            "disk_mb": round(self.disk_bytes / (1024 * 1024), 1),
+            "rejected": self.rejected
+        }
@@ -0,0 +1,79 @@
+# modules/visibility.py
+# Visibility gate แบบ vectorized: ตรวจเต็มตัว / จุดสำคัญของท่า / ระดับ detector ในครั้งเดียว
+# index ของแต่ละกลุ่มคำนวณครั้งเดียวตอน import (ไม่ต้อง getattr(mp_pose.PoseLandmark, ...) ทุกเฟรม)
+from collections import namedtuple
+
+import numpy as np
+
+from .features import LANDMARK_NAMES, LANDMARK_INDEX
+from .registry import POSE_REQUIREMENTS, DETECTOR_REQUIREMENTS
+
+DISPLAY_NAMES = np.array([name.replace("_", " ").title() for name in LANDMARK_NAMES], dtype=object)
+
+# ต้องเห็นไหล่, สะโพก, เข่า, ข้อเท้า อย่างน้อย 6 จาก 8 จุด
+FULL_BODY = ["LEFT_SHOULDER", "RIGHT_SHOULDER", "LEFT_HIP", "RIGHT_HIP",
+             "LEFT_KNEE", "RIGHT_KNEE", "LEFT_ANKLE", "RIGHT_ANKLE"]
+FULL_BODY_MIN_VISIBLE = 6
+
+# จุดสำคัญเฉพาะท่า (POSE_REQUIREMENTS) และจุดที่ detector ใช้ (DETECTOR_REQUIREMENTS) มาจาก registry
+POSE_MIN_RATIO = 0.7
+DETECTOR_MIN_RATIO = 0.7
+
+
+def _indices(names):
+    return np.array([LANDMARK_INDEX[name] for name in names], dtype=np.intp)
+
+
+FULL_BODY_IDX = _indices(FULL_BODY)
+POSE_IDX = {pose: _indices(names) for pose, names in POSE_REQUIREMENTS.items()}
+DETECTOR_IDX = {pose: (_indices(names), min_vis) for pose, (names, min_vis) in DETECTOR_REQUIREMENTS.items()}
+
+VisibilityVerdict = namedtuple("VisibilityVerdict", [
+    "full_body_visible", "missing_parts", "visibility_score",
+    "pose_visible", "pose_missing", "pose_score",
+    "detector_visible"
+])
+
+
+def visibility_column(landmarks):
+    """ดึง visibility ของ landmark ทั้ง 33 จุดเป็น array เดียว (ไม่มี attr -> 1.0)"""
+    if isinstance(landmarks, np.ndarray):
+        return landmarks[:, 3]
+    return np.fromiter((getattr(lm, "visibility", 1.0) for lm in landmarks), dtype=np.float32, count=len(landmarks))
+
+
+def visibility_gate(landmarks, pose=None, min_visibility=0.5, vis=None):
+    """
+    ตรวจ visibility ทั้ง 3 ระดับจาก visibility column เดียว
+    landmarks: landmark objects หรือ array (33, 4) / vis: ส่ง visibility column มาเองได้
+    """
+    if vis is None:
+        vis = visibility_column(landmarks)
+    seen = vis >= min_visibility
+
+    full_seen = seen[FULL_BODY_IDX]
+    full_body_visible = int(full_seen.sum()) >= FULL_BODY_MIN_VISIBLE
+    missing_parts = DISPLAY_NAMES[FULL_BODY_IDX[~full_seen]].tolist()
+    visibility_score = float(vis[FULL_BODY_IDX].mean())
+
+    idx = POSE_IDX.get(pose)
+    if idx is None:
+        pose_visible, pose_missing, pose_score = True, [], 1.0
+    else:
+        pose_seen = seen[idx]
+        pose_visible = int(pose_seen.sum()) >= len(idx) * POSE_MIN_RATIO
+        pose_missing = DISPLAY_NAMES[idx[~pose_seen]].tolist()
+        pose_score = float(vis[idx].mean())
+
+    detector = DETECTOR_IDX.get(pose)
+    if detector is None:
+        detector_visible = True
+    else:
+        det_idx, det_min = detector
+        detector_visible = int((vis[det_idx] > det_min).sum()) >= len(det_idx) * DETECTOR_MIN_RATIO
+
+    return VisibilityVerdict(
+        full_body_visible, missing_parts, visibility_score,
+        pose_visible, pose_missing, pose_score,
+        detector_visible
+    )
@@ -11,6 +11,7 @@ import json
 import time
 from fastapi import FastAPI, WebSocket, WebSocketDisconnect
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import JSONResponse
 import mediapipe as mp
 import math
 from typing import Dict, Optional, Tuple
@@ -67,6 +68,9 @@ class ClientState:
     frame_skip: int = 2
     last_feedback_time: float = 0.0
     last_advice: str = ""
+    clock_offset: Optional[float] = None
+    last_frame_ts: float = 0.0
+    last_processed_at: float = 0.0
 
 # ==================== Global States ====================
 client_states: Dict[str, ClientState] = {}
@@ -84,9 +88,114 @@ class Config:
     MODEL_COMPLEXITY = 1
     MIN_DETECTION_CONFIDENCE = 0.6
     MIN_TRACKING_CONFIDENCE = 0.6
+    MAX_SESSIONS = 8  # แต่ละ session มี tracker ของตัวเอง
+    MAX_SESSIONS_PER_IP = 2
+    RETRY_AFTER = 5
+    CLOCK_RESYNC = 10.0  # capture time คลาดเกินนี้ -> resync นาฬิกา client
+    # Load control: inference รันใน event loop -> utilization = เวลา inference / เวลาจริง
+    LOAD_WINDOW = 5.0
+    LOAD_HIGH_WATERMARK = 0.85
+    LOAD_LOW_WATERMARK = 0.60
+    LOAD_STEP_DOWN_AFTER = 1.0
+    LOAD_STEP_UP_AFTER = 5.0
 
 config = Config()
 
+# ==================== Load Control ====================
+class LoadController:
+    """
+    ลด/เพิ่มคุณภาพของทุก session ตาม utilization ของ inference (ขั้นเดียวกับ v3)
+    เครื่องอิ่มตัวนานพอ -> complexity 0 -> ย่อภาพ -> ลด fps, มี headroom นานพอ -> ขยับกลับขึ้น
+    """
+    TIERS = [
+        {"name": "full", "model_complexity": None, "max_width": None, "target_fps": 30},
+        {"name": "lite", "model_complexity": 0, "max_width": 640, "target_fps": 30},
+        {"name": "lite_480", "model_complexity": 0, "max_width": 480, "target_fps": 20},
+        {"name": "lite_320", "model_complexity": 0, "max_width": 320, "target_fps": 15},
+        {"name": "survival", "model_complexity": 0, "max_width": 256, "target_fps": 8},
+    ]
+
+    def __init__(self):
+        self.level = 0
+        self.samples: deque = deque()  # (end_ts, duration)
+        self.busy = 0.0
+        self.started_at = time.monotonic()
+        self.over_since: Optional[float] = None
+        self.under_since: Optional[float] = None
+
+    def record(self, duration: float) -> None:
+        """บันทึกเวลาที่ใช้ inference ของหนึ่งเฟรม (วินาที)"""
+        self.samples.append((time.monotonic(), duration))
+        self.busy += duration
+
+    def utilization(self, now: float) -> float:
+        while self.samples and self.samples[0][0] < now - config.LOAD_WINDOW:
+            self.busy -= self.samples.popleft()[1]
+        span = min(config.LOAD_WINDOW, max(now - self.started_at, 1e-6))
+        return max(0.0, self.busy) / span
+
+    def current_tier(self) -> dict:
+        """ประเมิน utilization แล้วขยับ tier ทีละขั้น (มี hysteresis กันแกว่ง)"""
+        now = time.monotonic()
+        util = self.utilization(now)
+        if util >= config.LOAD_HIGH_WATERMARK:
+            self.under_since = None
+            if self.over_since is None:
+                self.over_since = now
+            elif now - self.over_since >= config.LOAD_STEP_DOWN_AFTER and self.level < len(self.TIERS) - 1:
+                self.level += 1
+                self.over_since = now
+        elif util <= config.LOAD_LOW_WATERMARK:
+            self.over_since = None
+            if self.under_since is None:
+                self.under_since = now
+            elif now - self.under_since >= config.LOAD_STEP_UP_AFTER and self.level > 0:
+                self.level -= 1
+                self.under_since = now
+        else:
+            self.over_since = None
+            self.under_since = None
+        return self.TIERS[self.level]
+
+    def stats(self) -> dict:
+        tier = self.TIERS[self.level]
+        return {
+            "tier": tier["name"],
+            "utilization": round(self.utilization(time.monotonic()), 3),
+            "model_complexity": tier["model_complexity"] if tier["model_complexity"] is not None else config.MODEL_COMPLEXITY,
+            "max_width": tier["max_width"],
+            "target_fps": tier["target_fps"]
+        }
+
+class SessionTrackers:
+    """tracker ของ session แยกตาม model complexity (สร้างเมื่อ tier ต้องใช้ครั้งแรก)"""
+
+    def __init__(self):
+        self.trackers: Dict[int, object] = {}
+
+    def get(self, model_complexity: Optional[int]):
+        complexity = config.MODEL_COMPLEXITY if model_complexity is None else model_complexity
+        if complexity not in self.trackers:
+            self.trackers[complexity] = mp_pose.Pose(
+                static_image_mode=False,
+                model_complexity=complexity,
+                enable_segmentation=False,
+                min_detection_confidence=config.MIN_DETECTION_CONFIDENCE,
+                min_tracking_confidence=config.MIN_TRACKING_CONFIDENCE,
+                smooth_landmarks=True
+            )
+        return self.trackers[complexity]
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        for tracker in self.trackers.values():
+            tracker.close()
+        self.trackers.clear()
+
+load = LoadController()
+
 # ==================== Helper Functions ====================
 def angle_between(a: Tuple[float, float], b: Tuple[float, float], c: Tuple[float, float]) -> float:
     """คำนวณมุมระหว่างจุด 3 จุด (องศา)"""
@@ -102,6 +211,23 @@ def angle_between(a: Tuple[float, float], b: Tuple[float, float], c: Tuple[float
     cosang = np.clip(np.dot(ba, bc) / (norm_ba * norm_bc), -1.0, 1.0)
     return math.degrees(math.acos(cosang))
 
+def frame_timestamp(client_state: ClientState, capture_ts, recv_ts: float) -> float:
+    """แปลง capture timestamp ของ client (ms) เป็นเวลาฝั่ง server แบบไม่ย้อนหลัง"""
+    ts = recv_ts
+    try:
+        capture = float(capture_ts) / 1000.0 if capture_ts is not None else None
+    except (TypeError, ValueError):
+        capture = None
+    if capture is not None:
+        offset = recv_ts - capture
+        if (client_state.clock_offset is None or offset < client_state.clock_offset
+                or offset - client_state.clock_offset > config.CLOCK_RESYNC):
+            client_state.clock_offset = offset
+        ts = capture + client_state.clock_offset
+    ts = max(ts, client_state.last_frame_ts)
+    client_state.last_frame_ts = ts
+    return ts
+
 def landmark_xy(lm) -> Tuple[float, float]:
     """ดึงค่า x, y จาก landmark"""
     return (lm.x, lm.y)
@@ -694,30 +820,46 @@ def update_counters(client_id: str, pose_name: str, confidence: float, ts: float
 @app.websocket("/ws/pose")
 async def websocket_endpoint(websocket: WebSocket):
     await websocket.accept()
-    client_id = f"{websocket.client.host}_{int(time.time()*1000)}"
+    host = websocket.client.host
+    
+    # Admission Control
+    same_ip = sum(1 for cid in client_states if cid.rsplit("_", 1)[0] == host)
+    if len(client_states) >= config.MAX_SESSIONS or same_ip >= config.MAX_SESSIONS_PER_IP:
+        reason = "capacity" if len(client_states) >= config.MAX_SESSIONS else "per_ip_limit"
+        logger.warning(f"[REJECTED] {host} ({reason})")
+        await websocket.send_text(json.dumps({
+            "status": "server_busy",
+            "reason": reason,
+            "retry_after": config.RETRY_AFTER
+        }))
+        await websocket.close(code=1013)
+        return
+    
+    client_id = f"{host}_{int(time.time()*1000)}"
     logger.info(f"[CONNECTED] {client_id}")
     
     client_states[client_id] = ClientState()
     frame_idx = 0
     
-    with mp_pose.Pose(
-        static_image_mode=False,
-        model_complexity=config.MODEL_COMPLEXITY,
-        enable_segmentation=False,
-        min_detection_confidence=config.MIN_DETECTION_CONFIDENCE,
-        min_tracking_confidence=config.MIN_TRACKING_CONFIDENCE,
-        smooth_landmarks=True
-    ) as pose_detector:
+    with SessionTrackers() as trackers:
         try:
             while True:
                 data = await websocket.receive_text()
+                recv_ts = time.time()
                 frame_idx += 1
                 
                 # Handle Commands
+                capture_ts = None
                 if data.startswith("{"):
+                    envelope = False
                     try:
                         cmd = json.loads(data)
                         
+                        if "frame" in cmd:
+                            # Frame envelope: {"frame": "<base64>", "ts": <capture time ms>}
+                            envelope = True
+                            data, capture_ts = cmd["frame"], cmd.get("ts")
+                        
                         if "frame_skip" in cmd:
                             client_states[client_id].frame_skip = int(cmd["frame_skip"])
                         
@@ -737,13 +879,21 @@ async def websocket_endpoint(websocket: WebSocket):
                                 }))
                     except Exception as e:
                         logger.error(f"[CMD ERROR] {e}")
-                    continue
+                    if not envelope:
+                        continue
                 
                 # Frame Skip
                 if (frame_idx % (client_states[client_id].frame_skip + 1)) != 0:
                     await websocket.send_text(json.dumps({"status": "ok"}))
                     continue
                 
+                # Load Control: เครื่องอิ่มตัว -> ทิ้งเฟรมที่เกิน target fps ของ tier ก่อน decode
+                tier = load.current_tier()
+                if recv_ts - client_states[client_id].last_processed_at < 1.0 / tier["target_fps"]:
+                    await websocket.send_text(json.dumps({"status": "skipped", "tier": tier["name"]}))
+                    continue
+                client_states[client_id].last_processed_at = recv_ts
+                
                 # Decode Frame
                 try:
                     frame = cv2.imdecode(
@@ -759,9 +909,15 @@ async def websocket_endpoint(websocket: WebSocket):
                     }))
                     continue
                 
-                ts = time.time()
+                # Hold timer ใช้เวลาที่ถ่ายเฟรม (ถ้า client ส่งมา) ไม่ใช่เวลาที่ได้รับ
+                ts = frame_timestamp(client_states[client_id], capture_ts, recv_ts)
+                if tier["max_width"] and frame.shape[1] > tier["max_width"]:
+                    height = int(round(frame.shape[0] * tier["max_width"] / frame.shape[1]))
+                    frame = cv2.resize(frame, (tier["max_width"], height), interpolation=cv2.INTER_AREA)
                 rgb_frame = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
-                results = pose_detector.process(rgb_frame)
+                started = time.perf_counter()
+                results = trackers.get(tier["model_complexity"]).process(rgb_frame)
+                load.record(time.perf_counter() - started)
                 
                 # Prepare Response
                 response = {
@@ -858,6 +1014,7 @@ async def root():
         "endpoints": {
             "websocket": "/ws/pose",
             "health": "/health",
+            "ready": "/ready",
             "stats": "/stats"
         }
     }
@@ -871,6 +1028,21 @@ async def health():
         "timestamp": time.time()
     }
 
+@app.get("/ready")
+async def ready():
+    """Readiness endpoint สำหรับ load balancer"""
+    remaining = max(0, config.MAX_SESSIONS - len(client_states))
+    body = {
+        "ready": remaining > 0,
+        "active_clients": len(client_states),
+        "capacity": config.MAX_SESSIONS,
+        "remaining": remaining,
+        "timestamp": time.time()
+    }
+    if remaining <= 0:
+        return JSONResponse(body, status_code=503, headers={"Retry-After": str(config.RETRY_AFTER)})
+    return body
+
 @app.get("/stats")
 async def stats():
     """Statistics endpoint"""
@@ -886,6 +1058,7 @@ async def stats():
     
     return {
         "active_clients": len(client_states),
+        "load": load.stats(),
         "total_reps": total_reps,
         "total_hold_time": round(total_hold_time, 2),
         "poses_in_use": list(set(